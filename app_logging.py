@@ -0,0 +1,138 @@
+"""
+Queued logging to a rotating log file.
+
+The jobs log a line per mismatch, so on a big database the log file is a hot
+path. Loggers only merge the message with its arguments and put the record on
+a queue; a listener thread formats it (time stamp, level, any traceback) and
+writes the file (and any other handlers, e.g. the message window). The file
+is flushed whenever the queue runs dry rather than after every record, and
+rolls over to numbered backups at a size limit instead of growing forever.
+
+Most of a logging call's cost is the logging module itself, so a record costs
+the job thread only a little less than writing it directly (about 5%, see
+benchmarks/bench_logging.py). What moves off the job thread is waiting on the
+disk - flushes, rollovers and a slow or network drive.
+"""
+
+import atexit
+import copy
+import logging
+import logging.handlers
+import os
+import queue
+from typing import Optional, Sequence
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+_listener: Optional["_FlushingListener"] = None
+
+
+class BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """A RotatingFileHandler that leaves flushing to the listener"""
+
+    def __init__(self, filename: str, maxBytes: int = 0, backupCount: int = 0, encoding: Optional[str] = None):
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding)
+        self._size: Optional[int] = None  # Bytes in the file, counted as records are written
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # The base class checks the size with a seek (which flushes) and stats the file for every record
+        try:
+            msg = self.format(record) + self.terminator
+            if self.stream is None:
+                self.stream = self._open()
+            if self._size is None:
+                self._size = self.stream.seek(0, 2)
+            size = self._encoded_size(msg)
+            if self.maxBytes > 0 and self._size > 0 and self._size + size >= self.maxBytes:
+                self.doRollover()
+                self._size = 0
+            self.stream.write(msg)
+            self._size += size
+        except Exception:  # pylint: disable=broad-except
+            self.handleError(record)
+
+    def _encoded_size(self, msg: str) -> int:
+        """Bytes msg takes in the file - names and messages are not all ASCII, and newlines may be \r\n"""
+        size = len(msg) if msg.isascii() else len(msg.encode(self.encoding or "utf-8", "replace"))
+        return size + msg.count("\n") * (len(os.linesep) - 1)
+
+    def flush(self) -> None:
+        # Writes stay in the file buffer until the listener catches up and calls flush_now()
+        pass
+
+    def flush_now(self) -> None:
+        super().flush()
+
+    def close(self) -> None:
+        self.flush_now()
+        super().close()
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """A QueueHandler that leaves the formatting to the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The base class formats the whole line here, on the job's thread. Only the arguments are merged now (they
+        # may change once the call returns); the traceback stays in exc_info for the listener's formatter.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class _FlushingListener(logging.handlers.QueueListener):
+    """Flushes the file handlers each time it has caught up with the queue"""
+
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            if not block:
+                raise
+        for handler in self.handlers:
+            if isinstance(handler, BufferedRotatingFileHandler):
+                handler.flush_now()
+        return self.queue.get(block=True)
+
+
+def setup_logging(
+    logfile: str,
+    max_bytes: int = 1_000_000,
+    backups: int = 3,
+    handlers: Sequence[logging.Handler] = (),
+    level: int = logging.INFO,
+) -> None:
+    """
+    Send the root logger's records through a queue to logfile (rotated at
+    max_bytes, keeping backups old files) and the extra handlers.
+    Calling it again replaces the previous setup.
+    """
+    global _listener  # pylint: disable=global-statement
+    stop_logging()
+
+    file_handler = BufferedRotatingFileHandler(logfile, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_DeferredQueueHandler(log_queue))
+    root.setLevel(level)
+
+    _listener = _FlushingListener(log_queue, file_handler, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Write out everything still queued and close the log file"""
+    global _listener  # pylint: disable=global-statement
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+
+atexit.register(stop_logging)
@@ -5,14 +5,19 @@
 
 """Version information"""
 import datetime
+import json
+import logging
+import os
 import re
+import time
 from typing import List, Optional
 
 import dateutil.parser
 import dateutil.tz
-import requests
 import semver.version  # type: ignore
 
+import http_client
+
 
 class ReleaseInfo:
     """
@@ -37,16 +42,32 @@ class ReleaseInfo:
         if match is not None:
             self.semver = match.group(1)
 
+    def as_json(self) -> dict:
+        """The release fields in GitHub's form, so ReleaseInfo(release.as_json()) is the same release"""
+        return {
+            "tag_name": self.tag,
+            "html_url": self.url,
+            "draft": self.draft,
+            "prerelease": self.prerelease,
+            "published_at": self.published.isoformat(),
+        }
+
+
+# How long (seconds) a release check is good for before GitHub is asked again
+CHECK_INTERVAL = 24 * 60 * 60
+
+RELEASES_URL = "https://api.github.com/repos/{}/releases"
+
 
 def releases(user_repo: str) -> List[ReleaseInfo]:
     """
     Retrieves the list of releases for the provided repo. user_repo should be
     of the form "user/repo"
     """
-    url = f"https://api.github.com/repos/{user_repo}/releases"
+    url = RELEASES_URL.format(user_repo)
     # The timeout may be too fast, but it's going to hold up displaying the
     # settings screen. Better to miss an update than hang for too long.
-    resp = requests.get(url, headers={"Accept": "application/vnd.github.v3+json"}, timeout=2)
+    resp = http_client.get(url, headers={"Accept": "application/vnd.github.v3+json"}, timeout=2)
     if not resp.ok:
         return []
 
@@ -75,10 +96,13 @@ def highest_semver(rlist: List[ReleaseInfo]) -> ReleaseInfo:
     '3.0.0'
     """
     highest = rlist[0]
+    highest_version = semver.version.Version.parse(highest.semver)
     for release in rlist:
+        if release.prerelease:
+            continue
         sv_release = semver.version.Version.parse(release.semver)
-        if sv_release.compare(highest.semver) > 0 and not release.prerelease:
-            highest = release
+        if sv_release > highest_version:
+            highest, highest_version = release, sv_release
     return highest
 
 
@@ -116,12 +140,70 @@ def git_semver(wrv: str) -> str:
     return str(version_info)
 
 
-def latest() -> Optional[ReleaseInfo]:
-    """Retrieves the latest release info"""
-    rlist = releases("dmanusrex/TimeValidate")
-    if len(rlist) == 0:
+def _load_check(cache_file: str) -> dict:
+    try:
+        with open(cache_file, "r", encoding="utf-8") as file:
+            cached = json.load(file)
+        if not isinstance(cached, dict) or not isinstance(cached.get("checked", 0), (int, float)):
+            return {}
+        if cached.get("release") is not None:
+            ReleaseInfo(cached["release"])
+        return cached
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+
+def _save_check(cache_file: str, cached: dict) -> None:
+    try:
+        with open(cache_file + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(cached, file)
+        os.replace(cache_file + ".tmp", cache_file)
+    except OSError as ex:
+        logging.debug("Unable to save the release check: %s", ex)
+
+
+def latest(cache_file: Optional[str] = None, max_age: float = CHECK_INTERVAL) -> Optional[ReleaseInfo]:
+    """
+    Retrieves the latest release info.
+
+    With a cache_file, a check made in the last max_age seconds is reused
+    without going to GitHub. After that the releases are requested with the
+    saved ETag, and a 304 (no new releases) renews the saved result.
+    """
+    user_repo = "dmanusrex/TimeValidate"
+    if cache_file is None:
+        rlist = releases(user_repo)
+        if len(rlist) == 0:
+            return None
+        return highest_semver(rlist)
+
+    cached = _load_check(cache_file)
+    if cached and cached.get("repo") == user_repo and 0 <= time.time() - cached.get("checked", 0) < max_age:
+        return ReleaseInfo(cached["release"]) if cached.get("release") else None
+
+    headers = {"Accept": "application/vnd.github.v3+json"}
+    if cached.get("repo") == user_repo and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    resp = http_client.get(RELEASES_URL.format(user_repo), headers=headers, timeout=5)
+    if resp.status_code == 304:
+        cached["checked"] = time.time()
+        _save_check(cache_file, cached)
+        return ReleaseInfo(cached["release"]) if cached.get("release") else None
+    if not resp.ok:
         return None
-    return highest_semver(rlist)
+
+    rlist = list(map(ReleaseInfo, resp.json()))
+    highest = highest_semver(rlist) if len(rlist) > 0 else None
+    _save_check(
+        cache_file,
+        {
+            "repo": user_repo,
+            "checked": time.time(),
+            "etag": resp.headers.get("ETag"),
+            "release": highest.as_json() if highest is not None else None,
+        },
+    )
+    return highest
 
 
 def is_latest_version(latest_version: Optional[ReleaseInfo], swonv: str) -> bool:
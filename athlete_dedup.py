@@ -0,0 +1,147 @@
+"""
+Duplicate athletes in the ATHLETE table.
+
+An athlete entered twice shows up as two ATHLETEIDs with the same license, or
+with the same name and birth date (one of them often without a license). The
+rows are grouped on normalized keys in a single pass - one dict per key kind -
+so the cost is linear in the number of athletes rather than pairwise.
+"""
+
+import datetime
+import unicodedata
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from athlete_snapshot import AthleteSnapshot
+from job_metrics import metrics
+
+# ATHLETE columns the search needs, in snapshot order
+DUPLICATE_COLUMNS = ("ATHLETEID", "FIRSTNAME", "LASTNAME", "BIRTHDATE", "GENDER", "LICENSE", "CLUBID")
+
+SAME_LICENSE = "Same license"
+SAME_NAME = "Same name and birth date"
+
+# Columns of the duplicates report
+REPORT_HEADER = [
+    "Group",
+    "Reason",
+    "ATHLETEID",
+    "First Name",
+    "Last Name",
+    "Birth Date",
+    "Gender",
+    "License",
+    "CLUBID",
+    "Action",
+    "Suggestion",
+]
+
+
+class DuplicateGroup(NamedTuple):
+    """Athletes that look like the same person, with the one to merge the others into"""
+
+    reason: str  # SAME_LICENSE or SAME_NAME
+    key: str  # The shared license, or name and birth date
+    keep: tuple  # Suggested ATHLETE row to keep (DUPLICATE_COLUMNS order)
+    merge: List[tuple]  # Rows to merge into keep
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """Case, accents, spaces and punctuation removed - "D'Arcy-Lée" and "darcy lee" match"""
+    if not name:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", name)
+    return "".join(c for c in decomposed if c.isalnum()).casefold()
+
+
+def normalize_license(license: Optional[str]) -> str:
+    return (license or "").strip().upper()
+
+
+def _birth_date(value) -> Optional[datetime.date]:
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return None
+
+
+def _keep_order(row: tuple) -> tuple:
+    """Sort key - the row to keep has a license, the most fields filled in and the lowest ATHLETEID"""
+    filled = sum(1 for value in row[1:] if value not in (None, ""))
+    return (not normalize_license(row[5]), -filled, row[0])
+
+
+def _group(reason: str, key: str, rows: List[tuple]) -> DuplicateGroup:
+    ordered = sorted(rows, key=_keep_order)
+    return DuplicateGroup(reason, key, ordered[0], ordered[1:])
+
+
+def find_duplicates(athletes: AthleteSnapshot) -> List[DuplicateGroup]:
+    """
+    Groups of athletes sharing a license, then groups sharing a normalized name
+    and birth date that aren't already covered by a license group.
+    athletes must hold DUPLICATE_COLUMNS.
+    """
+    by_license: Dict[str, List[int]] = {}
+    by_name: Dict[tuple, List[int]] = {}
+    metrics.begin_stage("Grouping athletes", len(athletes))
+    for index, row in enumerate(athletes.rows()):
+        metrics.advance()
+        athlete_id, firstname, lastname, birthdate, gender, license, club_id = row
+        license = normalize_license(license)
+        if license:
+            by_license.setdefault(license, []).append(index)
+        born = _birth_date(birthdate)
+        last = normalize_name(lastname)
+        if born is not None and last:
+            by_name.setdefault((last, normalize_name(firstname), born), []).append(index)
+
+    groups = []
+    # The license group each row landed in, so a name group that adds nothing isn't reported twice
+    license_group: Dict[int, str] = {}
+    for license, indexes in by_license.items():
+        if len(indexes) > 1:
+            groups.append(_group(SAME_LICENSE, license, [athletes.row(i) for i in indexes]))
+            license_group.update((i, license) for i in indexes)
+    for (last, first, born), indexes in by_name.items():
+        if len(indexes) < 2:
+            continue
+        covered = {license_group.get(i) for i in indexes}
+        if len(covered) == 1 and None not in covered:
+            continue
+        row = athletes.row(indexes[0])
+        key = "{} {} {}".format(row[1] or "", row[2] or "", born.isoformat())
+        groups.append(_group(SAME_NAME, key, [athletes.row(i) for i in indexes]))
+    return groups
+
+
+def merge_suggestion(group: DuplicateGroup) -> str:
+    return "Keep ATHLETEID {} and merge ATHLETEID {} into it".format(
+        group.keep[0], ", ".join(str(row[0]) for row in group.merge)
+    )
+
+
+def report_rows(groups: Sequence[DuplicateGroup]) -> List[list]:
+    """One report line per athlete, the group's kept athlete first"""
+    lines = []
+    for number, group in enumerate(groups, 1):
+        suggestion = merge_suggestion(group)
+        for row in [group.keep] + group.merge:
+            athlete_id, firstname, lastname, birthdate, gender, license, club_id = row
+            born = _birth_date(birthdate)
+            lines.append(
+                [
+                    number,
+                    group.reason,
+                    athlete_id,
+                    firstname,
+                    lastname,
+                    born.isoformat() if born else "",
+                    gender,
+                    license,
+                    club_id,
+                    "Keep" if row is group.keep else "Merge",
+                    suggestion,
+                ]
+            )
+    return lines
@@ -0,0 +1,249 @@
+"""Compact columnar snapshot of the Splash ATHLETE table"""
+
+import sys
+from array import array
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from job_metrics import metrics
+from mdb_reader import MdbReader
+
+# Columns that are held as plain integers
+INT_COLUMNS = ("ATHLETEID", "CLUBID")
+
+# Low cardinality columns that are dictionary encoded (one small code per row + a table of distinct values)
+CATEGORY_COLUMNS = ("NATION", "HANDICAPEX", "HANDICAPS", "HANDICAPSB", "HANDICAPSM", "SDMSID", "GENDER")
+
+# Rows fetched from the cursor at a time while loading
+FETCH_SIZE = 5000
+
+
+class IntColumn:
+    """Integer column stored in a typed array"""
+
+    def __init__(self):
+        self.values = array("q")
+        self.nulls: Dict[int, bool] = {}
+
+    def append(self, value) -> None:
+        if value is None:
+            self.nulls[len(self.values)] = True
+            self.values.append(0)
+        else:
+            self.values.append(int(value))
+
+    def __getitem__(self, index: int):
+        if index in self.nulls:
+            return None
+        return self.values[index]
+
+    def take(self, indexes: Sequence[int]) -> "IntColumn":
+        column = IntColumn()
+        column.values = array("q", _pick(self.values, indexes))
+        if self.nulls:
+            column.nulls = {new: True for new, old in enumerate(indexes) if old in self.nulls}
+        return column
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class StringColumn:
+    """Text column held as a list of interned strings"""
+
+    def __init__(self):
+        self.values: list = []
+
+    def append(self, value) -> None:
+        self.values.append(sys.intern(value) if isinstance(value, str) else value)
+
+    def __getitem__(self, index: int):
+        return self.values[index]
+
+    def take(self, indexes: Sequence[int]) -> "StringColumn":
+        column = StringColumn()
+        column.values = _pick(self.values, indexes)
+        return column
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class CategoryColumn:
+    """
+    Dictionary encoded column.
+
+    Each row holds a code in a typed array and the distinct values live once
+    in `categories`. Two columns can be compared code against code once they
+    share the same categories (see `encode`).
+    """
+
+    def __init__(self, categories: Optional[List] = None):
+        self.codes = array("H")
+        self.categories: list = []
+        self._lookup: Dict = {}
+        for value in categories or []:
+            self.code_of(value, add=True)
+
+    def code_of(self, value, add: bool = False) -> int:
+        """Return the code for value, -1 if unknown (or add it when add is set)"""
+        code = self._lookup.get(value)
+        if code is None:
+            if not add:
+                return -1
+            code = len(self.categories)
+            self.categories.append(sys.intern(value) if isinstance(value, str) else value)
+            self._lookup[value] = code
+        return code
+
+    def append(self, value) -> None:
+        code = self.code_of(value, add=True)
+        # Columns from take() share the categories, so the code can be past 0xFFFF without this column adding it
+        if code > 0xFFFF and self.codes.typecode == "H":
+            self.codes = array("L", self.codes)
+        self.codes.append(code)
+
+    def encode(self, values: Iterable) -> array:
+        """Encode values with this column's categories, adding any that are new"""
+        codes = [self.code_of(value, add=True) for value in values]
+        return array("L" if codes and max(codes) > 0xFFFF else "H", codes)
+
+    def __getitem__(self, index: int):
+        return self.categories[self.codes[index]]
+
+    def take(self, indexes: Sequence[int]) -> "CategoryColumn":
+        """The rows at indexes, sharing this column's categories"""
+        column = CategoryColumn()
+        column.categories = self.categories
+        column._lookup = self._lookup
+        column.codes = array(self.codes.typecode, _pick(self.codes, indexes))
+        return column
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+
+def _pick(values: Sequence, indexes: Sequence[int]) -> list:
+    """[values[i] for i in indexes], done in C"""
+    if len(indexes) == 0:
+        return []
+    if len(indexes) == 1:
+        return [values[indexes[0]]]
+    return list(itemgetter(*indexes)(values))
+
+
+def _new_column(name: str):
+    if name in INT_COLUMNS:
+        return IntColumn()
+    if name in CATEGORY_COLUMNS:
+        return CategoryColumn()
+    return StringColumn()
+
+
+class AthleteSnapshot:
+    """
+    Read-only columnar copy of (some of) the ATHLETE table.
+
+    Loaded once per job run. Rows are addressed by position; `row()` rebuilds
+    a tuple in column order when a job needs one.
+    """
+
+    def __init__(self, columns: Sequence[str]):
+        self.names: Tuple[str, ...] = tuple(columns)
+        self._columns = [_new_column(name) for name in self.names]
+        self._position = {name: i for i, name in enumerate(self.names)}
+
+    @classmethod
+    def load(cls, con, columns: Sequence[str], where: str = "", params: Sequence = ()) -> "AthleteSnapshot":
+        """Stream the ATHLETE table from an open connection into a new snapshot"""
+        snapshot = cls(columns)
+        sql = "SELECT {} FROM ATHLETE {}".format(", ".join(columns), where)
+        cursor = con.cursor()
+        if params:
+            cursor.execute(sql, params)
+        else:
+            cursor.execute(sql)
+        while True:
+            batch = cursor.fetchmany(FETCH_SIZE)
+            if not batch:
+                break
+            snapshot.extend(batch)
+            metrics.advance(len(batch))
+        cursor.close()
+        return snapshot
+
+    @classmethod
+    def load_mdb(cls, path: str, columns: Sequence[str], after_id: int = 0) -> "AthleteSnapshot":
+        """
+        Load the snapshot straight from the database file, without ODBC.
+
+        With after_id only rows with a higher ATHLETEID are kept (ATHLETEID must be one of the columns).
+        """
+        snapshot = cls(columns)
+        with MdbReader(path) as mdb:
+            rows = mdb.read_table("ATHLETE", columns)
+            if after_id:
+                key = snapshot._position["ATHLETEID"]
+                rows = (row for row in rows if row[key] is not None and row[key] > after_id)
+            snapshot.extend(rows)
+        metrics.advance(len(snapshot))
+        return snapshot
+
+    def extend(self, rows: Iterable[Sequence]) -> None:
+        """Append rows (sequences in column order)"""
+        columns = self._columns
+        for row in rows:
+            for column, value in zip(columns, row):
+                column.append(value)
+
+    def column(self, name: str):
+        """Return the column object for name"""
+        return self._columns[self._position[name]]
+
+    def row(self, index: int) -> tuple:
+        """Return row index as a tuple in column order"""
+        return tuple(column[index] for column in self._columns)
+
+    def take(self, indexes: Sequence[int]) -> "AthleteSnapshot":
+        """A new snapshot holding just the rows at indexes, in that order"""
+        snapshot = AthleteSnapshot(self.names)
+        snapshot._columns = [column.take(indexes) for column in self._columns]
+        return snapshot
+
+    def rows(self, indexes: Optional[Iterable[int]] = None) -> Iterator[tuple]:
+        """Iterate rows as tuples, optionally only those at indexes"""
+        if indexes is None:
+            indexes = range(len(self))
+        for index in indexes:
+            yield self.row(index)
+
+    def where_equal(self, name: str, value) -> List[int]:
+        """Positions of the rows whose column name equals value"""
+        column = self.column(name)
+        if isinstance(column, CategoryColumn):
+            code = column.code_of(value)
+            if code < 0:
+                return []
+            return [i for i, c in enumerate(column.codes) if c == code]
+        return [i for i in range(len(column)) if column[i] == value]
+
+    def __len__(self) -> int:
+        return len(self._columns[0]) if self._columns else 0
+
+
+def index_roster(roster: list) -> dict:
+    """
+    Index the Active Roster by SNC_ID.
+
+    IDs that appear more than once are left out, as a roster match has to be unique.
+    """
+    index: dict = {}
+    duplicates = set()
+    for athlete in roster:
+        key = str(athlete["SNC_ID"])
+        if key in index:
+            duplicates.add(key)
+        index[key] = athlete
+    for key in duplicates:
+        del index[key]
+    return index
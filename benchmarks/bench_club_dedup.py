@@ -0,0 +1,54 @@
+"""Time the club duplicate search as the club list grows - the time per club should stay about flat
+
+    python benchmarks/bench_club_dedup.py [largest]
+"""
+
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from club_dedup import ClubRow, find_club_duplicates  # noqa: E402
+from club_list import ClubInfo  # noqa: E402
+
+PLACES = ["Toronto", "Ottawa", "Barrie", "Laval", "Québec", "Calgary", "Edmonton", "Regina", "Halifax", "Victoria"]
+WORDS = ["Aquatic Club", "Swim Club", "Club de Natation", "Swimming", "Dolphins", "Marlins", "Sharks", "Titans"]
+
+
+def synthetic(count: int, seed: int = 1):
+    """(CLUB rows, club list) - one CLUB row per listed club, plus about 3% near-duplicate rows"""
+    rng = random.Random(seed)
+    clubs = {}
+    rows = []
+    for i in range(count):
+        code = "C%05d" % i
+        word = "".join(rng.choice(string.ascii_lowercase) for _ in range(7))
+        name = "%s %s %s" % (rng.choice(PLACES), word, rng.choice(WORDS))
+        clubs[code] = ClubInfo("ON", name, None)
+        rows.append(ClubRow(len(rows) + 1, code, name, "CAN"))
+        if rng.random() < 0.03:
+            rows.append(ClubRow(len(rows) + 1, code + "-X", name.upper() + "S", "CAN"))
+    return rows, clubs
+
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 32_000
+    size = largest // 16
+    while size <= largest:
+        rows, clubs = synthetic(size)
+        start = time.perf_counter()
+        findings = find_club_duplicates(rows, clubs)
+        elapsed = time.perf_counter() - start
+        groups = max((finding.group for finding in findings), default=0)
+        print(
+            "%6d listed clubs, %6d CLUB rows: %6.0f ms  %5.1f us/club  %d duplicate groups"
+            % (len(clubs), len(rows), elapsed * 1000, elapsed / len(rows) * 1e6, groups)
+        )
+        size *= 2
+
+
+if __name__ == "__main__":
+    main()
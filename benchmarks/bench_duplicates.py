@@ -0,0 +1,48 @@
+"""Time the duplicate athlete search at growing database sizes - the time per athlete should stay flat
+
+    python benchmarks/bench_duplicates.py [largest]
+"""
+
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from athlete_dedup import DUPLICATE_COLUMNS, find_duplicates  # noqa: E402
+from athlete_snapshot import AthleteSnapshot  # noqa: E402
+
+
+def synthetic(count: int, seed: int = 1) -> AthleteSnapshot:
+    """About 1% of the athletes are entered a second time, half of those without their license"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        born = datetime.datetime(1990, 1, 1) + datetime.timedelta(days=rng.randrange(12000))
+        row = (i + 1, "First%d" % (i % 5000), "Last%d" % i, born, rng.choice("MF"), str(100000 + i), i % 300)
+        rows.append(row)
+        if rng.random() < 0.01:
+            license = row[5] if rng.random() < 0.5 else None
+            rows.append((count + i + 1, row[1].upper(), " " + row[2], born, row[4], license, row[6]))
+    athletes = AthleteSnapshot(DUPLICATE_COLUMNS)
+    athletes.extend(rows)
+    return athletes
+
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    for count in (largest // 8, largest // 4, largest // 2, largest):
+        athletes = synthetic(count)
+        start = time.perf_counter()
+        groups = find_duplicates(athletes)
+        elapsed = time.perf_counter() - start
+        print(
+            "%7d athletes: %6.0f ms  %5.2f us/athlete  %d groups"
+            % (len(athletes), elapsed * 1000, elapsed / len(athletes) * 1e6, len(groups))
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Benchmark the time a job thread spends per log record, direct file logging vs the queued pipeline
+
+    python benchmarks/bench_logging.py [records]
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app_logging import LOG_FORMAT, setup_logging, stop_logging  # noqa: E402
+
+
+def log_mismatches(count: int) -> tuple:
+    """
+    Log count lines like the para job's mismatch messages. Returns the wall
+    time and this thread's CPU time - with one core the listener thread runs
+    in the wall time too, the CPU time is what logging costs the job thread.
+    """
+    start = time.perf_counter()
+    start_cpu = time.thread_time()
+    for i in range(count):
+        logging.error("Athlete %s %s %s sport class mismatch. Splash: %s Roster: %s", "Jane", "Doe", "SB", i % 15, 9)
+    return time.perf_counter() - start, time.thread_time() - start_cpu
+
+
+def report(name: str, count: int, wall: float, cpu: float) -> str:
+    return "%-20s %7.0f ms wall  %5.2f us/record on the job thread" % (name, wall * 1000, cpu / count * 1e6)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as folder:
+        logfile = os.path.join(folder, "direct.log")
+        logging.basicConfig(filename=logfile, level=logging.INFO, format=LOG_FORMAT, force=True)
+        direct, direct_cpu = log_mismatches(count)
+        logging.shutdown()
+        print(report("direct file handler", count, direct, direct_cpu))
+
+        logfile = os.path.join(folder, "queued.log")
+        setup_logging(logfile, max_bytes=5_000_000, backups=3)
+        queued, queued_cpu = log_mismatches(count)
+        start = time.perf_counter()
+        stop_logging()
+        drain = time.perf_counter() - start
+        files = [name for name in os.listdir(folder) if name.startswith("queued.log")]
+        print(report("queued + rotating", count, queued, queued_cpu))
+        print("listener drained in %.0f ms after the last record, %d log files" % (drain * 1000, len(files)))
+        print("job thread speedup: %.2fx" % (direct_cpu / queued_cpu))
+
+
+if __name__ == "__main__":
+    main()
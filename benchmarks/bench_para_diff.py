@@ -0,0 +1,76 @@
+"""Benchmark the row loop against the bulk para diff on a synthetic meet database
+
+    python benchmarks/bench_para_diff.py [athletes]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from athlete_snapshot import AthleteSnapshot, index_roster  # noqa: E402
+from para_diff import DIFF_COLUMNS, diff_bulk, diff_rows, eligible_levels  # noqa: E402
+
+
+def synthetic(count: int, seed: int = 1):
+    """Return (athletes, roster) - about a quarter of the athletes are on the roster"""
+    rng = random.Random(seed)
+    classes = ["1", "2", "5", "9", "10", "14", "NE", None]
+    roster = []
+    rows = []
+    for i in range(count):
+        license = str(100000 + i)
+        nation = "CAN" if rng.random() < 0.9 else "USA"
+        para = rng.random() < 0.25
+        s, sb, sm = (rng.choice(classes) for _ in range(3))
+        exceptions = rng.choice(["", "4", "A,4", "4,5,+", "H,T"])
+        level = rng.choice(["1", "2", "3", "Int"])
+        sdms = rng.randint(10000, 99999) if level == "Int" else None
+        if para:
+            roster.append(
+                {
+                    "SNC_ID": license,
+                    "S": s,
+                    "SB": sb,
+                    "SM": sm,
+                    "Exceptions": exceptions,
+                    "SDMS_ID": sdms,
+                    "Level": level,
+                }
+            )
+            # Most rows already agree with the roster
+            if rng.random() < 0.8:
+                s, sb, sm = (c if c not in (None, "NE") else "0" for c in (s, sb, sm))
+        rows.append((i + 1, "First%d" % i, "Last%d" % i, license, exceptions or None, s, sb, sm, sdms, nation))
+    athletes = AthleteSnapshot(DIFF_COLUMNS)
+    athletes.extend(rows)
+    return athletes, roster
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    athletes, roster = synthetic(count)
+    roster_index = index_roster(roster)
+    levels = eligible_levels("3")
+    print(f"{count} athletes, {len(roster)} on the roster")
+
+    results = {}
+    for name, diff in (("row loop", diff_rows), ("bulk", diff_bulk)):
+        best = None
+        for _ in range(3):
+            start = time.perf_counter()
+            results[name] = diff(athletes, roster_index, levels)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print(
+            f"{name:>9}: {best * 1000:8.1f} ms  "
+            f"{len(results[name].changes)} changes, {len(results[name].level_warnings)} level warnings"
+        )
+
+    assert results["row loop"] == results["bulk"], "bulk diff does not match the row loop"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Benchmark the sharded para diff at 1, 2, 4 and 8 worker processes
+
+    python benchmarks/bench_sharded_diff.py [athletes]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from athlete_snapshot import index_roster  # noqa: E402
+from bench_para_diff import synthetic  # noqa: E402
+from para_diff import diff_sharded, eligible_levels  # noqa: E402
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    athletes, roster = synthetic(count)
+    roster_index = index_roster(roster)
+    levels = eligible_levels("3")
+    print("%d athletes, %d on the roster, %d CPUs" % (len(athletes), len(roster_index), os.cpu_count()))
+
+    baseline = None
+    reference = None
+    for workers in (1, 2, 4, 8):
+        start = time.perf_counter()
+        result = diff_sharded(athletes, roster_index, levels, workers)
+        elapsed = time.perf_counter() - start
+        if baseline is None:
+            baseline, reference = elapsed, result
+        print(
+            "%d worker(s): %7.0f ms  speedup %.2fx  %d changes  same result: %s"
+            % (workers, elapsed * 1000, baseline / elapsed, len(result.changes), result == reference)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Simulate Splash holding write locks while a change plan is applied
+
+A second connection to a SQLite database keeps taking an exclusive lock, the
+way Splash locks records while it saves. The plan is applied once in a single
+transaction (which fails on the first lock) and once through the write
+scheduler (which waits the locks out in small batches).
+
+    python benchmarks/sim_lock_contention.py [changes]
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from change_plan import ChangePlan  # noqa: E402
+from write_scheduler import WriteScheduler  # noqa: E402
+
+
+def create_database(path: str, count: int) -> None:
+    con = sqlite3.connect(path)
+    con.execute("CREATE TABLE ATHLETE (ATHLETEID INTEGER PRIMARY KEY, FIRSTNAME TEXT, HANDICAPEX TEXT)")
+    con.executemany("INSERT INTO ATHLETE VALUES (?, ?, ?)", [(i, "First%d" % i, "4") for i in range(1, count + 1)])
+    con.commit()
+    con.close()
+
+
+def splash(path: str, stop: threading.Event, held: list) -> None:
+    """Take an exclusive lock for 20-150 ms, release it for 50-150 ms, until stopped"""
+    con = sqlite3.connect(path, timeout=5, isolation_level=None)
+    rng = random.Random(2)
+    while not stop.is_set():
+        con.execute("BEGIN EXCLUSIVE")
+        hold = rng.uniform(0.02, 0.15)
+        time.sleep(hold)
+        con.execute("COMMIT")
+        held[0] += hold
+        time.sleep(rng.uniform(0.05, 0.15))
+    con.close()
+
+
+def make_plan(path: str, count: int) -> ChangePlan:
+    plan = ChangePlan("Clear_Exceptions", path)
+    for i in range(1, count + 1):
+        plan.add("ATHLETE", i, "HANDICAPEX", "4", None)
+    return plan
+
+
+def run(path: str, count: int, scheduled: bool) -> None:
+    stop = threading.Event()
+    held = [0.0]
+    locker = threading.Thread(target=splash, args=(path, stop, held))
+    locker.start()
+    time.sleep(0.05)
+
+    con = sqlite3.connect(path, timeout=0)  # Fail on a lock at once, as the Access driver does
+    plan = make_plan(path, count)
+    start = time.perf_counter()
+    try:
+        if scheduled:
+            scheduler = WriteScheduler(con, in_use=True, batch_size=50, retries=20)
+            plan.apply(con, scheduler)
+            stats = scheduler.stats()
+            print(
+                "  scheduled: %d rows in %d batches, %d retries, %.2f s waiting on locks, %.2f s total"
+                % (stats.rows, stats.batches, stats.retries, stats.lock_wait, stats.elapsed)
+            )
+        else:
+            plan.apply(con)
+            print("  single transaction: %d rows in %.2f s" % (count, time.perf_counter() - start))
+    except sqlite3.OperationalError as ex:
+        print("  single transaction failed after %.2f s: %s" % (time.perf_counter() - start, ex))
+    finally:
+        con.close()
+        stop.set()
+        locker.join()
+
+    con = sqlite3.connect(path)
+    cleared = con.execute("SELECT COUNT(*) FROM ATHLETE WHERE HANDICAPEX IS NULL").fetchone()[0]
+    con.execute("UPDATE ATHLETE SET HANDICAPEX = '4'")
+    con.commit()
+    con.close()
+    print("  %d of %d rows updated, the other connection held its lock for %.2f s" % (cleared, count, held[0]))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "meet.sqlite")
+        create_database(path, count)
+        print("Single transaction:")
+        run(path, count, scheduled=False)
+        print("Write scheduler:")
+        run(path, count, scheduled=True)
+
+
+if __name__ == "__main__":
+    main()
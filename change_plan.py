@@ -0,0 +1,164 @@
+"""Change plans - the database updates a job wants to make, saved so they can be applied later"""
+
+import datetime
+import hashlib
+import json
+import logging
+import os
+from itertools import groupby
+from typing import List, NamedTuple, Optional
+
+from write_scheduler import WriteScheduler
+
+# Primary key of each table a plan can touch
+TABLE_KEYS = {
+    "ATHLETE": "ATHLETEID",
+    "CLUB": "CLUBID",
+}
+
+PLAN_VERSION = 1
+
+
+class PlanError(Exception):
+    """The plan can't be applied (missing, unreadable or stale)"""
+
+
+class Change(NamedTuple):
+    table: str
+    key: int  # Primary key of the row
+    column: str
+    old: object  # Value when the plan was made
+    new: object  # Value to write
+
+
+def database_fingerprint(path: str) -> str:
+    """SHA-256 of the database file contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ChangePlan:
+    """The changes one job run wants to make to one database"""
+
+    def __init__(self, job: str, database: str):
+        self.job = job
+        self.database = os.path.abspath(database)
+        self.fingerprint: Optional[str] = None
+        self.created = datetime.datetime.now().isoformat(timespec="seconds")
+        self.changes: List[Change] = []
+
+    def add(self, table: str, key: int, column: str, old, new) -> None:
+        """Record that column of row key in table should change from old to new"""
+        if table not in TABLE_KEYS:
+            raise ValueError("Unsupported table " + table)
+        self.changes.append(Change(table, key, column, old, new))
+
+    def __len__(self) -> int:
+        return len(self.changes)
+
+    def save(self, path: str) -> None:
+        """Fingerprint the (closed) database and write the plan as JSON"""
+        self.fingerprint = database_fingerprint(self.database)
+        body = {
+            "version": PLAN_VERSION,
+            "job": self.job,
+            "created": self.created,
+            "database": self.database,
+            "fingerprint": self.fingerprint,
+            "changes": [list(change) for change in self.changes],
+        }
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(body, file, indent=1, default=str)
+
+    @classmethod
+    def merge(cls, job: str, plans: List["ChangePlan"]) -> "ChangePlan":
+        """
+        One plan holding the changes of several plans for the same database. A
+        later plan's change to the same field replaces an earlier one, keeping
+        the earlier old value.
+        """
+        merged = cls(job, plans[0].database)
+        changes = {}
+        for plan in plans:
+            if os.path.normcase(plan.database) != os.path.normcase(merged.database):
+                raise PlanError("Change plans are for different databases")
+            for change in plan.changes:
+                field = (change.table, change.key, change.column)
+                earlier = changes.get(field)
+                changes[field] = change if earlier is None else change._replace(old=earlier.old)
+        merged.changes = list(changes.values())
+        return merged
+
+    @classmethod
+    def load(cls, path: str) -> "ChangePlan":
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                body = json.load(file)
+        except (OSError, ValueError) as ex:
+            raise PlanError("Unable to read change plan: {}".format(ex)) from ex
+        if body.get("version") != PLAN_VERSION:
+            raise PlanError("Unsupported change plan version {}".format(body.get("version")))
+        # Plans saved before roster_hash was dropped still have it - it was never checked
+        plan = cls(body["job"], body["database"])
+        plan.created = body["created"]
+        plan.fingerprint = body["fingerprint"]
+        plan.changes = [Change(*change) for change in body["changes"]]
+        return plan
+
+    def verify(self, database: str) -> None:
+        """Raise PlanError unless the plan was made against database exactly as it is now"""
+        if os.path.normcase(os.path.abspath(database)) != os.path.normcase(self.database):
+            raise PlanError("Change plan was made for a different database: " + self.database)
+        if self.fingerprint != database_fingerprint(database):
+            raise PlanError("Database has changed since the plan was made - run the job again")
+
+    def apply(self, con, scheduler: Optional[WriteScheduler] = None) -> int:
+        """
+        Write the changes, one executemany per table/column.
+
+        Without a scheduler everything is one transaction: on error it is
+        rolled back and the exception re-raised. With one, the changes are
+        written in committed batches that wait out other users' locks; on error
+        the changes already written are dropped from the plan (so what is left
+        can be saved and applied later) and the exception re-raised.
+
+        Returns the number of rows updated.
+        """
+        ordered = sorted(self.changes, key=lambda c: (c.table, c.column))
+        groups = [
+            ("UPDATE {} SET {} = ? WHERE {} = ? ".format(table, column, TABLE_KEYS[table]), list(group))
+            for (table, column), group in groupby(ordered, key=lambda c: (c.table, c.column))
+        ]
+
+        if scheduler is None:
+            cursor = con.cursor()
+            try:
+                for SQL, group in groups:
+                    cursor.executemany(SQL, [(c.new, c.key) for c in group])
+                con.commit()
+            except Exception:
+                con.rollback()
+                raise
+            logging.info("Change plan applied - %s updates", len(self.changes))
+            return len(self.changes)
+
+        written = 0
+        try:
+            for SQL, group in groups:
+                written += scheduler.executemany(SQL, [(c.new, c.key) for c in group])
+        except Exception as ex:
+            written += getattr(ex, "written", 0)
+            self.changes = ordered[written:]
+            raise
+        stats = scheduler.stats()
+        logging.info(
+            "Change plan applied - %s updates in %s batches, %.1f s waiting on locks (%s retries)",
+            written,
+            stats.batches,
+            stats.lock_wait,
+            stats.retries,
+        )
+        return written
@@ -0,0 +1,265 @@
+"""
+Duplicate and unmapped clubs in the CLUB table.
+
+Imported entries add CLUB rows whose code or name differs slightly from the
+one already there ("ABC" vs "ABC-ON", "Aquatic Club" vs "Aquatics Club").
+Names are normalized and split into character trigrams, and an inverted index
+of trigram -> clubs finds the few candidates worth scoring, so a club is only
+compared with clubs that share some of its rarer trigrams rather than with
+every other club.
+"""
+
+import unicodedata
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from club_list import ClubList
+from job_metrics import metrics
+
+# Words that say nothing about which club it is
+STOP_WORDS = frozenset(
+    (
+        "club",
+        "swim",
+        "swimming",
+        "swimmers",
+        "aquatic",
+        "aquatics",
+        "team",
+        "association",
+        "inc",
+        "the",
+        "of",
+        "and",
+        "de",
+        "du",
+        "des",
+        "la",
+        "le",
+        "les",
+        "natation",
+    )
+)
+
+# Dice similarity of the trigrams for two names to count as the same club
+DUPLICATE_SCORE = 0.85
+# ... and for a master list club to be suggested for an unmapped one
+MATCH_SCORE = 0.6
+
+DUPLICATE = "Duplicate"
+UNMAPPED = "Not in club list"
+
+# Columns of the club duplicates report
+REPORT_HEADER = [
+    "Kind",
+    "Group",
+    "CLUBID",
+    "Code",
+    "Name",
+    "Nation",
+    "Match Code",
+    "Match Name",
+    "Score",
+    "Suggestion",
+]
+
+
+class ClubRow(NamedTuple):
+    club_id: int
+    code: Optional[str]
+    name: Optional[str]
+    nation: Optional[str]
+
+
+class ClubFinding(NamedTuple):
+    kind: str  # DUPLICATE or UNMAPPED
+    group: int  # Findings with the same group number are one set of duplicates
+    club: ClubRow
+    match_code: Optional[str]  # Club to keep, or the suggested master list club
+    match_name: Optional[str]
+    score: Optional[float]
+    suggestion: str
+
+
+def normalize_code(code: Optional[str]) -> str:
+    return "".join(c for c in (code or "") if c.isalnum()).upper()
+
+
+def normalize_club_name(name: Optional[str]) -> str:
+    """Lower case words without accents, punctuation or stop words - "Club de Natation Élite" -> "elite" """
+    if not name:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", name)
+    text = "".join(c if c.isalnum() else " " for c in decomposed if not unicodedata.combining(c)).casefold()
+    words = [word for word in text.split() if word not in STOP_WORDS]
+    # A name made only of stop words is still a name
+    return " ".join(words) if words else " ".join(text.split())
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = "  " + text + " "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def dice(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+class NgramIndex:
+    """
+    Inverted trigram index over names, for finding similar ones without a full scan.
+
+    Trigrams shared by more than max_postings names (e.g. " to" in a list of
+    Toronto clubs) are left out of candidate generation - they would make
+    every name a candidate of every other, and the cost of a lookup would grow
+    with the size of the list. The best max_candidates by shared trigrams are
+    then scored exactly.
+    """
+
+    def __init__(self, max_postings: int = 100, max_candidates: int = 10):
+        self._grams: Dict[Hashable, Set[str]] = {}
+        self._postings: Dict[str, List[Hashable]] = {}
+        self._max_postings = max_postings
+        self._max_candidates = max_candidates
+
+    def add(self, key: Hashable, name: str) -> None:
+        grams = trigrams(name)
+        self._grams[key] = grams
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(key)
+
+    def __len__(self) -> int:
+        return len(self._grams)
+
+    def similar(self, name: str, min_score: float) -> List[Tuple[float, Hashable]]:
+        """(score, key) of the indexed names at least min_score similar to name, best first"""
+        grams = trigrams(name)
+        shared: Counter = Counter()
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings is not None and len(postings) <= self._max_postings:
+                shared.update(postings)
+        found = []
+        for key, _ in shared.most_common(self._max_candidates):
+            score = dice(grams, self._grams[key])
+            if score >= min_score:
+                found.append((score, key))
+        found.sort(key=lambda match: (-match[0], str(match[1])))
+        return found
+
+
+class _Groups:
+    """Union-find over CLUBIDs"""
+
+    def __init__(self, keys: Iterable[int]):
+        self._parent = {key: key for key in keys}
+
+    def find(self, key: int) -> int:
+        root = key
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[key] != root:
+            self._parent[key], key = root, self._parent[key]
+        return root
+
+    def union(self, a: int, b: int) -> None:
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self._parent[max(a, b)] = min(a, b)
+
+
+def _keep_order(club: ClubRow, clubs: ClubList) -> tuple:
+    """Sort key - keep the club whose code is in the club list, then the oldest (lowest CLUBID)"""
+    return (clubs.get(club.code or "") is None, club.club_id)
+
+
+def find_club_duplicates(rows: Sequence[ClubRow], clubs: ClubList, nation: str = "CAN") -> List[ClubFinding]:
+    """
+    Duplicate CLUB rows (same normalized code or name, or very similar name,
+    within a nation) and clubs of nation whose code isn't in the club list,
+    with the closest club list name as a suggestion.
+    """
+    metrics.begin_stage("Indexing clubs", len(rows) + len(clubs))
+    groups = _Groups(club.club_id for club in rows)
+    blocks: Dict[tuple, int] = {}
+    indexes: Dict[Optional[str], NgramIndex] = {}
+    names: Dict[int, str] = {}
+    for club in rows:
+        metrics.advance()
+        name = normalize_club_name(club.name)
+        names[club.club_id] = name
+        # Exact blocks first - these need no scoring
+        for block in (("code", club.nation, normalize_code(club.code)), ("name", club.nation, name)):
+            if not block[2]:
+                continue
+            first = blocks.setdefault(block, club.club_id)
+            if first != club.club_id:
+                groups.union(first, club.club_id)
+        if name:
+            index = indexes.setdefault(club.nation, NgramIndex())
+            for _, other in index.similar(name, DUPLICATE_SCORE):
+                groups.union(other, club.club_id)
+            index.add(club.club_id, name)
+
+    master = NgramIndex()
+    for code, info in clubs.items():
+        metrics.advance()
+        if info is not None and code:
+            master.add(code, normalize_club_name(info.preferred_name or info.name))
+
+    findings = []
+    members: Dict[int, List[ClubRow]] = {}
+    for club in rows:
+        members.setdefault(groups.find(club.club_id), []).append(club)
+    number = 0
+    for group in sorted((m for m in members.values() if len(m) > 1), key=lambda m: min(c.club_id for c in m)):
+        number += 1
+        group.sort(key=lambda club: _keep_order(club, clubs))
+        keep = group[0]
+        findings.append(ClubFinding(DUPLICATE, number, keep, keep.code, keep.name, None, "Keep"))
+        for club in group[1:]:
+            score = round(dice(trigrams(names[club.club_id]), trigrams(names[keep.club_id])), 2)
+            suggestion = "Merge into CLUBID {} ({})".format(keep.club_id, keep.code)
+            findings.append(ClubFinding(DUPLICATE, number, club, keep.code, keep.name, score, suggestion))
+
+    for club in rows:
+        if club.nation != nation or clubs.get(club.code or "") is not None:
+            continue
+        match = master.similar(names[club.club_id], MATCH_SCORE) if names[club.club_id] else []
+        if match:
+            score, code = match[0]
+            info = clubs[code]
+            findings.append(
+                ClubFinding(
+                    UNMAPPED,
+                    0,
+                    club,
+                    code,
+                    info.preferred_name or info.name,
+                    round(score, 2),
+                    "Change the code to {}".format(code),
+                )
+            )
+        else:
+            findings.append(ClubFinding(UNMAPPED, 0, club, None, None, None, "Add the club to the club list"))
+    return findings
+
+
+def report_rows(findings: Sequence[ClubFinding]) -> List[list]:
+    return [
+        [
+            finding.kind,
+            finding.group or "",
+            finding.club.club_id,
+            finding.club.code,
+            finding.club.name,
+            finding.club.nation,
+            finding.match_code,
+            finding.match_name,
+            finding.score,
+            finding.suggestion,
+        ]
+        for finding in findings
+    ]
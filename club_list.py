@@ -0,0 +1,126 @@
+"""Loader for the club master list (CSV)"""
+
+import codecs
+import csv
+import io
+import logging
+import mmap
+import os
+import threading
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+# Columns used from the master list - everything else in the file is ignored
+CODE_COLUMN = "Club Code"
+PROVINCE_COLUMN = "Province"
+NAME_COLUMN = "Club Name"
+PREFERRED_NAME_COLUMN = "Preferred Club Name"
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+
+class ClubInfo(NamedTuple):
+    province: Optional[str]
+    name: Optional[str]
+    preferred_name: Optional[str]
+
+
+# Club code -> ClubInfo. Codes listed more than once map to None.
+ClubList = Dict[str, Optional[ClubInfo]]
+
+_cache: Dict[str, Tuple[int, int, ClubList]] = {}
+_cache_lock = threading.Lock()
+
+
+def _detect_encoding(head: bytes) -> Tuple[str, int]:
+    """Return (encoding, BOM length) for the start of a file"""
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding, len(bom)
+    return "utf-8", 0
+
+
+def _lines(buffer, start: int, encoding: str, errors: str = "strict") -> Iterator[str]:
+    """The mapped file's lines from start, decoded one at a time"""
+    if encoding.startswith("utf-16"):
+        # In UTF-16 a 0x0A byte isn't always a line end, so these (rare) files are decoded whole
+        yield from io.StringIO(str(buffer[start:], encoding, errors), newline="")
+        return
+    decoder = codecs.getincrementaldecoder(encoding)(errors)
+    size = len(buffer)
+    while start < size:
+        end = buffer.find(b"\n", start)
+        end = size if end < 0 else end + 1
+        yield decoder.decode(buffer[start:end])
+        start = end
+    decoder.decode(b"", final=True)
+
+
+def _parse(lines: Iterable[str]) -> ClubList:
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return {}
+    header = [h.strip() for h in header]
+    missing = [c for c in (CODE_COLUMN, PROVINCE_COLUMN, NAME_COLUMN) if c not in header]
+    if missing:
+        raise ValueError("Club CSV file is missing column(s): " + ", ".join(missing))
+
+    code_i = header.index(CODE_COLUMN)
+    fields = [header.index(PROVINCE_COLUMN), header.index(NAME_COLUMN)]
+    fields.append(header.index(PREFERRED_NAME_COLUMN) if PREFERRED_NAME_COLUMN in header else len(header))
+
+    clubs: ClubList = {}
+    for row in reader:
+        if len(row) <= code_i:
+            continue
+        width = len(row)
+        info = ClubInfo(*(row[i] if i < width else None for i in fields))
+        code = row[code_i]
+        clubs[code] = None if code in clubs else info
+    return clubs
+
+
+def _read(buffer, path: str) -> ClubList:
+    encoding, skip = _detect_encoding(buffer[:4])
+    try:
+        return _parse(_lines(buffer, skip, encoding))
+    except UnicodeDecodeError:
+        if skip:
+            raise
+    # No BOM and not UTF-8: Excel on Windows saves CSV in the ANSI code page
+    logging.warning("Club CSV file %s is not UTF-8, reading it as Windows-1252", path)
+    return _parse(_lines(buffer, 0, "cp1252", "replace"))
+
+
+def load_club_list(path: str) -> ClubList:
+    """
+    Read the club master list, keyed by club code.
+
+    The file is memory mapped and parsed a line at a time straight from the
+    map, so only the current line is ever decoded, and only the code,
+    province, name and preferred name columns are kept. A UTF-8/UTF-16 BOM
+    is honoured. The result is cached
+    against the file's modification time and size so an unchanged file is only
+    parsed once. Raises FileNotFoundError, or ValueError if a required column
+    is missing.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    with _cache_lock:
+        cached = _cache.get(path)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    if stat.st_size == 0:
+        clubs: ClubList = {}
+    else:
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            clubs = _read(buffer, path)
+
+    with _cache_lock:
+        _cache[path] = (stat.st_mtime_ns, stat.st_size, clubs)
+    return clubs
@@ -27,7 +27,28 @@ class appConfig:
             "update_database": "False",  # Update the database
             "update_sdms": "False",  # Update SDMS
             "rollback_file": "rollback.csv",  # Rollback file
+            "plan_file": "changeplan.json",  # Change plan saved by a dry run
+            "exceptions_journal": "exceptions_journal.csv",  # Exceptions cleared by the set-based Clear Non-Para
             "para_level": "3",  # Para Level
+            "file_reads": "False",  # Read the database file directly, without ODBC, when not updating it
+            "bulk_diff": "True",  # Compare the whole ATHLETE table with the roster at once (False = row by row)
+            "set_based_updates": "False",  # Stage data in the database and fix clubs/exceptions with joined UPDATEs
+            "diff_workers": "1",  # Processes to split the para comparison across (1 = compare in the job thread)
+            "eligibility_file": "eligibility.csv",  # Per-club para eligibility report
+            "duplicates_file": "duplicates.csv",  # Duplicate athletes report
+            "club_duplicates_file": "club_duplicates.csv",  # Duplicate and unmapped clubs report
+            "roster_changes_since": "",  # Date (YYYY-MM-DD) Roster Changes reports from, blank for a week ago
+            "roster_changes_file": "roster_changes.csv",  # Roster changes report
+            "meet_folder": "",  # Folder of the season's meet databases for the cross-meet check
+            "consistency_file": "consistency.csv",  # Cross-meet para differences report
+            "meet_scan_workers": "4",  # Meet databases read at once (in separate processes) by the cross-meet check
+            "entry_file": "entries.lxf",  # Lenex entry file to check
+            "fix_entry_file": "False",  # Write a corrected copy of the entry file
+            "watch_jobs": "Update_Para,Remove_Initial",  # Jobs re-run by watch mode
+            "watch_interval": "1.0",  # Seconds between checks of the database file in watch mode
+            "watch_debounce": "2.0",  # Seconds the database must be quiet before a watch pass
+            "log_max_bytes": "1000000",  # Size at which the log file is rolled over
+            "log_backups": "3",  # Rolled over log files to keep
         }
     }
 
@@ -0,0 +1,97 @@
+"""
+Watch a Splash database for writes.
+
+Splash Meet Manager writes the .mdb in bursts while entries are being
+processed, and holds a .ldb lock file beside it while the meet is open. The
+watcher polls the size and modification time of both and reports a change
+once they have stayed the same for the debounce period, so a burst of writes
+gives one change rather than dozens. high_water_marks() finds where each pass
+left off, so the next only looks at the rows added since.
+"""
+
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from mdb_reader import MdbReader
+
+Signature = Tuple[Optional[Tuple[int, int]], Optional[Tuple[int, int]]]
+
+
+def lock_file(database: str) -> str:
+    """The Access lock file that goes with database"""
+    return os.path.splitext(database)[0] + ".ldb"
+
+
+def _stat(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def file_signature(database: str) -> Signature:
+    """(mtime, size) of the database and of its lock file, None for a file that doesn't exist"""
+    return (_stat(database), _stat(lock_file(database)))
+
+
+def high_water_marks(source, keys: Dict[str, str]) -> Dict[str, int]:
+    """Highest key in each table of keys, {table: key column} (source is a connection or the database file name)"""
+    marks = {}
+    if isinstance(source, str):
+        with MdbReader(source) as mdb:
+            for table, key in keys.items():
+                ids = (row[0] for row in mdb.read_table(table, (key,)) if row[0] is not None)
+                marks[table] = max(ids, default=0)
+    else:
+        cursor = source.cursor()
+        for table, key in keys.items():
+            cursor.execute("SELECT MAX({}) FROM {}".format(key, table))
+            marks[table] = cursor.fetchone()[0] or 0
+        cursor.close()
+    return marks
+
+
+class DatabaseWatcher:
+    """Polls a database file and waits for settled changes"""
+
+    def __init__(self, database: str, interval: float = 1.0, debounce: float = 2.0):
+        self.database = database
+        self.interval = interval
+        self.debounce = debounce
+        self._last = file_signature(database)
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        """Make wait() return None (can be called from any thread)"""
+        self._stop.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def rebase(self) -> None:
+        """
+        Take the files as they are now as unchanged - after our own connection
+        has opened (and so touched) the lock file
+        """
+        self._last = file_signature(self.database)
+
+    def wait(self) -> Optional[Signature]:
+        """
+        Block until the files have changed and then been quiet for the debounce
+        period. Returns the new signature, or None once stopped.
+        """
+        while not self._stop.wait(self.interval):
+            current = file_signature(self.database)
+            if current == self._last:
+                continue
+            # Something changed - wait for the writes to stop
+            while not self._stop.wait(self.debounce):
+                settled = file_signature(self.database)
+                if settled == current:
+                    self._last = settled
+                    return settled
+                current = settled
+        return None
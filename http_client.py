@@ -0,0 +1,95 @@
+"""Shared HTTP client for remote fetches (Active Roster, GitHub releases)"""
+
+import logging
+import threading
+import time
+from typing import Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) timeouts in seconds. A stalled endpoint must never hang a job thread.
+DEFAULT_TIMEOUT: Tuple[float, float] = (5.0, 30.0)
+
+# Retry policy - bounded exponential backoff (0.5s, 1s, 2s) on connection errors and transient server errors
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=MAX_RETRIES,
+        status=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=4)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate"})
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process wide pooled session, creating it on first use"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
+
+
+def close_session() -> None:
+    """Close the pooled session (mainly for shutdown and tests)"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def get(
+    url: str,
+    headers: Optional[dict] = None,
+    params: Optional[dict] = None,
+    timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+) -> requests.Response:
+    """
+    GET a url through the shared session.
+
+    Connection errors and transient server errors are retried with backoff.
+    Latency, retry count and transfer size are logged. Exceptions
+    are those of requests (requests.exceptions.RequestException).
+    """
+    start = time.perf_counter()
+    try:
+        response = get_session().get(url, headers=headers, params=params, timeout=timeout)
+    except requests.exceptions.RequestException as ex:
+        logging.debug("GET %s failed after %.0f ms: %s", url, (time.perf_counter() - start) * 1000, ex)
+        raise
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    retries = 0
+    if response.raw is not None and getattr(response.raw, "retries", None) is not None:
+        retries = len(response.raw.retries.history)
+
+    logging.info(
+        "GET %s -> %s in %.0f ms, %s retries, %s bytes (%s)",
+        url,
+        response.status_code,
+        elapsed_ms,
+        retries,
+        len(response.content),
+        response.headers.get("Content-Encoding", "identity"),
+    )
+    return response
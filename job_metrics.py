@@ -0,0 +1,178 @@
+"""
+Progress counters published by the running job, read by the performance tab.
+
+Jobs run one at a time (the UI disables the job buttons while one runs), so
+the counters are a module-level singleton (`metrics`). A job's worker threads
+count rows and statements too, and `+=` is not atomic, so every update takes
+the lock. The UI polls snapshot().
+"""
+
+import functools
+import sys
+import threading
+import time
+from typing import Callable, NamedTuple, Optional
+
+
+class MetricsSnapshot(NamedTuple):
+    job: Optional[str]  # None when nothing has run yet
+    running: bool
+    stage: str
+    rows: int  # Processed in this stage
+    total: Optional[int]  # Rows in this stage, if known
+    rate: float  # Rows per second in this stage
+    eta: Optional[float]  # Seconds left in this stage, if known
+    sql: int  # Statements issued by the job
+    peak_memory: Optional[int]  # Bytes, for the process
+    elapsed: float  # Seconds since the job started
+
+
+def peak_memory() -> Optional[int]:
+    """Peak resident memory of this process in bytes, None if it can't be found"""
+    if sys.platform == "win32":
+        import ctypes  # pylint: disable=import-outside-toplevel
+        from ctypes import wintypes  # pylint: disable=import-outside-toplevel
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return None
+        return counters.PeakWorkingSetSize
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class JobMetrics:
+    """Counters for the job that is running (or ran last)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.job: Optional[str] = None
+        self.running = False
+        self.stage = ""
+        self.rows = 0
+        self.total: Optional[int] = None
+        self.sql = 0
+        self._job_start = 0.0
+        self._stage_start = 0.0
+        self._job_end = 0.0
+
+    def start(self, job: str) -> None:
+        with self._lock:
+            self.job = job
+            self.running = True
+            self.sql = 0
+            self._job_start = time.perf_counter()
+            self._set_stage("Starting", None)
+
+    def finish(self) -> None:
+        with self._lock:
+            self.running = False
+            self._job_end = time.perf_counter()
+            self.stage = "Finished"
+
+    def begin_stage(self, stage: str, total: Optional[int] = None) -> None:
+        """Start counting rows for a new stage of the job"""
+        with self._lock:
+            self._set_stage(stage, total)
+
+    def _set_stage(self, stage: str, total: Optional[int]) -> None:
+        self.stage = stage
+        self.rows = 0
+        self.total = total
+        self._stage_start = time.perf_counter()
+
+    def advance(self, rows: int = 1) -> None:
+        with self._lock:
+            self.rows += rows
+
+    def count_sql(self, statements: int = 1) -> None:
+        with self._lock:
+            self.sql += statements
+
+    def snapshot(self) -> MetricsSnapshot:
+        with self._lock:
+            now = time.perf_counter() if self.running else self._job_end
+            stage_time = max(now - self._stage_start, 1e-6)
+            rate = self.rows / stage_time if self.running else 0.0
+            eta = None
+            if self.running and self.total is not None and rate > 0:
+                eta = max(self.total - self.rows, 0) / rate
+            elapsed = now - self._job_start if self.job is not None else 0.0
+            return MetricsSnapshot(
+                self.job, self.running, self.stage, self.rows, self.total, rate, eta, self.sql, peak_memory(), elapsed
+            )
+
+
+metrics = JobMetrics()
+
+
+def tracked(job: str) -> Callable:
+    """Decorator for a job's run() - publishes start and finish however the job ends"""
+
+    def decorator(run: Callable) -> Callable:
+        @functools.wraps(run)
+        def wrapper(*args, **kwargs):
+            metrics.start(job)
+            try:
+                return run(*args, **kwargs)
+            finally:
+                metrics.finish()
+
+        return wrapper
+
+    return decorator
+
+
+class CountingCursor:
+    """A cursor that counts the statements it runs in metrics"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, *args):
+        metrics.count_sql()
+        return self._cursor.execute(*args)
+
+    def executemany(self, sql, rows):
+        rows = list(rows)
+        metrics.count_sql(len(rows))
+        return self._cursor.executemany(sql, rows)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class CountingConnection:
+    """Wraps a database connection so every cursor counts its statements"""
+
+    def __init__(self, con):
+        self._con = con
+
+    def cursor(self) -> CountingCursor:
+        return CountingCursor(self._con.cursor())
+
+    def __getattr__(self, name):
+        return getattr(self._con, name)
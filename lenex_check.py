@@ -0,0 +1,269 @@
+"""
+Check a Lenex entry file against the Active Roster and the club master list
+before it is imported into Splash.
+
+The file is parsed with SAX, one element at a time, and a corrected copy is
+written the same way, so memory use doesn't grow with the size of the file.
+The checks are the ones Update_Para and Update_Clubs make on the database:
+
+    ATHLETE license         the SNC ID, matched against the roster
+    ATHLETE license_ipc     SDMS ID (Int level athletes only)
+    HANDICAP exception      exception codes
+    HANDICAP free           S sport class
+    HANDICAP breast         SB sport class
+    HANDICAP medley         SM sport class
+    CLUB region             province from the club master list
+    CLUB name               preferred club name, if there is one
+"""
+
+import logging
+import os
+import zipfile
+from contextlib import ExitStack
+from typing import Dict, NamedTuple, Optional, Sequence, Union
+from xml.sax import make_parser
+from xml.sax.saxutils import XMLFilterBase, XMLGenerator
+from xml.sax.xmlreader import AttributesImpl, InputSource
+
+from club_list import ClubList
+from job_metrics import metrics
+from para_diff import normalize_exceptions, normalize_sport_class, roster_para_fields
+from roster_snapshot import RosterSnapshot
+
+# SNC_ID -> roster athlete, unique IDs only - index_roster() or a RosterSnapshot
+RosterIndex = Union[Dict[str, dict], RosterSnapshot]
+
+# HANDICAP attribute for each roster field - (roster field, attribute, description)
+HANDICAP_FIELDS = (
+    ("Exceptions", "exception", "exceptions"),
+    ("S", "free", "S sport class"),
+    ("SB", "breast", "SB sport class"),
+    ("SM", "medley", "SM sport class"),
+)
+
+SDMS_ATTRIBUTE = "license_ipc"
+
+
+class EntryCheck(NamedTuple):
+    athletes: int  # Canadian athletes in the file
+    matched: int  # ... found on the roster
+    athlete_changes: int
+    level_warnings: int
+    clubs: int  # Canadian clubs in the file
+    club_changes: int
+    unknown_clubs: int
+
+
+def _entry_value(field: str, value: Optional[str]) -> str:
+    """A HANDICAP attribute in the form roster_para_fields() gives (a missing sport class is 0)"""
+    if field == "Exceptions":
+        return normalize_exceptions(value) if value else ""
+    return normalize_sport_class(value)
+
+
+def _roster_fields(athlete: dict) -> Dict[str, str]:
+    """roster_para_fields(), with no exceptions as "" rather than "None" - no exception attribute is written"""
+    fields = roster_para_fields(athlete)
+    if not athlete["Exceptions"]:
+        fields["Exceptions"] = ""
+    return fields
+
+
+class LenexChecker(XMLFilterBase):
+    """SAX filter that logs roster/club mismatches and passes on corrected elements"""
+
+    def __init__(self, parent, roster_index: RosterIndex, clubs: ClubList, levels: Sequence[str], fix_sdms: bool):
+        super().__init__(parent)
+        self._roster_index = roster_index
+        self._clubs = clubs
+        self._levels = levels
+        self._fix_sdms = fix_sdms
+
+        self._club_nation: Optional[str] = None
+        self._athlete: Optional[Dict[str, str]] = None  # Roster fields of the current athlete, if matched
+        self._name = ("", "")
+        self._handicap_seen = False
+
+        self.athletes = 0
+        self.matched = 0
+        self.athlete_changes = 0
+        self.level_warnings = 0
+        self.clubs = 0
+        self.club_changes = 0
+        self.unknown_clubs = 0
+
+    def result(self) -> EntryCheck:
+        return EntryCheck(
+            self.athletes,
+            self.matched,
+            self.athlete_changes,
+            self.level_warnings,
+            self.clubs,
+            self.club_changes,
+            self.unknown_clubs,
+        )
+
+    def startElement(self, name, attrs):
+        if name == "CLUB":
+            attrs = self._check_club(dict(attrs))
+        elif name == "ATHLETE":
+            attrs = self._check_athlete(dict(attrs))
+        elif name == "HANDICAP" and self._athlete is not None:
+            self._handicap_seen = True
+            attrs = self._check_handicap(dict(attrs))
+        super().startElement(name, attrs)
+
+    def endElement(self, name):
+        if name == "ATHLETE" and self._athlete is not None and not self._handicap_seen:
+            # No HANDICAP element - the athlete is entered without sport classes
+            attrs = self._check_handicap({})
+            if len(attrs):
+                super().startElement("HANDICAP", attrs)
+                super().endElement("HANDICAP")
+        if name == "ATHLETE":
+            self._athlete = None
+        elif name == "CLUB":
+            self._club_nation = None
+        super().endElement(name)
+
+    def _check_club(self, attrs: dict) -> AttributesImpl:
+        self._club_nation = attrs.get("nation")
+        code = attrs.get("code")
+        if self._club_nation != "CAN" or code is None:
+            return AttributesImpl(attrs)
+        self.clubs += 1
+
+        club = self._clubs.get(code)
+        if club is None:
+            logging.error("Club Code %s not found in CSV file", code)
+            self.unknown_clubs += 1
+            return AttributesImpl(attrs)
+
+        if attrs.get("region") != club.province:
+            logging.info("Club Code %s region %s should be Province %s", code, attrs.get("region"), club.province)
+            attrs["region"] = club.province
+            self.club_changes += 1
+        preferred = club.preferred_name
+        if preferred is not None and preferred != attrs.get("name") and len(preferred) > 1:
+            logging.info("Club Code %s not preferred name. <%s> should be <%s>", code, attrs.get("name"), preferred)
+            attrs["name"] = preferred
+            self.club_changes += 1
+        return AttributesImpl(attrs)
+
+    def _check_athlete(self, attrs: dict) -> AttributesImpl:
+        self._athlete = None
+        self._handicap_seen = False
+        metrics.advance()
+        if attrs.get("nation", self._club_nation) != "CAN":
+            return AttributesImpl(attrs)
+        self.athletes += 1
+
+        athlete = self._roster_index.get(attrs.get("license"))
+        if athlete is None:
+            return AttributesImpl(attrs)
+        self.matched += 1
+        self._athlete = _roster_fields(athlete)
+        self._name = (attrs.get("firstname", ""), attrs.get("lastname", ""))
+
+        if self._athlete["Level"] == "Int":
+            entry = attrs.get(SDMS_ATTRIBUTE)
+            if (entry or "0") != self._athlete["SDMS_ID"]:
+                self._mismatch("SDMSID", entry, self._athlete["SDMS_ID"])
+                if self._fix_sdms:
+                    attrs[SDMS_ATTRIBUTE] = self._athlete["SDMS_ID"]
+        if self._athlete["Level"] not in self._levels:
+            logging.warning(
+                "Athlete %s %s not at minimum meet level %s has level %s",
+                self._name[0],
+                self._name[1],
+                self._levels[0],
+                self._athlete["Level"],
+            )
+            self.level_warnings += 1
+        return AttributesImpl(attrs)
+
+    def _check_handicap(self, attrs: dict) -> AttributesImpl:
+        for field, attribute, description in HANDICAP_FIELDS:
+            entry = attrs.get(attribute)
+            roster = self._athlete[field]
+            if _entry_value(field, entry) == roster:
+                continue
+            self._mismatch(description, entry, roster)
+            if roster == "":
+                attrs.pop(attribute, None)
+            else:
+                attrs[attribute] = roster
+        return AttributesImpl(attrs)
+
+    def _mismatch(self, description: str, entry, roster) -> None:
+        logging.error(
+            "Athlete %s %s %s mismatch. Entry file: %s Roster: %s",
+            self._name[0],
+            self._name[1],
+            description,
+            entry,
+            roster,
+        )
+        self.athlete_changes += 1
+
+
+def corrected_file_name(path: str) -> str:
+    """entries.lxf -> entries_corrected.lxf"""
+    stem, ext = os.path.splitext(path)
+    return stem + "_corrected" + ext
+
+
+def _xml_member(archive: zipfile.ZipFile) -> str:
+    for name in archive.namelist():
+        if name.lower().endswith(".lef"):
+            return name
+    raise ValueError("No .lef file in " + str(archive.filename))
+
+
+def check_entry_file(
+    path: str,
+    roster_index: RosterIndex,
+    clubs: ClubList,
+    levels: Sequence[str],
+    output: Optional[str] = None,
+    fix_sdms: bool = False,
+) -> EntryCheck:
+    """
+    Check a .lxf (zipped) or .lef (plain XML) entry file, optionally writing a
+    corrected copy to output in the same form.
+
+    Raises OSError, zipfile.BadZipFile, ValueError or xml.sax.SAXException if
+    the file can't be read.
+    """
+    parser = make_parser()
+    checker = LenexChecker(parser, roster_index, clubs, levels, fix_sdms)
+
+    with ExitStack() as stack:
+        if zipfile.is_zipfile(path):
+            archive = stack.enter_context(zipfile.ZipFile(path))
+            member = _xml_member(archive)
+            source = stack.enter_context(archive.open(member))
+        else:
+            archive = None
+            source = stack.enter_context(open(path, "rb"))
+
+        if output is not None:
+            if archive is not None:
+                out_archive = stack.enter_context(zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED))
+                out_file = stack.enter_context(out_archive.open(member, "w"))
+            else:
+                out_file = stack.enter_context(open(output, "wb"))
+            checker.setContentHandler(XMLGenerator(out_file, encoding="utf-8", short_empty_elements=True))
+
+        input_source = InputSource(path)
+        input_source.setByteStream(source)
+        try:
+            checker.parse(input_source)
+        except Exception:
+            if output is not None:
+                # Don't leave half a corrected file behind
+                stack.close()
+                os.remove(output)
+            raise
+
+    return checker.result()
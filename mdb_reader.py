@@ -0,0 +1,411 @@
+"""
+Read-only access to Jet 4 / ACE (.mdb, .accdb) tables without ODBC.
+
+Only what the Splash Utilities jobs need is supported: listing user tables and
+streaming the rows of a table, decoding just the requested columns. Indexes are
+not used; a table's data pages are found by their owner pointer. Page layouts
+follow the mdbtools format notes (HACKING.md). A damaged file raises MdbError,
+whichever structure in it is broken.
+"""
+
+import datetime
+import mmap
+import struct
+import uuid
+from decimal import Decimal
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+PAGE_SIZE = 4096
+
+PAGE_DATA = 0x01
+PAGE_TDEF = 0x02
+
+# Row offset flags on data pages
+ROW_DELETED = 0x8000
+ROW_LOOKUP = 0x4000
+ROW_OFFSET_MASK = 0x1FFF
+
+# Column types
+COL_BOOL = 0x01
+COL_BYTE = 0x02
+COL_INT = 0x03
+COL_LONGINT = 0x04
+COL_MONEY = 0x05
+COL_FLOAT = 0x06
+COL_DOUBLE = 0x07
+COL_DATETIME = 0x08
+COL_BINARY = 0x09
+COL_TEXT = 0x0A
+COL_OLE = 0x0B
+COL_MEMO = 0x0C
+COL_GUID = 0x0F
+COL_NUMERIC = 0x10
+
+COL_FLAG_FIXED = 0x01
+
+# MSysObjects - the catalog always starts on page 2
+CATALOG_PAGE = 2
+OBJECT_TYPE_TABLE = 1
+SYSTEM_OBJECT_FLAGS = 0x80000002
+
+ACCESS_EPOCH = datetime.datetime(1899, 12, 30)
+
+_FIXED_FORMATS = {
+    COL_BYTE: "<B",
+    COL_INT: "<h",
+    COL_LONGINT: "<i",
+    COL_FLOAT: "<f",
+    COL_DOUBLE: "<d",
+}
+
+
+# What reading past the end of a page, or a bad length or value in a damaged file, raises on the way
+_PARSE_ERRORS = (struct.error, IndexError, ValueError, OverflowError)
+
+
+class MdbError(Exception):
+    """The file is not a database this reader understands, or is damaged"""
+
+
+class MdbColumn(NamedTuple):
+    name: str
+    type: int
+    number: int  # Column number, also the bit in the row null mask
+    var_index: int  # Position in the variable length offset table
+    fixed_offset: int  # Offset of the data in the fixed area of a row
+    size: int
+    flags: int
+    scale: int
+
+    @property
+    def is_fixed(self) -> bool:
+        return bool(self.flags & COL_FLAG_FIXED)
+
+
+class MdbTable(NamedTuple):
+    name: str
+    page: int  # Table definition page
+    columns: List[MdbColumn]  # In column number order
+    num_var_cols: int
+
+
+def _decode_text(data: bytes) -> str:
+    """Jet 4 text is UTF-16LE, optionally 'compressed' (0xFF 0xFE prefix, 0x00 toggles 1/2 byte runs)"""
+    if len(data) >= 2 and data[0] == 0xFF and data[1] == 0xFE:
+        out = bytearray()
+        compressed = True
+        i = 2
+        length = len(data)
+        while i < length:
+            if data[i] == 0:
+                compressed = not compressed
+                i += 1
+            elif compressed:
+                out.append(data[i])
+                out.append(0)
+                i += 1
+            elif i + 1 < length:
+                out += data[i : i + 2]
+                i += 2
+            else:
+                break
+        data = bytes(out)
+    return data.decode("utf-16-le", "replace")
+
+
+def _decode_numeric(data: bytes, scale: int) -> Decimal:
+    sign, n1, n2, n3, n4 = struct.unpack_from("<BIIII", data)
+    value = Decimal((n1 << 96) | (n2 << 64) | (n3 << 32) | n4).scaleb(-scale)
+    return -value if sign & 0x80 else value
+
+
+class MdbReader:
+    """
+    A memory mapped, read-only view of an Access database file.
+
+    >>> with MdbReader("meet.mdb") as mdb:
+    ...     for athlete_id, license in mdb.read_table("ATHLETE", ("ATHLETEID", "LICENSE")):
+    ...         pass
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as ex:  # empty file
+            self._file.close()
+            raise MdbError("Not an Access database: " + path) from ex
+
+        if len(self._map) < PAGE_SIZE * 3 or self._map[0:4] != b"\x00\x01\x00\x00":
+            self.close()
+            raise MdbError("Not an Access database: " + path)
+        if len(self._map) % PAGE_SIZE:
+            self.close()
+            raise MdbError("Truncated database (not a whole number of pages): " + path)
+        if self._map[0x14] == 0:
+            self.close()
+            raise MdbError("Jet 3 (Access 97) databases are not supported: " + path)
+
+        self._data_pages: Optional[Dict[int, List[int]]] = None
+        self._catalog: Optional[Dict[str, int]] = None
+        self._tables: Dict[str, MdbTable] = {}
+
+    def close(self) -> None:
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self) -> "MdbReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # Pages
+
+    def _page_type(self, page: int) -> int:
+        return self._map[page * PAGE_SIZE]
+
+    def _owned_pages(self, tdef_page: int) -> List[int]:
+        """Data pages of a table, found by scanning the owner pointer of every data page once"""
+        if self._data_pages is None:
+            pages: Dict[int, List[int]] = {}
+            buffer = self._map
+            for page in range(1, len(buffer) // PAGE_SIZE):
+                start = page * PAGE_SIZE
+                if buffer[start] == PAGE_DATA:
+                    (owner,) = struct.unpack_from("<I", buffer, start + 4)
+                    pages.setdefault(owner, []).append(page)
+            self._data_pages = pages
+        return self._data_pages.get(tdef_page, [])
+
+    def _row_bounds(self, page: int, row: int) -> Tuple[int, int, int]:
+        """(flags, start, end) of a row on a data page, as absolute file offsets"""
+        base = page * PAGE_SIZE
+        (count,) = struct.unpack_from("<H", self._map, base + 0x0C)
+        if row >= count:
+            raise MdbError("Row {} not on page {}".format(row, page))
+        (offset,) = struct.unpack_from("<H", self._map, base + 0x0E + 2 * row)
+        if row == 0:
+            end = PAGE_SIZE
+        else:
+            (end,) = struct.unpack_from("<H", self._map, base + 0x0E + 2 * (row - 1))
+            end &= ROW_OFFSET_MASK
+        return offset & ~ROW_OFFSET_MASK, base + (offset & ROW_OFFSET_MASK), base + end
+
+    def _lookup(self, pointer: int) -> Tuple[int, int]:
+        """Follow a page/row pointer (page << 8 | row) to the row it names"""
+        _, start, end = self._row_bounds(pointer >> 8, pointer & 0xFF)
+        return start, end
+
+    def _rows(self, table: MdbTable) -> Iterator[Tuple[int, int]]:
+        """(start, end) of every live row of a table"""
+        for page in self._owned_pages(table.page):
+            (count,) = struct.unpack_from("<H", self._map, page * PAGE_SIZE + 0x0C)
+            for row in range(count):
+                flags, start, end = self._row_bounds(page, row)
+                if flags & ROW_DELETED:
+                    continue
+                if flags & ROW_LOOKUP:
+                    (pointer,) = struct.unpack_from("<I", self._map, start)
+                    start, end = self._lookup(pointer)
+                yield start, end
+
+    # Table definitions
+
+    def _tdef(self, page: int) -> bytes:
+        """The table definition, joined across continuation pages"""
+        if self._page_type(page) != PAGE_TDEF:
+            raise MdbError("Page {} is not a table definition".format(page))
+        start = page * PAGE_SIZE
+        data = bytearray(self._map[start : start + PAGE_SIZE])
+        (next_page,) = struct.unpack_from("<I", self._map, start + 4)
+        seen = {page}
+        while next_page:
+            if next_page in seen:
+                raise MdbError("Table definition on page {} loops back to page {}".format(page, next_page))
+            seen.add(next_page)
+            start = next_page * PAGE_SIZE
+            data += self._map[start + 8 : start + PAGE_SIZE]
+            (next_page,) = struct.unpack_from("<I", self._map, start + 4)
+        return bytes(data)
+
+    def _table(self, name: str, page: int) -> MdbTable:
+        tdef = self._tdef(page)
+        num_var_cols, num_cols = struct.unpack_from("<HH", tdef, 43)
+        (num_real_idx,) = struct.unpack_from("<I", tdef, 51)
+
+        pos = 63 + num_real_idx * 12
+        entries = []
+        for _ in range(num_cols):
+            col_type = tdef[pos]
+            number, var_index = struct.unpack_from("<HH", tdef, pos + 5)
+            scale = tdef[pos + 12]
+            flags = tdef[pos + 15]
+            fixed_offset, size = struct.unpack_from("<HH", tdef, pos + 21)
+            entries.append((col_type, number, var_index, fixed_offset, size, flags, scale))
+            pos += 25
+
+        columns = []
+        for col_type, number, var_index, fixed_offset, size, flags, scale in entries:
+            (length,) = struct.unpack_from("<H", tdef, pos)
+            col_name = tdef[pos + 2 : pos + 2 + length].decode("utf-16-le")
+            pos += 2 + length
+            columns.append(MdbColumn(col_name, col_type, number, var_index, fixed_offset, size, flags, scale))
+
+        columns.sort(key=lambda c: c.number)
+        return MdbTable(name, page, columns, num_var_cols)
+
+    def _catalog_table(self) -> MdbTable:
+        return self._table("MSysObjects", CATALOG_PAGE)
+
+    def _damaged(self, ex: Exception) -> MdbError:
+        return MdbError("Damaged database {}: {}".format(self.path, ex))
+
+    def tables(self) -> Dict[str, int]:
+        """User tables - name to table definition page"""
+        if self._catalog is None:
+            catalog = {}
+            try:
+                rows = self._read(self._catalog_table(), ("Id", "Name", "Type", "Flags"))
+                for object_id, name, object_type, flags in rows:
+                    if object_id is None or not name:
+                        continue
+                    if not isinstance(object_id, int) or not isinstance(flags, (int, type(None))):
+                        raise MdbError("Damaged catalog in {}".format(self.path))
+                    if object_type == OBJECT_TYPE_TABLE and not ((flags or 0) & SYSTEM_OBJECT_FLAGS):
+                        catalog[name] = object_id & 0x00FFFFFF
+            except _PARSE_ERRORS as ex:
+                raise self._damaged(ex) from ex
+            self._catalog = catalog
+        return self._catalog
+
+    def table(self, name: str) -> MdbTable:
+        """Definition of a user table (case insensitive, like Access)"""
+        key = name.upper()
+        if key not in self._tables:
+            pages = {n.upper(): (n, p) for n, p in self.tables().items()}
+            if key not in pages:
+                raise MdbError("No table {} in {}".format(name, self.path))
+            try:
+                self._tables[key] = self._table(*pages[key])
+            except _PARSE_ERRORS as ex:
+                raise self._damaged(ex) from ex
+        return self._tables[key]
+
+    # Rows
+
+    def read_table(self, name: str, columns: Optional[Sequence[str]] = None) -> Iterator[tuple]:
+        """
+        Stream rows of a table as tuples of the requested columns (all columns if None).
+        A damaged file raises MdbError, here or while the rows are read.
+        """
+        return self._checked(self._read(self.table(name), columns))
+
+    def _checked(self, rows: Iterator[tuple]) -> Iterator[tuple]:
+        try:
+            yield from rows
+        except _PARSE_ERRORS as ex:
+            raise self._damaged(ex) from ex
+
+    def _read(self, table: MdbTable, columns: Optional[Sequence[str]]) -> Iterator[tuple]:
+        """The row generator - a missing column is reported now rather than on the first row"""
+        by_name = {c.name.upper(): c for c in table.columns}
+        if columns is None:
+            wanted = list(table.columns)
+        else:
+            missing = [c for c in columns if c.upper() not in by_name]
+            if missing:
+                raise MdbError("Table {} has no column(s) {}".format(table.name, ", ".join(missing)))
+            wanted = [by_name[c.upper()] for c in columns]
+
+        # A column's data is located by how many fixed columns precede it (rows written before
+        # later columns were added hold fewer of them)
+        fixed_rank = {}
+        rank = 0
+        for column in table.columns:
+            if column.is_fixed:
+                fixed_rank[column.number] = rank
+                rank += 1
+        return self._decode_rows(table, wanted, fixed_rank)
+
+    def _decode_rows(self, table: MdbTable, wanted: List[MdbColumn], fixed_rank: dict) -> Iterator[tuple]:
+        buffer = self._map
+        for start, end in self._rows(table):
+            yield tuple(self._value(buffer, start, end, table, column, fixed_rank) for column in wanted)
+
+    def _value(self, buffer, start: int, end: int, table: MdbTable, column: MdbColumn, fixed_rank: dict):
+        (row_cols,) = struct.unpack_from("<H", buffer, start)
+        mask_size = (row_cols + 7) // 8
+        mask_start = end - mask_size
+        byte, bit = divmod(column.number, 8)
+        present = byte < mask_size and bool(buffer[mask_start + byte] & (1 << bit))
+
+        if column.type == COL_BOOL:
+            return present
+        if not present:
+            return None
+
+        row_var_cols = 0
+        if table.num_var_cols:
+            (row_var_cols,) = struct.unpack_from("<H", buffer, mask_start - 2)
+
+        if column.is_fixed:
+            if fixed_rank[column.number] >= row_cols - row_var_cols:
+                return None
+            data_start = start + 2 + column.fixed_offset
+            data = buffer[data_start : data_start + column.size]
+        else:
+            if column.var_index >= row_var_cols:
+                return None
+            # the offset table is stored backwards from the end of the row - entry i+1 sits just before entry i
+            data_end, data_start = struct.unpack_from("<HH", buffer, mask_start - 6 - 2 * column.var_index)
+            data = buffer[start + data_start : start + data_end]
+        return self._convert(column, data)
+
+    def _convert(self, column: MdbColumn, data: bytes):
+        col_type = column.type
+        if col_type in _FIXED_FORMATS:
+            return struct.unpack_from(_FIXED_FORMATS[col_type], data)[0]
+        if col_type == COL_TEXT:
+            return _decode_text(data)
+        if col_type == COL_DATETIME:
+            (days,) = struct.unpack_from("<d", data)
+            return ACCESS_EPOCH + datetime.timedelta(days=days)
+        if col_type == COL_MONEY:
+            (value,) = struct.unpack_from("<q", data)
+            return Decimal(value).scaleb(-4)
+        if col_type == COL_MEMO:
+            value = self._long_value(data)
+            return None if value is None else _decode_text(value)
+        if col_type == COL_OLE:
+            return self._long_value(data)
+        if col_type == COL_GUID:
+            return "{" + str(uuid.UUID(bytes_le=bytes(data[:16]))).upper() + "}"
+        if col_type == COL_NUMERIC:
+            return _decode_numeric(data, column.scale)
+        return bytes(data)
+
+    def _long_value(self, data: bytes) -> Optional[bytes]:
+        """Memo/OLE data - inline, on one LVAL page or chained across LVAL pages"""
+        if len(data) < 12:
+            return None
+        length, pointer = struct.unpack_from("<II", data)
+        size = length & 0x3FFFFFFF
+        if length & 0x80000000:
+            return bytes(data[12 : 12 + size])
+        if length & 0x40000000:
+            start, end = self._lookup(pointer)
+            return bytes(self._map[start : min(end, start + size)])
+        out = bytearray()
+        seen = set()
+        while pointer and len(out) < size:
+            if pointer in seen:
+                raise MdbError("Long value chain loops back to page {} row {}".format(pointer >> 8, pointer & 0xFF))
+            seen.add(pointer)
+            start, end = self._lookup(pointer)
+            (pointer,) = struct.unpack_from("<I", self._map, start)
+            out += self._map[start + 4 : end]
+        return bytes(out[:size])
@@ -0,0 +1,137 @@
+"""
+Para data compared across the meet databases of a season.
+
+Each meet's ATHLETE table is streamed straight from its .mdb file (no ODBC, so
+the scans can run in worker processes) into license -> compared fields for the
+Canadian athletes. The per-meet results are merged into one license-keyed
+index, and an athlete is inconsistent when a field has more than one value
+across the meets they appear in.
+"""
+
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from job_metrics import metrics
+from mdb_reader import MdbError, MdbReader
+from para_diff import PARA_FIELDS
+
+# ATHLETE columns read from each meet
+MEET_COLUMNS = ("LICENSE", "FIRSTNAME", "LASTNAME", "NATION") + tuple(field[1] for field in PARA_FIELDS)
+
+# Columns of the consistency report
+REPORT_HEADER = ["License", "First Name", "Last Name", "Field", "Meets", "Values"]
+
+
+class MeetScan(NamedTuple):
+    meet: str  # File name of the meet database
+    athletes: Dict[str, tuple]  # License -> (first name, last name, compared values in PARA_FIELDS order)
+    error: Optional[str]  # Why the file couldn't be read, None if it was
+
+
+class Inconsistency(NamedTuple):
+    license: str
+    firstname: str
+    lastname: str
+    field: str  # Description, e.g. "S sport class"
+    values: List[Tuple[str, str]]  # (meet, value) for every meet the athlete is in
+
+
+def find_meet_files(folder: str) -> List[str]:
+    """The Splash databases in folder (not its subfolders), by name"""
+    return sorted(glob.glob(os.path.join(folder, "*.mdb")), key=lambda path: os.path.basename(path).lower())
+
+
+def _value(value) -> str:
+    """Values as compared - None, blank and surrounding spaces are all the same"""
+    return "" if value is None else str(value).strip()
+
+
+def scan_meet(path: str) -> MeetScan:
+    """Read one meet's Canadian athletes - runs in a worker process"""
+    meet = os.path.basename(path)
+    athletes: Dict[str, tuple] = {}
+    try:
+        with MdbReader(path) as mdb:
+            for license, firstname, lastname, nation, *values in mdb.read_table("ATHLETE", MEET_COLUMNS):
+                license = _value(license)
+                if nation != "CAN" or not license:
+                    continue
+                athletes[license] = (firstname or "", lastname or "", tuple(_value(value) for value in values))
+    except (MdbError, OSError) as ex:
+        return MeetScan(meet, {}, str(ex))
+    return MeetScan(meet, athletes, None)
+
+
+def scan_meets(paths: Sequence[str], workers: int) -> List[MeetScan]:
+    """
+    Scan every meet, workers at a time in separate processes. Results are in
+    paths order; a meet that couldn't be read has its error set and no athletes.
+    """
+    metrics.begin_stage("Scanning meets", len(paths))
+    if workers <= 1 or len(paths) <= 1:
+        scans = []
+        for path in paths:
+            try:
+                scans.append(scan_meet(path))
+            except Exception as ex:  # pylint: disable=broad-except
+                scans.append(_failed(path, ex))
+            metrics.advance()
+        return scans
+
+    results: Dict[str, MeetScan] = {}
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        futures = {pool.submit(scan_meet, path): path for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results[path] = future.result()
+            except Exception as ex:  # pylint: disable=broad-except
+                # Raised in the worker, or the worker itself died - either way only this meet is lost
+                results[path] = _failed(path, ex)
+            metrics.advance()
+    return [results[path] for path in paths]
+
+
+def _failed(path: str, ex: Exception) -> MeetScan:
+    return MeetScan(os.path.basename(path), {}, "{}: {}".format(type(ex).__name__, ex))
+
+
+def build_index(scans: Sequence[MeetScan]) -> Dict[str, List[Tuple[str, tuple]]]:
+    """License -> [(meet, (first name, last name, values))] in meet order"""
+    index: Dict[str, List[Tuple[str, tuple]]] = {}
+    for scan in scans:
+        for license, athlete in scan.athletes.items():
+            index.setdefault(license, []).append((scan.meet, athlete))
+    return index
+
+
+def find_inconsistencies(index: Dict[str, List[Tuple[str, tuple]]]) -> List[Inconsistency]:
+    """A line per athlete and field that isn't the same in every meet, by license"""
+    found = []
+    for license in sorted(index):
+        meets = index[license]
+        if len(meets) < 2:
+            continue
+        # The name as in the latest meet (meets are in file name order, which is usually date order)
+        firstname, lastname, _ = meets[-1][1]
+        for position, (_, _, description) in enumerate(PARA_FIELDS):
+            values = [(meet, athlete[2][position]) for meet, athlete in meets]
+            if len({value for _, value in values}) > 1:
+                found.append(Inconsistency(license, firstname, lastname, description, values))
+    return found
+
+
+def report_rows(inconsistencies: Sequence[Inconsistency]) -> List[list]:
+    return [
+        [
+            found.license,
+            found.firstname,
+            found.lastname,
+            found.field,
+            len(found.values),
+            "; ".join("{}: {}".format(meet, value or "(blank)") for meet, value in found.values),
+        ]
+        for found in inconsistencies
+    ]
@@ -0,0 +1,257 @@
+"""Para athlete comparison between the ATHLETE snapshot and the Active Roster"""
+
+import heapq
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Sequence
+
+from athlete_snapshot import AthleteSnapshot, CategoryColumn
+
+try:
+    import numpy as np
+except ImportError:  # Optional - without it diff_bulk compares row by row
+    np = None
+
+# Levels in increasing order
+PARA_LEVELS = ("1", "2", "3", "Int")
+
+# Roster sport class values that mean "no sport class" in Splash
+NO_SPORT_CLASS = ("NE", "PSPI", "PSVI", "PSII", "PI", "II", "VI", "")
+
+# Compared fields in reporting order - (roster field, ATHLETE column, description)
+PARA_FIELDS = (
+    ("Exceptions", "HANDICAPEX", "exceptions"),
+    ("S", "HANDICAPS", "S sport class"),
+    ("SB", "HANDICAPSB", "SB sport class"),
+    ("SM", "HANDICAPSM", "SM sport class"),
+    ("SDMS_ID", "SDMSID", "SDMSID"),
+)
+
+# ATHLETE columns the diff needs, in snapshot order
+DIFF_COLUMNS = ("ATHLETEID", "FIRSTNAME", "LASTNAME", "LICENSE") + tuple(f[1] for f in PARA_FIELDS) + ("NATION",)
+
+
+class ParaChange(NamedTuple):
+    """One field of one athlete that differs from the roster"""
+
+    athlete_id: int
+    firstname: str
+    lastname: str
+    field: str  # Description, e.g. "S sport class"
+    column: str  # ATHLETE column to update
+    splash: object  # Value in the database
+    roster: str  # Value from the roster
+
+
+class LevelWarning(NamedTuple):
+    """A matched athlete below the minimum meet level"""
+
+    athlete_id: int
+    firstname: str
+    lastname: str
+    level: str
+
+
+class ParaDiff(NamedTuple):
+    changes: List[ParaChange]
+    level_warnings: List[LevelWarning]
+
+
+# Position of each level in PARA_LEVELS
+LEVEL_RANK = {level: rank for rank, level in enumerate(PARA_LEVELS)}
+
+
+def eligible_levels(min_level: str) -> tuple:
+    """Levels at or above min_level"""
+    return PARA_LEVELS[LEVEL_RANK[min_level] :]
+
+
+def normalize_sport_class(value) -> str:
+    if value is None or value in NO_SPORT_CLASS:
+        return "0"
+    return str(value)
+
+
+def normalize_exceptions(value) -> str:
+    """Letters (except J) first, then numbers, then any '+', the way Splash stores them"""
+    parts = str(value).split(",")
+    letters = sorted([p for p in parts if p.isalpha() and p.upper() != "J"])
+    numbers = sorted([p for p in parts if p.isdigit()], key=int)
+    pluses = [p for p in parts if p == "+"]
+    return ",".join(letters + numbers + pluses)
+
+
+def normalize_sdms_id(value) -> str:
+    if value is None:
+        return "0"
+    return str(int(value))
+
+
+def roster_para_fields(athlete: dict) -> Dict[str, str]:
+    """The roster values of an athlete in the form they are stored in Splash"""
+    return {
+        "Exceptions": normalize_exceptions(athlete["Exceptions"]),
+        "S": normalize_sport_class(athlete["S"]),
+        "SB": normalize_sport_class(athlete["SB"]),
+        "SM": normalize_sport_class(athlete["SM"]),
+        "SDMS_ID": normalize_sdms_id(athlete["SDMS_ID"]),
+        "Level": str(athlete["Level"]),
+    }
+
+
+def diff_rows(athletes: AthleteSnapshot, roster_index: dict, levels: Sequence[str]) -> ParaDiff:
+    """Compare athlete by athlete (reference implementation)"""
+    changes: List[ParaChange] = []
+    warnings: List[LevelWarning] = []
+    id_pos, first_pos, last_pos, license_pos = (
+        athletes.names.index(c) for c in ("ATHLETEID", "FIRSTNAME", "LASTNAME", "LICENSE")
+    )
+    positions = [athletes.names.index(column) for _, column, _ in PARA_FIELDS]
+
+    for row in athletes.rows(athletes.where_equal("NATION", "CAN")):
+        athlete = roster_index.get(row[license_pos])
+        if athlete is None:
+            continue
+        roster = roster_para_fields(athlete)
+        athlete_id, firstname, lastname = row[id_pos], row[first_pos], row[last_pos]
+
+        for (field, column, description), position in zip(PARA_FIELDS, positions):
+            splash = row[position]
+            if roster[field] == str(splash):
+                continue
+            if field == "SDMS_ID" and roster["Level"] != "Int":
+                continue
+            changes.append(ParaChange(athlete_id, firstname, lastname, description, column, splash, roster[field]))
+
+        if roster["Level"] not in levels:
+            warnings.append(LevelWarning(athlete_id, firstname, lastname, roster["Level"]))
+
+    return ParaDiff(changes, warnings)
+
+
+def _str_array(column) -> "np.ndarray":
+    """A column as an array of str() values (None becomes 'None', as in the row comparison)"""
+    if len(column) == 0:
+        return np.array([], dtype=str)
+    if isinstance(column, CategoryColumn):
+        codes = np.frombuffer(column.codes, dtype=np.dtype(column.codes.typecode))
+        return np.array([str(v) for v in column.categories])[codes]
+    return np.array([str(v) for v in column.values])
+
+
+def diff_bulk(athletes: AthleteSnapshot, roster_index: dict, levels: Sequence[str]) -> ParaDiff:
+    """
+    Compare the whole table at once.
+
+    The snapshot is joined to the roster on LICENSE with a sorted search, then
+    each field's mismatch mask is a single array comparison. The result is the
+    same (and in the same order) as diff_rows, which it falls back to when
+    numpy isn't installed.
+    """
+    if np is None:
+        return diff_rows(athletes, roster_index, levels)
+    if len(athletes) == 0 or len(roster_index) == 0:
+        return ParaDiff([], [])
+
+    # Roster side - one normalized row per SNC_ID, sorted by key for the join
+    keys = np.array(list(roster_index.keys()))
+    normalized = [roster_para_fields(a) for a in roster_index.values()]
+    order = np.argsort(keys)
+    keys = keys[order]
+    roster_cols = {
+        field: np.array([n[field] for n in normalized])[order]
+        for field in ("Level",) + tuple(f[0] for f in PARA_FIELDS)
+    }
+
+    # Athlete side - Canadian rows joined on license
+    nation = athletes.column("NATION")
+    can = _str_array(nation) == "CAN"
+    licenses = _str_array(athletes.column("LICENSE"))
+    pos = np.searchsorted(keys, licenses)
+    pos[pos >= len(keys)] = 0
+    matched = can & (keys[pos] == licenses)
+    rows = np.nonzero(matched)[0]
+    pos = pos[rows]
+
+    level = roster_cols["Level"][pos]
+    masks = []
+    for field, column, _ in PARA_FIELDS:
+        mask = _str_array(athletes.column(column))[rows] != roster_cols[field][pos]
+        if field == "SDMS_ID":
+            mask &= level == "Int"
+        masks.append(mask)
+
+    # Changes ordered by row, then by field - the same order as the row loop
+    hit_rows, hit_fields = np.nonzero(np.stack(masks, axis=1))
+
+    ids = athletes.column("ATHLETEID")
+    first = athletes.column("FIRSTNAME")
+    last = athletes.column("LASTNAME")
+    changes = []
+    for r, f in zip(hit_rows.tolist(), hit_fields.tolist()):
+        field, column, description = PARA_FIELDS[f]
+        i = int(rows[r])
+        changes.append(
+            ParaChange(
+                ids[i],
+                first[i],
+                last[i],
+                description,
+                column,
+                athletes.column(column)[i],
+                str(roster_cols[field][pos[r]]),
+            )
+        )
+
+    warnings = [
+        LevelWarning(ids[int(rows[r])], first[int(rows[r])], last[int(rows[r])], str(level[r]))
+        for r in np.nonzero(~np.isin(level, list(levels)))[0].tolist()
+    ]
+    return ParaDiff(changes, warnings)
+
+
+def shard_of(license, shards: int) -> int:
+    """Shard for a license (SNC ID) - the same on both sides of the join and in every process"""
+    return zlib.crc32(str(license).encode("utf-8")) % shards
+
+
+def _diff_shard(athletes: AthleteSnapshot, roster_shard: dict, levels: Sequence[str], bulk: bool) -> ParaDiff:
+    return (diff_bulk if bulk else diff_rows)(athletes, roster_shard, levels)
+
+
+def diff_sharded(
+    athletes: AthleteSnapshot, roster_index: dict, levels: Sequence[str], workers: int, bulk: bool = True
+) -> ParaDiff:
+    """
+    Compare in a pool of worker processes.
+
+    The Canadian athletes and the roster are both split on a hash of the
+    license, so each worker gets the roster entries its athletes can match.
+    The per-shard results are merged back into diff_rows order.
+    """
+    if workers <= 1 or len(athletes) == 0 or len(roster_index) == 0:
+        return _diff_shard(athletes, roster_index, levels, bulk)
+
+    canadian = athletes.where_equal("NATION", "CAN")
+    licenses = athletes.column("LICENSE")
+    shard_rows: List[List[int]] = [[] for _ in range(workers)]
+    for i in canadian:
+        shard_rows[shard_of(licenses[i], workers)].append(i)
+    roster_shards: List[dict] = [{} for _ in range(workers)]
+    for key, athlete in roster_index.items():
+        roster_shards[shard_of(key, workers)][key] = athlete
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_diff_shard, athletes.take(rows), roster, levels, bulk)
+            for rows, roster in zip(shard_rows, roster_shards)
+        ]
+        results = [future.result() for future in futures]
+
+    # Each shard is in table order, so a merge on table position restores the full order.
+    # ATHLETEID is the primary key, so it identifies the position.
+    ids = athletes.column("ATHLETEID")
+    position = {ids[i]: i for i in canadian}
+    changes = list(heapq.merge(*(r.changes for r in results), key=lambda c: position[c.athlete_id]))
+    warnings = list(heapq.merge(*(r.level_warnings for r in results), key=lambda w: position[w.athlete_id]))
+    return ParaDiff(changes, warnings)
@@ -0,0 +1,242 @@
+"""
+Compact binary snapshot of the Active Roster.
+
+Layout (little endian):
+
+    header      magic "SURS", u16 version, u16 field count, u32 athletes,
+                u32 string table offset, u32 string table size
+    fields      per field: u16 length + UTF-8 name
+    ids         u32 SNC_ID per athlete, in roster order
+    index       u32 athlete number per athlete, sorted by SNC_ID - the lookup index
+    columns     per field: u32 string table offset per athlete (MISSING if absent)
+    strings     per distinct value: u32 length + JSON text of the value
+
+Athletes are kept in the order the API published them, duplicate SNC_IDs
+included. Every column is fixed width, so an athlete is found with a binary
+search of the index and only its own values are decoded. Equal values (sport
+classes, levels, exception codes) are stored once.
+
+    python roster_snapshot.py roster.json roster.bin
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterator, List, Optional
+
+MAGIC = b"SURS"
+VERSION = 2
+MISSING = 0xFFFFFFFF
+
+_HEADER = struct.Struct("<4sHHIII")
+_U32 = struct.Struct("<I")
+
+
+class SnapshotError(Exception):
+    """Not a roster snapshot, or a version this code can't read"""
+
+
+def write_snapshot(roster: List[dict], path: str) -> None:
+    """Write the roster (as returned by the API) to path, replacing it atomically"""
+    fields: List[str] = []
+    for athlete in roster:
+        for key in athlete:
+            if key != "SNC_ID" and key not in fields:
+                fields.append(key)
+
+    athletes = list(roster)
+    ids = [int(a["SNC_ID"]) for a in athletes]
+    index = sorted(range(len(ids)), key=ids.__getitem__)
+
+    strings = bytearray()
+    offsets: Dict[str, int] = {}
+
+    def intern(value) -> int:
+        text = json.dumps(value, separators=(",", ":"))
+        offset = offsets.get(text)
+        if offset is None:
+            data = text.encode("utf-8")
+            offset = len(strings)
+            strings.extend(struct.pack("<I", len(data)))
+            strings.extend(data)
+            offsets[text] = offset
+        return offset
+
+    names = b"".join(struct.pack("<H", len(f.encode("utf-8"))) + f.encode("utf-8") for f in fields)
+    ids_data = struct.pack("<{}I".format(len(ids)), *ids)
+    index_data = struct.pack("<{}I".format(len(index)), *index)
+    columns = b"".join(
+        struct.pack("<{}I".format(len(athletes)), *(intern(a[f]) if f in a else MISSING for a in athletes))
+        for f in fields
+    )
+
+    strings_offset = _HEADER.size + len(names) + len(ids_data) + len(index_data) + len(columns)
+    header = _HEADER.pack(MAGIC, VERSION, len(fields), len(athletes), strings_offset, len(strings))
+
+    temp = path + ".tmp"
+    with open(temp, "wb") as file:
+        file.write(header)
+        file.write(names)
+        file.write(ids_data)
+        file.write(index_data)
+        file.write(columns)
+        file.write(strings)
+    os.replace(temp, path)
+
+
+class _UInt32s:
+    """A run of little-endian u32 in the map, read the same whatever the machine's byte order"""
+
+    def __init__(self, buffer, offset: int, count: int):
+        self._buffer = buffer
+        self._offset = offset
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> int:
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        return _U32.unpack_from(self._buffer, self._offset + 4 * i)[0]
+
+
+class _SortedIds:
+    """The SNC_IDs in index order, for bisect"""
+
+    def __init__(self, ids: _UInt32s, index: _UInt32s):
+        self._ids = ids
+        self._index = index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __getitem__(self, i: int) -> int:
+        return self._ids[self._index[i]]
+
+
+class RosterSnapshot:
+    """
+    A memory mapped roster snapshot.
+
+    get() looks an athlete up by SNC_ID the way index_roster() does - an ID
+    listed more than once matches nobody - decoding only that athlete.
+    athletes() gives the roster as published.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            try:
+                self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as ex:
+                raise SnapshotError("Empty roster snapshot " + path) from ex
+
+        try:
+            magic, version, field_count, count, strings_offset, strings_size = _HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC or version != VERSION:
+                raise SnapshotError("Not a version {} roster snapshot: {}".format(VERSION, path))
+
+            pos = _HEADER.size
+            self.fields: List[str] = []
+            for _ in range(field_count):
+                (length,) = struct.unpack_from("<H", self._map, pos)
+                self.fields.append(self._map[pos + 2 : pos + 2 + length].decode("utf-8"))
+                pos += 2 + length
+        except (struct.error, UnicodeDecodeError) as ex:
+            self._map.close()
+            raise SnapshotError("Truncated roster snapshot " + path) from ex
+        except SnapshotError:
+            self._map.close()
+            raise
+        if pos + 4 * count * (2 + field_count) != strings_offset or strings_offset + strings_size > len(self._map):
+            self._map.close()
+            raise SnapshotError("Truncated roster snapshot " + path)
+
+        self._ids = _UInt32s(self._map, pos, count)
+        pos += 4 * count
+        self._index = _UInt32s(self._map, pos, count)
+        self._sorted = _SortedIds(self._ids, self._index)
+        pos += 4 * count
+        self._columns = [_UInt32s(self._map, pos + 4 * count * i, count) for i in range(field_count)]
+        self._strings = strings_offset
+        self._count = count
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __enter__(self) -> "RosterSnapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _positions(self, snc_id) -> range:
+        """Index entries holding snc_id"""
+        try:
+            key = int(snc_id)
+        except (TypeError, ValueError):
+            return range(0)
+        if str(key) != str(snc_id):
+            # "0123" isn't SNC ID 123, as for the string keys of index_roster()
+            return range(0)
+        return range(bisect_left(self._sorted, key), bisect_right(self._sorted, key))
+
+    def _value(self, offset: int):
+        start = self._strings + offset
+        (length,) = _U32.unpack_from(self._map, start)
+        return json.loads(self._map[start + 4 : start + 4 + length])
+
+    def _athlete(self, i: int) -> dict:
+        athlete = {"SNC_ID": str(self._ids[i])}
+        for field, column in zip(self.fields, self._columns):
+            offset = column[i]
+            if offset != MISSING:
+                athlete[field] = self._value(offset)
+        return athlete
+
+    def get(self, snc_id, default=None) -> Optional[dict]:
+        """The athlete with this SNC_ID, or default if there isn't exactly one"""
+        positions = self._positions(snc_id)
+        if len(positions) != 1:
+            return default
+        return self._athlete(self._index[positions[0]])
+
+    def matches(self, snc_id) -> List[dict]:
+        """Every roster entry with this SNC_ID, in roster order"""
+        return [self._athlete(i) for i in sorted(self._index[p] for p in self._positions(snc_id))]
+
+    def __contains__(self, snc_id) -> bool:
+        return len(self._positions(snc_id)) == 1
+
+    def __len__(self) -> int:
+        """Roster entries, duplicates included"""
+        return self._count
+
+    def athletes(self) -> Iterator[dict]:
+        """The roster entries in the order they were published"""
+        return (self._athlete(i) for i in range(self._count))
+
+    def to_list(self) -> List[dict]:
+        """The whole roster, as get_active_roster() returns it"""
+        return list(self.athletes())
+
+
+def main(argv: List[str]) -> int:
+    if len(argv) != 3:
+        print("usage: python roster_snapshot.py roster.json roster.bin")
+        return 2
+    with open(argv[1], "r", encoding="utf-8") as file:
+        roster = json.load(file)
+    write_snapshot(roster, argv[2])
+    print("{} athletes written to {}".format(len(roster), argv[2]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,306 @@
+"""
+Local SQLite copy of the Active Roster with indexed lookups.
+
+Sport classes, exceptions, SDMS ID and level are stored the way Splash holds
+them (see para_diff.roster_para_fields), so a query matches what the jobs
+compare. Each exception code is also a row of athlete_exceptions, so "everyone
+with exception 4" is an index lookup rather than a string search. The roster
+entry as downloaded is kept alongside and is what queries return.
+
+    with RosterStore(path) as store:
+        store.find(level="Int", s="9")
+        store.count_by("level")
+        store.find(exception="4")
+
+Each refresh also appends to the roster history: a row in roster_changes for
+every athlete whose entry differs from their last one (or who left the
+roster), pointing at the entry in athlete_versions by content hash. An
+unchanged athlete costs nothing, and an entry that flips back is stored once.
+changes_between() compares two dates from those rows alone.
+"""
+
+import datetime
+import hashlib
+import json
+import sqlite3
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Union
+
+from para_diff import roster_para_fields
+
+# Bumped when the athletes table changes shape or content - it is rebuilt by the next refresh
+SCHEMA_VERSION = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS athletes (
+    snc_id      TEXT PRIMARY KEY,
+    given_name  TEXT,
+    family_name TEXT,
+    level       TEXT,
+    s           TEXT,
+    sb          TEXT,
+    sm          TEXT,
+    exceptions  TEXT,
+    sdms_id     TEXT,
+    data        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS athletes_level ON athletes (level);
+CREATE INDEX IF NOT EXISTS athletes_s ON athletes (s);
+CREATE INDEX IF NOT EXISTS athletes_sb ON athletes (sb);
+CREATE INDEX IF NOT EXISTS athletes_sm ON athletes (sm);
+CREATE TABLE IF NOT EXISTS athlete_exceptions (
+    snc_id TEXT NOT NULL REFERENCES athletes (snc_id),
+    code   TEXT NOT NULL,
+    PRIMARY KEY (code, snc_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS athlete_versions (
+    hash        TEXT PRIMARY KEY,
+    given_name  TEXT,
+    family_name TEXT,
+    level       TEXT,
+    s           TEXT,
+    sb          TEXT,
+    sm          TEXT,
+    exceptions  TEXT,
+    sdms_id     TEXT,
+    data        BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS roster_changes (
+    seq    INTEGER PRIMARY KEY,
+    taken  TEXT NOT NULL,
+    snc_id TEXT NOT NULL,
+    hash   TEXT REFERENCES athlete_versions (hash)
+);
+CREATE INDEX IF NOT EXISTS roster_changes_athlete ON roster_changes (snc_id, seq);
+CREATE INDEX IF NOT EXISTS roster_changes_taken ON roster_changes (taken);
+"""
+
+# Fields compared by changes_between(), with the column holding each
+HISTORY_FIELDS = (
+    ("Level", "level"),
+    ("S", "s"),
+    ("SB", "sb"),
+    ("SM", "sm"),
+    ("Exceptions", "exceptions"),
+    ("SDMS_ID", "sdms_id"),
+)
+
+# changes_between() field for an athlete joining or leaving the roster
+ON_ROSTER = "On Roster"
+
+# Each changed athlete's entries at the two dates (hash is NULL when not on the roster)
+_CHANGES_SQL = """
+SELECT c.snc_id, c.old IS NULL, c.new IS NULL, b.given_name, b.family_name, a.given_name, a.family_name,
+    {before}, {after}
+FROM (
+    SELECT snc_id,
+        (SELECT hash FROM roster_changes WHERE snc_id = d.snc_id AND taken < :start ORDER BY seq DESC LIMIT 1) AS old,
+        (SELECT hash FROM roster_changes WHERE snc_id = d.snc_id AND taken < :end ORDER BY seq DESC LIMIT 1) AS new
+    FROM (SELECT DISTINCT snc_id FROM roster_changes WHERE taken >= :start AND taken < :end) AS d
+) AS c
+LEFT JOIN athlete_versions b ON b.hash = c.old
+LEFT JOIN athlete_versions a ON a.hash = c.new
+WHERE c.old IS NOT c.new
+ORDER BY c.snc_id
+""".format(
+    before=", ".join("b." + column for _, column in HISTORY_FIELDS),
+    after=", ".join("a." + column for _, column in HISTORY_FIELDS),
+)
+
+
+class RosterChange(NamedTuple):
+    snc_id: str
+    given_name: Optional[str]
+    family_name: Optional[str]
+    field: str  # A HISTORY_FIELDS name, or ON_ROSTER
+    before: Optional[str]  # None when the athlete wasn't on the roster
+    after: Optional[str]
+
+
+# find() criteria and the column each one filters on
+_CRITERIA = {
+    "snc_id": "snc_id",
+    "level": "level",
+    "s": "s",
+    "sb": "sb",
+    "sm": "sm",
+    "sdms_id": "sdms_id",
+}
+
+
+def _as_of(day: Union[datetime.date, str]) -> str:
+    """Upper bound on taken for the roster as it was at the end of day"""
+    if isinstance(day, str):
+        day = datetime.date.fromisoformat(day)
+    if isinstance(day, datetime.datetime):
+        day = day.date()
+    return (day + datetime.timedelta(days=1)).isoformat()
+
+
+def _record(athlete: dict) -> tuple:
+    fields = roster_para_fields(athlete)
+    return (
+        str(athlete["SNC_ID"]),
+        athlete.get("Given_Name"),
+        athlete.get("Family_Name"),
+        fields["Level"],
+        fields["S"],
+        fields["SB"],
+        fields["SM"],
+        # NULL rather than the "None" normalize_exceptions() makes of it
+        fields["Exceptions"] if athlete["Exceptions"] else None,
+        fields["SDMS_ID"],
+        # Sorted keys, so the same entry always has the same history hash
+        json.dumps(athlete, separators=(",", ":"), default=str, sort_keys=True),
+    )
+
+
+class RosterStore:
+    """The roster in a SQLite database file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._con = sqlite3.connect(path)
+        if self._con.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # The current roster is only a copy - drop it (keeping the history) and refresh() stores it again
+            with self._con:
+                self._con.execute("DROP TABLE IF EXISTS athlete_exceptions")
+                self._con.execute("DROP TABLE IF EXISTS athletes")
+                self._con.execute("DROP TABLE IF EXISTS meta")
+                # Schema 2 stored no exceptions as "None"
+                if self._con.execute("SELECT 1 FROM sqlite_master WHERE name = 'athlete_versions'").fetchone():
+                    self._con.execute("UPDATE athlete_versions SET exceptions = NULL WHERE exceptions = 'None'")
+        self._con.executescript(_SCHEMA)
+        self._con.execute("PRAGMA user_version = {}".format(SCHEMA_VERSION))
+
+    def close(self) -> None:
+        self._con.close()
+
+    def __enter__(self) -> "RosterStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def refresh(self, roster: Iterable[dict], taken: Optional[datetime.datetime] = None) -> int:
+        """
+        Replace the stored roster in one transaction, returning the number of
+        athletes, and add what changed to the history as of taken (default now).
+
+        An SNC ID listed more than once is left out, as in index_roster(), so
+        it matches nobody.
+        """
+        records = [_record(athlete) for athlete in roster]
+        listed = Counter(record[0] for record in records)
+        records = [record for record in records if listed[record[0]] == 1]
+        exceptions = [(record[0], code) for record in records if record[7] for code in record[7].split(",")]
+        taken_text = (taken or datetime.datetime.now()).isoformat(timespec="seconds")
+        with self._con:
+            self._con.execute("DELETE FROM athlete_exceptions")
+            self._con.execute("DELETE FROM athletes")
+            self._con.executemany("INSERT INTO athletes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", records)
+            self._con.executemany("INSERT OR IGNORE INTO athlete_exceptions VALUES (?, ?)", exceptions)
+            self._append_history(records, taken_text)
+            self._con.execute("INSERT OR REPLACE INTO meta VALUES ('refreshed', ?)", (taken_text,))
+        return len(records)
+
+    def _append_history(self, records: List[tuple], taken: str) -> None:
+        """Add a roster_changes row for each athlete whose latest entry differs (part of refresh's transaction)"""
+        latest = dict(
+            self._con.execute(
+                "SELECT snc_id, hash FROM roster_changes "
+                "WHERE seq IN (SELECT MAX(seq) FROM roster_changes GROUP BY snc_id)"
+            )
+        )
+        versions = []
+        changes = []
+        for record in records:
+            snc_id, data = record[0], record[9]
+            digest = hashlib.sha1(data.encode("utf-8")).hexdigest()
+            if latest.pop(snc_id, None) != digest:
+                versions.append((digest,) + record[1:9] + (zlib.compress(data.encode("utf-8")),))
+                changes.append((taken, snc_id, digest))
+        # Whoever is left was on the roster last time and isn't now
+        changes.extend((taken, snc_id, None) for snc_id, digest in latest.items() if digest is not None)
+        self._con.executemany("INSERT OR IGNORE INTO athlete_versions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", versions)
+        self._con.executemany("INSERT INTO roster_changes (taken, snc_id, hash) VALUES (?, ?, ?)", changes)
+
+    def history_dates(self) -> List[str]:
+        """Dates (YYYY-MM-DD) on which the stored roster changed"""
+        sql = "SELECT DISTINCT substr(taken, 1, 10) FROM roster_changes ORDER BY 1"
+        return [row[0] for row in self._con.execute(sql)]
+
+    def changes_between(self, start: Union[datetime.date, str], end: Union[datetime.date, str]) -> List[RosterChange]:
+        """
+        What changed on the roster from the end of day start to the end of day
+        end (dates or YYYY-MM-DD), by SNC ID: joins, departures and each
+        HISTORY_FIELDS value that differs.
+        """
+        found = []
+        params = {"start": _as_of(start), "end": _as_of(end)}
+        fields = len(HISTORY_FIELDS)
+        for row in self._con.execute(_CHANGES_SQL, params):
+            snc_id, joined, left, old_given, old_family, given, family = row[:7]
+            before, after = row[7 : 7 + fields], row[7 + fields :]
+            if left:
+                # Named as they were
+                found.append(RosterChange(snc_id, old_given, old_family, ON_ROSTER, "Yes", None))
+                continue
+            if joined:
+                found.append(RosterChange(snc_id, given, family, ON_ROSTER, None, "Yes"))
+                continue
+            for (field, _), old, new in zip(HISTORY_FIELDS, before, after):
+                if old != new:
+                    found.append(RosterChange(snc_id, given, family, field, old, new))
+        return found
+
+    @property
+    def refreshed(self) -> Optional[str]:
+        """When the roster was last stored, None if it never has been"""
+        row = self._con.execute("SELECT value FROM meta WHERE key = 'refreshed'").fetchone()
+        return row[0] if row else None
+
+    def __len__(self) -> int:
+        return self._con.execute("SELECT COUNT(*) FROM athletes").fetchone()[0]
+
+    def get(self, snc_id) -> Optional[dict]:
+        """The roster entry for an SNC ID, or None"""
+        found = self.find(snc_id=str(snc_id))
+        return found[0] if found else None
+
+    def find(self, exception: Optional[str] = None, **criteria) -> List[dict]:
+        """
+        Roster entries matching all the criteria, ordered by SNC ID.
+
+        Criteria are snc_id, level, s, sb, sm and sdms_id (values in
+        the form Splash stores them, e.g. s="0" for no sport class), and
+        exception for athletes with that exception code.
+        """
+        joins = ""
+        where = []
+        params: list = []
+        if exception is not None:
+            joins = " JOIN athlete_exceptions e ON e.snc_id = a.snc_id AND e.code = ?"
+            params.append(str(exception))
+        for name, value in criteria.items():
+            if name not in _CRITERIA:
+                raise ValueError("Unknown roster criterion " + name)
+            where.append("a.{} = ?".format(_CRITERIA[name]))
+            params.append(str(value))
+        sql = "SELECT a.data FROM athletes a" + joins
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY a.snc_id"
+        return [json.loads(row[0]) for row in self._con.execute(sql, params)]
+
+    def count_by(self, column: str) -> Dict[Optional[str], int]:
+        """Number of athletes per value of a criterion column, e.g. count_by("level")"""
+        if column not in _CRITERIA:
+            raise ValueError("Unknown roster criterion " + column)
+        sql = "SELECT {0}, COUNT(*) FROM athletes GROUP BY {0}".format(_CRITERIA[column])
+        return dict(self._con.execute(sql).fetchall())
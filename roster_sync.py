@@ -0,0 +1,211 @@
+"""
+Incremental Active Roster sync.
+
+The last roster is kept as a binary snapshot (roster_snapshot) plus a small
+JSON state file holding the HTTP validators and a content hash per SNC_ID.
+Each sync then costs as little as the endpoint allows:
+
+- a conditional request (If-None-Match / If-Modified-Since) - a 304 means
+  nothing changed and the snapshot is used as-is
+- a `since` query with the time of the last sync - an endpoint that supports
+  it answers {"Changed": [athletes], "Removed": [SNC_IDs]}. A client error
+  in answer to it stops it being sent for SINCE_RETRY seconds.
+- otherwise the full roster, diffed locally against the snapshot hashes
+
+The roster is always returned (and saved) as published - in the API's order,
+with any duplicate SNC_IDs.
+"""
+
+import datetime
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Dict, List, NamedTuple, Optional, Set
+
+import requests
+
+import http_client
+from roster_snapshot import RosterSnapshot, SnapshotError, write_snapshot
+
+# After the endpoint rejects a since query, wait this long (seconds) before trying it again
+SINCE_RETRY = 24 * 3600.0
+
+
+class SyncResult(NamedTuple):
+    roster: List[dict]
+    added: int
+    changed: int
+    removed: int
+    transferred: int  # Bytes received (compressed size when the server sends it)
+    apply_ms: float
+
+
+def athlete_hash(athlete: dict) -> str:
+    """Content hash of one roster entry"""
+    text = json.dumps(athlete, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def normalize(athlete: dict) -> dict:
+    """SNC ID as a string, to match the database LICENSE field"""
+    athlete["SNC_ID"] = str(int(athlete["SNC_ID"]))
+    return athlete
+
+
+def roster_hashes(roster: List[dict]) -> Dict[str, str]:
+    """Content hash per SNC_ID - an ID listed more than once hashes all its entries, in order"""
+    entries: Dict[str, List[dict]] = {}
+    for athlete in roster:
+        entries.setdefault(athlete["SNC_ID"], []).append(athlete)
+    return {
+        snc_id: athlete_hash(group[0]) if len(group) == 1 else athlete_hash({"Entries": group})
+        for snc_id, group in entries.items()
+    }
+
+
+def apply_delta(roster: List[dict], changed: List[dict], removed: Set[str]) -> List[dict]:
+    """
+    The roster with a delta response applied. The changed entries for an ID
+    replace all its old ones, where the first of them stood; new IDs are
+    added at the end.
+    """
+    updates: Dict[str, List[dict]] = {}
+    for athlete in changed:
+        updates.setdefault(athlete["SNC_ID"], []).append(athlete)
+    replaced: Set[str] = set()
+    result = []
+    for athlete in roster:
+        snc_id = athlete["SNC_ID"]
+        if snc_id in updates:
+            result.extend(updates.pop(snc_id))
+            replaced.add(snc_id)
+        elif snc_id not in removed and snc_id not in replaced:
+            result.append(athlete)
+    for group in updates.values():
+        result.extend(group)
+    return result
+
+
+def _state_file(snapshot_file: str) -> str:
+    return snapshot_file + ".state.json"
+
+
+def _load_state(snapshot_file: str) -> dict:
+    try:
+        with open(_state_file(snapshot_file), "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _load_previous(snapshot_file: str, state: dict) -> Optional[List[dict]]:
+    if not state:
+        return None
+    try:
+        with RosterSnapshot(snapshot_file) as snapshot:
+            return snapshot.to_list()
+    except (OSError, SnapshotError):
+        return None
+
+
+def _save_state(snapshot_file: str, state: dict) -> None:
+    temp = _state_file(snapshot_file) + ".tmp"
+    with open(temp, "w", encoding="utf-8") as file:
+        json.dump(state, file)
+    os.replace(temp, _state_file(snapshot_file))
+
+
+def _transferred(response: requests.Response) -> int:
+    length = response.headers.get("Content-Length")
+    if length is not None and length.isdigit():
+        return int(length)
+    return len(response.content)
+
+
+def sync(url: str, headers: dict, snapshot_file: str) -> SyncResult:
+    """
+    Bring the local roster snapshot up to date and return the current roster.
+
+    Raises requests.exceptions.RequestException if the endpoint can't be read,
+    or ValueError if the response isn't a roster.
+    """
+    state = _load_state(snapshot_file)
+    previous = _load_previous(snapshot_file, state)
+    hashes: Dict[str, str] = state.get("hashes", {}) if previous is not None else {}
+    started = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+
+    request_headers = dict(headers)
+    params = None
+    if previous is not None:
+        if state.get("etag"):
+            request_headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            request_headers["If-Modified-Since"] = state["last_modified"]
+        if state.get("synced_at") and time.time() - state.get("since_rejected", 0.0) >= SINCE_RETRY:
+            params = {"since": state["synced_at"]}
+
+    response = http_client.get(url, headers=request_headers, params=params)
+    if params is not None and 400 <= response.status_code < 500 and response.status_code != 404:
+        # The endpoint doesn't take a since query (or not today) - leave it out for a while
+        state["since_rejected"] = time.time()
+        params = None
+        response = http_client.get(url, headers=request_headers)
+    response.raise_for_status()
+    transferred = _transferred(response)
+
+    start = time.perf_counter()
+    added = changed = removed = 0
+    if response.status_code == 304 and previous is not None:
+        roster = previous
+    else:
+        body = response.json()
+        if isinstance(body, dict) and previous is not None:
+            # Delta response
+            state.pop("since_rejected", None)
+            removed_ids = {str(int(snc_id)) for snc_id in body.get("Removed", [])}
+            roster = apply_delta(previous, [normalize(a) for a in body.get("Changed", [])], removed_ids)
+        elif isinstance(body, list):
+            # Full roster - work out the delta locally
+            roster = [normalize(a) for a in body]
+        else:
+            raise ValueError("Unexpected Active Roster response")
+
+        new_hashes = roster_hashes(roster)
+        for key, digest in new_hashes.items():
+            old = hashes.get(key)
+            if old is None:
+                added += 1
+            elif old != digest:
+                changed += 1
+        removed = len(hashes.keys() - new_hashes.keys())
+        state["hashes"] = new_hashes
+
+    state["etag"] = response.headers.get("ETag", state.get("etag"))
+    state["last_modified"] = response.headers.get("Last-Modified", state.get("last_modified"))
+    state["synced_at"] = started
+    try:
+        # Compared as lists so a reordered roster, or a new duplicate entry, is saved too
+        if roster is not previous and roster != previous:
+            write_snapshot(roster, snapshot_file)
+        _save_state(snapshot_file, state)
+    except (OSError, ValueError) as ex:
+        logging.warning("Unable to save roster snapshot: %s", ex)
+        # An older snapshot left behind would no longer match the roster returned
+        for path in (snapshot_file, _state_file(snapshot_file)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    apply_ms = (time.perf_counter() - start) * 1000
+
+    logging.info(
+        "Roster sync: %s added, %s changed, %s removed - %s bytes transferred, applied in %.0f ms",
+        added,
+        changed,
+        removed,
+        transferred,
+        apply_ms,
+    )
+    return SyncResult(roster, added, changed, removed, transferred, apply_ms)
@@ -4,21 +4,28 @@ import splashutilities_ui as ui
 from version import APP_VERSION
 from config import appConfig
 import logging
+import multiprocessing
 import os
+import pathlib
 import sys
+import threading
 import app_version
+from platformdirs import user_cache_dir
 from requests.exceptions import RequestException
 
 def check_for_update() -> None:
     """Notifies if there's a newer released version"""
     current_version = APP_VERSION
+    # The result is kept for a day, so most launches don't go to GitHub at all
+    cachedir = user_cache_dir("SplashUtilities", "Swimming Canada")
+    pathlib.Path(cachedir).mkdir(parents=True, exist_ok=True)
     try:
-        latest_version = app_version.latest()
+        latest_version = app_version.latest(os.path.join(cachedir, "latest_release.json"))
         if latest_version is not None and not app_version.is_latest_version(latest_version, current_version):
             logging.info(f"New version available {latest_version.tag}")
             logging.info(f"Download URL: {latest_version.url}")
     #           Make it clickable???  webbrowser.open(latest_version.url))
-    except RequestException as ex:
+    except (RequestException, ValueError) as ex:
         logging.warning("Error checking for update: %s", ex)
 
 
@@ -44,7 +51,8 @@ def main():
     root.resizable(True, True)
     content = ui.mainApp(root, config)
     content.grid(column=0, row=0, sticky="news")
-    check_for_update()
+    # Off the UI thread - the result goes to the log when it arrives
+    threading.Thread(target=check_for_update, name="update-check", daemon=True).start()
 
     try:
         root.update()
@@ -64,4 +72,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # The para diff can run in worker processes, which a frozen (PyInstaller) build has to allow for
+    multiprocessing.freeze_support()
     main()
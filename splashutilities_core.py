@@ -1,15 +1,100 @@
 """Update functions for Splash Utilities"""
 
 from config import appConfig
-from threading import Thread
+from athlete_dedup import DUPLICATE_COLUMNS, REPORT_HEADER, find_duplicates, report_rows
+from athlete_snapshot import AthleteSnapshot, index_roster
+from change_plan import TABLE_KEYS, ChangePlan, PlanError
+from club_dedup import ClubRow, find_club_duplicates, REPORT_HEADER as CLUB_REPORT_HEADER
+from club_dedup import report_rows as club_report_rows
+from club_list import load_club_list
+from db_watch import DatabaseWatcher, high_water_marks
+from job_metrics import CountingConnection, metrics, tracked
+from lenex_check import check_entry_file, corrected_file_name
+from mdb_reader import MdbError, MdbReader
+from meet_index import REPORT_HEADER as MEET_REPORT_HEADER
+from meet_index import build_index, find_inconsistencies, find_meet_files, scan_meets
+from meet_index import report_rows as meet_report_rows
+from para_diff import DIFF_COLUMNS, PARA_LEVELS, diff_sharded, eligible_levels
+from platformdirs import user_cache_dir
+from roster_snapshot import RosterSnapshot, SnapshotError
+from roster_store import RosterStore
+from staging import create_staging_table, drop_staging_table
+from write_scheduler import LockTimeout, WriteScheduler, database_in_use
+import roster_sync
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from threading import Lock, Thread
+from typing import Dict, Optional, Sequence, Tuple
 import requests
 import pyodbc  # type: ignore
 import csv
+import datetime
+import xml.sax
+import zipfile
 import logging
+import os
+import pathlib
+import re
+import sqlite3
+import time
 
 
-def get_active_roster() -> list:
-    """Get the active roster from the API"""
+def _cache_file(name: str) -> str:
+    cachedir = user_cache_dir("SplashUtilities", "Swimming Canada")
+    pathlib.Path(cachedir).mkdir(parents=True, exist_ok=True)
+    return os.path.join(cachedir, name)
+
+
+def roster_snapshot_file() -> str:
+    """Where the last downloaded roster is kept (see roster_snapshot)"""
+    return _cache_file("activeroster.bin")
+
+
+def roster_store_file() -> str:
+    """Where the queryable copy of the roster is kept (see roster_store)"""
+    return _cache_file("activeroster.sqlite")
+
+
+def open_roster_snapshot() -> Optional[RosterSnapshot]:
+    """The roster saved by the last successful download, if there is one"""
+    try:
+        return RosterSnapshot(roster_snapshot_file())
+    except (OSError, SnapshotError):
+        return None
+
+
+def open_roster_store() -> RosterStore:
+    """The roster store - refreshed by get_active_roster()"""
+    return RosterStore(roster_store_file())
+
+
+def update_roster_store(result: roster_sync.SyncResult) -> None:
+    """Bring the roster store in line with a sync, if anything changed"""
+    try:
+        with open_roster_store() as store:
+            if result.added or result.changed or result.removed or store.refreshed is None:
+                start = time.perf_counter()
+                count = store.refresh(result.roster)
+                logging.info(
+                    "Roster store refreshed - %s athletes in %.0f ms", count, (time.perf_counter() - start) * 1000
+                )
+    except (sqlite3.Error, KeyError, ValueError) as ex:
+        logging.warning("Unable to update the roster store: %s", ex)
+
+
+# A roster downloaded this recently (seconds) is used again rather than synced - so the warm-up's
+# download serves the first job, and jobs run back to back share one
+ROSTER_MAX_AGE = 300.0
+
+# (time.monotonic() of the download, roster). The lock also stops two threads downloading at once.
+_roster_cache: Tuple[float, list] = (0.0, [])
+_roster_lock = Lock()
+
+
+def get_active_roster(max_age: float = ROSTER_MAX_AGE) -> list:
+    """Get the active roster from the API, or the copy downloaded in the last max_age seconds"""
+    global _roster_cache  # pylint: disable=global-statement
 
     URL = "https://rankings.edey.org/api/ActiveRoster"
     headers = {
@@ -17,19 +102,24 @@ def get_active_roster() -> list:
         "Accept": "*/*",
     }
 
-    # Get the response and handle common errors
+    with _roster_lock:
+        fetched, roster = _roster_cache
+        if roster and time.monotonic() - fetched < max_age:
+            logging.info(
+                "Active Roster Retrieved (%.0f s ago) - Total Athletes = %s", time.monotonic() - fetched, len(roster)
+            )
+            return roster
 
-    try:
-        response = requests.get(URL, headers=headers)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as ex:
-        logging.error("Error retrieving Active Roster: %s", ex)
-        return []
+        # Sync the local snapshot with the API and handle common errors
 
-    # Be sure to convert SNC ID to a string to match the database field
-    roster = response.json()
-    for athlete in roster:
-        athlete["SNC_ID"] = str(int(athlete["SNC_ID"]))
+        try:
+            result = roster_sync.sync(URL, headers, roster_snapshot_file())
+        except (requests.exceptions.RequestException, ValueError) as ex:
+            logging.error("Error retrieving Active Roster: %s", ex)
+            return []
+        roster = result.roster
+        update_roster_store(result)
+        _roster_cache = (time.monotonic(), roster)
 
     # dump the first 5 records to the log
     logging.info("Active Roster Retrieved - Total Athletes = %s", len(roster))
@@ -38,11 +128,141 @@ def get_active_roster() -> list:
     return roster
 
 
+def prefetch_roster_and_athletes(
+    source, columns: Sequence[str], after_id: int = 0
+) -> Optional[Tuple[list, AthleteSnapshot]]:
+    """
+    Download the Active Roster and load the ATHLETE snapshot concurrently.
+
+    source is an open connection, or the database file name to read it
+    directly without ODBC. The two loads are independent (network vs.
+    ODBC/disk) so the wall time is the slower of the two rather than the sum.
+    Only athletes with an ATHLETEID above after_id are loaded.
+    Returns (roster, athletes), or None if either side failed (the reason is
+    logged).
+    """
+    start = time.perf_counter()
+    metrics.begin_stage("Loading roster and athletes")
+    if isinstance(source, str):
+        load_athletes = partial(AthleteSnapshot.load_mdb, source, columns, after_id)
+    else:
+        load_athletes = partial(AthleteSnapshot.load, source, columns, "WHERE ATHLETEID > ?", (after_id,))
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch") as pool:
+        roster_future = pool.submit(get_active_roster)
+        athletes_future = pool.submit(load_athletes)
+
+        try:
+            athletes = athletes_future.result()
+        except (pyodbc.Error, MdbError, OSError) as ex:
+            logging.error("Error reading database")
+            logging.error(ex)
+            athletes = None
+
+        try:
+            roster = roster_future.result()
+        except Exception as ex:  # pylint: disable=broad-except
+            logging.error("Error retrieving Active Roster: %s", ex)
+            roster = []
+
+    if athletes is None:
+        return None
+    if len(roster) == 0:
+        logging.error("No Active Roster")
+        return None
+
+    logging.info("Roster and database loaded in %.1f s - %s athletes", time.perf_counter() - start, len(athletes))
+    return roster, athletes
+
+
+def open_database(connection_string: str, file_reads: bool):
+    """
+    Connect to the database, or return the file name when it is to be read
+    directly (file_reads). Returns None if the connection failed (logged).
+    """
+    if file_reads:
+        logging.info("Reading the database file directly (no ODBC)")
+        return None
+    # Whether Splash has it open decides how the writes are batched (WriteScheduler.for_connection). It has to
+    # be checked first: once connected, the .ldb is there because of us.
+    database = re.search(r"DBQ=([^;]*)", connection_string, re.IGNORECASE)
+    in_use = database_in_use(database.group(1)) if database else True
+    try:
+        con = CountingConnection(pyodbc.connect(connection_string))
+    except pyodbc.Error as ex:
+        logging.error("Error connecting to database")
+        logging.error(ex)
+        return None
+    con.in_use = in_use
+    return con
+
+
+def apply_plan(plan: ChangePlan, con, plan_file: str) -> None:
+    """
+    Write the plan through the lock-aware scheduler and close the connection.
+    If it can't all be written, what is left is saved to plan_file for Apply Plan.
+    """
+    total = len(plan)
+    metrics.begin_stage("Writing changes", total)
+    try:
+        plan.apply(con, WriteScheduler.for_connection(con))
+    except (pyodbc.Error, LockTimeout) as ex:
+        logging.error("Error updating database - %s of %s changes were made", total - len(plan), total)
+        logging.error(ex)
+        con.close()
+        try:
+            plan.save(plan_file)
+        except OSError as save_ex:
+            logging.error("Unable to save change plan: %s", save_ex)
+            return
+        logging.info("The %s remaining changes were saved to %s - use Apply Plan to write them", len(plan), plan_file)
+        return
+    con.close()
+
+
+def finish_plan(plan: ChangePlan, con, update_db: bool, plan_file: str) -> None:
+    """
+    Apply the plan now when database updates are on, otherwise close the
+    database (if one was opened) and save the plan so Apply_Plan can write it
+    later unchanged.
+    """
+    if update_db:
+        apply_plan(plan, con, plan_file)
+        return
+
+    if con is not None:
+        con.close()
+    if len(plan) == 0:
+        return
+    try:
+        plan.save(plan_file)
+    except OSError as ex:
+        logging.error("Unable to save change plan: %s", ex)
+        return
+    logging.info("Change plan with %s changes saved to %s - use Apply Plan to write it", len(plan), plan_file)
+
+
+# Columns of the exceptions journal - when and in which database the rest were cleared
+JOURNAL_HEADER = ["CLEARED", "DATABASE", "ATHLETEID", "FIRSTNAME", "LASTNAME", "HANDICAPEX"]
+
+
+def append_journal(path: str, database: str, rows: Sequence[Sequence]) -> None:
+    """Add the exceptions about to be cleared to the journal, so every run's old values are kept"""
+    new = not os.path.exists(path) or os.path.getsize(path) == 0
+    cleared = datetime.datetime.now().isoformat(timespec="seconds")
+    with open(path, "a", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        if new:
+            writer.writerow(JOURNAL_HEADER)
+        writer.writerows([cleared, database] + list(row) for row in rows)
+
+
 class Update_Clubs(Thread):
-    def __init__(self, config: appConfig):
+    def __init__(self, config: appConfig, after_id: int = 0):
         super().__init__()
         self._config: appConfig = config
+        self._after_id = after_id  # Only clubs with a higher CLUBID (watch mode)
 
+    @tracked("Fix Clubs")
     def run(self):
         logging.info("Updating Region (Province) Code on all Clubs...")
 
@@ -50,43 +270,63 @@ class Update_Clubs(Thread):
         _splash_db_driver = "{Microsoft Access Driver (*.mdb, *.accdb)}"
         _csv_file = self._config.get_str("csv_file")
         _update_db = self._config.get_bool("update_database")
+        _plan_file = self._config.get_str("plan_file")
+        _set_based = self._config.get_bool("set_based_updates")
 
         try:
             logging.info("Reading CSV File...")
-            data = self.csv_to_dict(_csv_file)
+            data = load_club_list(_csv_file)
             logging.info("  CSV File Read - Total Clubs = %s", len(data))
         except FileNotFoundError:
             logging.error("CSV File not found")
             return
+        except (ValueError, UnicodeDecodeError) as ex:
+            logging.error("Error reading CSV File: %s", ex)
+            return
 
         logging.info("Reading Splash Database...")
 
         connection_string = "DRIVER={};DBQ={};".format(_splash_db_driver, _splash_db_file)
-        try:
-            con = pyodbc.connect(connection_string)
-        except pyodbc.Error as ex:
-            logging.error("Error connecting to database")
-            logging.error(ex)
+        _file_reads = self._config.get_bool("file_reads") and not _update_db
+        con = open_database(connection_string, _file_reads)
+        if con is None and not _file_reads:
+            return
+
+        # The set-based update stages the club list in the database - a dry run leaves the database alone and
+        # makes its plan row by row, in memory
+        if _set_based and _update_db:
+            self._run_set_based(con, data, _splash_db_file)
             return
 
-        SQL = "SELECT CLUBID, CODE, NAME, NATION, REGION " "FROM CLUB "
+        SQL = "SELECT CLUBID, CODE, NAME, NATION, REGION " "FROM CLUB WHERE CLUBID > ?"
 
         # iterate over the returned rows and set the region code to the province field from the CSV file
 
-        cursor = con.cursor()
         try:
-            cursor.execute(SQL)
-            rows = cursor.fetchall()
-        except:
+            if con is None:
+                with MdbReader(_splash_db_file) as mdb:
+                    rows = list(mdb.read_table("CLUB", ("CLUBID", "CODE", "NAME", "NATION", "REGION")))
+                rows = [row for row in rows if row[0] is not None and row[0] > self._after_id]
+            else:
+                cursor = con.cursor()
+                cursor.execute(SQL, self._after_id)
+                rows = cursor.fetchall()
+        except (pyodbc.Error, MdbError, OSError) as ex:
             logging.error("Error reading database")
+            logging.error(ex)
+            if con is not None:
+                con.close()
             return
 
         logging.info("  Splash Database Read - Total Clubs = %s", len(rows))
 
         _count_clubs = 0
         _count_club_names = 0
+        plan = ChangePlan("Update_Clubs", _splash_db_file)
+        metrics.begin_stage("Checking clubs", len(rows))
 
         for row in rows:
+            metrics.advance()
             club_id = row[0]
             club_code = row[1]
             club_name = row[2]
@@ -97,24 +337,22 @@ class Update_Clubs(Thread):
             if club_nation != "CAN":
                 continue
 
-            mylist = list(filter(lambda person: person["Club Code"] == club_code, data))
+            club = data.get(club_code)
 
-            if len(mylist) != 1:
+            if club is None:
                 logging.error("Club Code %s not found in CSV file", club_code)
                 continue
 
-            province = mylist[0]["Province"]
-            clubname = mylist[0]["Club Name"]
-            preferred_club_name = mylist[0]["Preferred Club Name"]
+            province = club.province
+            clubname = club.name
+            preferred_club_name = club.preferred_name
 
             # update the region code in the database only if it is different from the province field in the CSV file
 
             if club_region != province:
-                SQL = "UPDATE CLUB SET REGION = ? WHERE CLUBID = ? "
                 _count_clubs += 1
+                plan.add("CLUB", club_id, "REGION", club_region, province)
                 if _update_db:
-                    cursor.execute(SQL, (province, club_id))
-                    con.commit()
                     logging.info("Club Code %s updated to Province %s", club_code, province)
                 else:
                     logging.info("Would have updated Club Code %s to Province %s", club_code, province)
@@ -122,11 +360,8 @@ class Update_Clubs(Thread):
             # Set the preferred club long name if one is set.
             if preferred_club_name is not None:
                 if (preferred_club_name != club_name) and (len(preferred_club_name) > 1):
-                    SQL = "UPDATE CLUB SET NAME = ? WHERE CLUBID = ? "
                     _count_club_names += 1
-                    if _update_db:
-                        cursor.execute(SQL, (preferred_club_name, club_id))
-                        con.commit()
+                    plan.add("CLUB", club_id, "NAME", club_name, preferred_club_name)
                     logging.info(
                         "Club Code %s not preferred name. <%s> updated to <%s>",
                         club_code,
@@ -134,23 +369,98 @@ class Update_Clubs(Thread):
                         preferred_club_name,
                     )
 
-        con.close()
+        finish_plan(plan, con, _update_db, _plan_file)
         logging.info("Update Complete - %s Clubs updated, %s Club Names updated", _count_clubs, _count_club_names)
 
-    def csv_to_dict(self, file_path):
-        data_dict = []
-        with open(file_path, "r") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                data_dict.append(row)
-        return data_dict
+    # Staged club list joined to CLUB - shared by the preview queries and the updates so they cover the same rows.
+    # Access compares text without case, so StrComp(..., 0) makes the comparisons exact like the row-by-row job's.
+    _STAGING = "SU_CLUBLIST"
+    _JOIN = "CLUB AS C INNER JOIN SU_CLUBLIST AS S ON C.CODE = S.CODE"
+    _REGION_WHERE = (
+        "C.NATION = 'CAN' AND C.CLUBID > ? AND StrComp(C.CODE, S.CODE, 0) = 0 AND ("
+        "(C.REGION IS NULL AND S.PROVINCE IS NOT NULL) OR (C.REGION IS NOT NULL AND S.PROVINCE IS NULL) "
+        "OR StrComp(C.REGION, S.PROVINCE, 0) <> 0)"
+    )
+    _NAME_WHERE = (
+        "C.NATION = 'CAN' AND C.CLUBID > ? AND StrComp(C.CODE, S.CODE, 0) = 0 AND LEN(S.PREFERRED) > 1 "
+        "AND (C.NAME IS NULL OR StrComp(C.NAME, S.PREFERRED, 0) <> 0)"
+    )
+
+    def _run_set_based(self, con, data: dict, splash_db_file: str) -> None:
+        """Stage the club list and correct REGION and NAME with joined UPDATEs - a fixed number of statements"""
+        staged = [
+            (code, club.province, club.preferred_name) for code, club in data.items() if club is not None and code
+        ]
+        cursor = con.cursor()
+        updated = []  # Each UPDATE commits on its own - what was written if a later one fails
+        try:
+            create_staging_table(
+                con,
+                self._STAGING,
+                (("CODE", "TEXT(50)"), ("PROVINCE", "TEXT(50)"), ("PREFERRED", "TEXT(255)")),
+                staged,
+            )
+
+            cursor.execute(
+                "SELECT C.CODE FROM CLUB AS C LEFT JOIN SU_CLUBLIST AS S ON C.CODE = S.CODE "
+                "WHERE C.NATION = 'CAN' AND C.CLUBID > ? AND (S.CODE IS NULL OR StrComp(C.CODE, S.CODE, 0) <> 0)",
+                self._after_id,
+            )
+            for (code,) in cursor.fetchall():
+                logging.error("Club Code %s not found in CSV file", code)
+
+            cursor.execute(
+                "SELECT C.CODE, S.PROVINCE FROM {} WHERE {}".format(self._JOIN, self._REGION_WHERE), self._after_id
+            )
+            regions = cursor.fetchall()
+            cursor.execute(
+                "SELECT C.CODE, C.NAME, S.PREFERRED FROM {} WHERE {}".format(self._JOIN, self._NAME_WHERE),
+                self._after_id,
+            )
+            names = cursor.fetchall()
+
+            for code, province in regions:
+                logging.info("Club Code %s updated to Province %s", code, province)
+            for code, name, preferred in names:
+                logging.info("Club Code %s not preferred name. <%s> updated to <%s>", code, name, preferred)
+
+            scheduler = WriteScheduler.for_connection(con)
+            if regions:
+                count = scheduler.execute(
+                    "UPDATE {} SET C.REGION = S.PROVINCE WHERE {}".format(self._JOIN, self._REGION_WHERE),
+                    self._after_id,
+                )
+                updated.append("{} club regions".format(count))
+            if names:
+                count = scheduler.execute(
+                    "UPDATE {} SET C.NAME = S.PREFERRED WHERE {}".format(self._JOIN, self._NAME_WHERE),
+                    self._after_id,
+                )
+                updated.append("{} club names".format(count))
+            logging.info("%.1f s waiting on database locks", scheduler.stats().lock_wait)
+        except (pyodbc.Error, LockTimeout) as ex:
+            con.rollback()
+            if updated:
+                logging.error("Error updating database - only %s were updated", " and ".join(updated))
+            else:
+                logging.error("Error updating database - no changes were made")
+            logging.error(ex)
+            drop_staging_table(con, self._STAGING)
+            con.close()
+            return
+
+        drop_staging_table(con, self._STAGING)
+        con.close()
+        logging.info("Update Complete - %s Clubs updated, %s Club Names updated", len(regions), len(names))
 
 
 class Update_Para(Thread):
-    def __init__(self, config: appConfig):
+    def __init__(self, config: appConfig, after_id: int = 0):
         super().__init__()
         self._config: appConfig = config
+        self._after_id = after_id  # Only athletes with a higher ATHLETEID (watch mode)
 
+    @tracked("Fix Para")
     def run(self):
         logging.info("Updating Para and exception codes on all Athletes...")
 
@@ -159,8 +469,10 @@ class Update_Para(Thread):
         _update_db = self._config.get_bool("update_database")
         _update_sdms = self._config.get_bool("update_sdms")
         _para_level = self._config.get_str("para_level")
-        _para_level_list = ["1","2","3","Int"]
-        _para_levels = _para_level_list[_para_level_list.index(_para_level):]
+        _para_levels = eligible_levels(_para_level)
+        _bulk_diff = self._config.get_bool("bulk_diff")
+        _diff_workers = self._config.get_int("diff_workers")
+        _plan_file = self._config.get_str("plan_file")
 
         logging.info("Database updates: %s", _update_db)
         logging.info("SDMS updates: %s", _update_sdms)
@@ -168,161 +480,64 @@ class Update_Para(Thread):
         logging.info("Opening Splash Database")
 
         connection_string = "DRIVER={};DBQ={};".format(_splash_db_driver, _splash_db_file)
-        try:
-            con = pyodbc.connect(connection_string)
-        except pyodbc.Error as ex:
-            logging.error("Error connecting to database")
-            logging.error(ex)
-
-        # Get the active roster
-        roster = get_active_roster()
-        if len(roster) == 0:
-            con.close()
-            logging.error("No Active Roster")
+        _file_reads = self._config.get_bool("file_reads") and not _update_db
+        con = open_database(connection_string, _file_reads)
+        if con is None and not _file_reads:
             return
 
-        # Get all the Athlete Data
-
-        SQL = "SELECT ATHLETEID, FIRSTNAME, LASTNAME, LICENSE, HANDICAPEX, HANDICAPS, HANDICAPSB, HANDICAPSM, SDMSID, NATION FROM ATHLETE"
+        # Get the active roster and all the Athlete Data at the same time
 
-        # iterate over the returned rows and set the region code to the province field from the CSV file
-
-        cursor = con.cursor()
-        try:
-            cursor.execute(SQL)
-            rows = cursor.fetchall()
-        except pyodbc.Error as ex:
-            logging.error("Error reading database")
-            # log the error reason and return
-            logging.error(ex)
-            con.close()
+        prefetched = prefetch_roster_and_athletes(
+            con if con is not None else _splash_db_file, DIFF_COLUMNS, self._after_id
+        )
+        if prefetched is None:
+            if con is not None:
+                con.close()
             return
-
-        for row in rows:
-            athlete_id = row[0]
-            firstname = row[1]
-            lastname = row[2]
-            license = row[3]
-            handicapex = row[4]
-            handicaps = row[5]
-            handicapsb = row[6]
-            handicapsm = row[7]
-            sdmsid = row[8]
-            nation = row[9]
-
-            # find the athlete in the roster
-
-            if nation != "CAN":
-                continue
-
-            mylist = list(filter(lambda person: str(person["SNC_ID"]) == license, roster))
-
-            if len(mylist) != 1:
-                #logging.error("Athlete %s %s (%s) not found in Active Roster", firstname, lastname, license)
-                continue
-            # print("Found Para for ", firstname, lastname, " in Active Roster")
-            athlete = mylist[0]
-
-            # Check if the fields match the roster individually.  IF not, log it and update it
-
-            if athlete["S"] in ("NE", "PSPI", "PSVI", "PSII", "PI","II","VI", "") or athlete["S"] is None:
-                athlete["S"] = "0"
-            if athlete["SB"] in ("NE", "PSPI", "PSVI", "PSII", "PI","II","VI","") or athlete["SB"] is None:
-                athlete["SB"] = "0"
-            if athlete["SM"] in ("NE", "PSPI", "PSVI", "PSII", "PI","II","VI", "") or athlete["SM"] is None:
-                athlete["SM"] = "0"
-
-            if athlete["SDMS_ID"] is None:
-                athlete["SDMS_ID"] = "0"
-            else:
-                athlete["SDMS_ID"] = str(int(athlete["SDMS_ID"]))
-
-            parts = str(athlete["Exceptions"]).split(",")
-
-            letters = sorted([p for p in parts if p.isalpha() and p.upper() != "J"])
-            numbers = sorted([p for p in parts if p.isdigit()], key=int)
-            pluses = [p for p in parts if p == "+"]
-
-            rev_exceptions = ",".join(letters + numbers + pluses)
-           
-            if rev_exceptions != str(handicapex):
-                logging.error(
-                    "Athlete %s %s exceptions mismatch. Splash: %s Roster: %s",
-                    firstname,
-                    lastname,
-                    handicapex,
-                    rev_exceptions
-                )
-                if _update_db:
-                    SQL = "UPDATE ATHLETE SET HANDICAPEX = ? WHERE ATHLETEID = ? "
-                    con.execute(SQL, (rev_exceptions, athlete_id))
-                    con.commit()
-
-            if str(athlete["S"]) != str(handicaps):
-                logging.error(
-                    "Athlete %s %s S sport class mismatch. Splash: %s Roster: %s",
-                    firstname,
-                    lastname,
-                    handicaps,
-                    athlete["S"],
-                )
-                if _update_db:
-                    SQL = "UPDATE ATHLETE SET HANDICAPS = ? WHERE ATHLETEID = ? "
-                    con.execute(SQL, (athlete["S"], athlete_id))
-                    con.commit()
-
-            if str(athlete["SB"]) != str(handicapsb):
-                logging.error(
-                    "Athlete %s %s SB sport class mismatch. Splash: %s Roster: %s",
-                    firstname,
-                    lastname,
-                    handicapsb,
-                    athlete["SB"],
-                )
-                if _update_db:
-                    SQL = "UPDATE ATHLETE SET HANDICAPSB = ? WHERE ATHLETEID = ? "
-                    con.execute(SQL, (athlete["SB"], athlete_id))
-                    con.commit()
-
-            if str(athlete["SM"]) != str(handicapsm):
-                logging.error(
-                    "Athlete %s %s SM sport class mismatch. Splash: %s Roster: %s",
-                    firstname,
-                    lastname,
-                    handicapsm,
-                    athlete["SM"],
-                )
-                if _update_db:
-                    SQL = "UPDATE ATHLETE SET HANDICAPSM = ? WHERE ATHLETEID = ? "
-                    con.execute(SQL, (athlete["SM"], athlete_id))
-                    con.commit()
-
-            if (athlete["SDMS_ID"] != str(sdmsid))  and (athlete["Level"] == "Int"):
-                logging.error(
-                    "Athlete %s %s SDMSID mismatch. Splash: %s Roster: %s",
-                    firstname,
-                    lastname,
-                    sdmsid,
-                    athlete["SDMS_ID"],
-                )
-                if _update_db & _update_sdms:
-                    SQL = "UPDATE ATHLETE SET SDMSID = ? WHERE ATHLETEID = ? "
-                    con.execute(SQL, (athlete["SDMS_ID"], athlete_id))
-                    con.commit()
-
-            if str(athlete["Level"]) not in _para_levels:
-                logging.warning("Athlete %s %s not at minimum meet level %s has level %s", firstname, lastname, _para_level, athlete["Level"])
-
-        con.close()
+        roster, athletes = prefetched
+        roster_index = index_roster(roster)
+        plan = ChangePlan("Update_Para", _splash_db_file)
+
+        # Compare every matched athlete's fields with the roster.  Log each mismatch and update it
+        # (spread over diff_workers processes for very large databases)
+
+        metrics.begin_stage("Comparing with the roster", len(athletes))
+        diff = diff_sharded(athletes, roster_index, _para_levels, _diff_workers, _bulk_diff)
+        metrics.advance(len(athletes))
+
+        for change in diff.changes:
+            logging.error(
+                "Athlete %s %s %s mismatch. Splash: %s Roster: %s",
+                change.firstname,
+                change.lastname,
+                change.field,
+                change.splash,
+                change.roster,
+            )
+            if change.column != "SDMSID" or _update_sdms:
+                plan.add("ATHLETE", change.athlete_id, change.column, change.splash, change.roster)
+
+        for warning in diff.level_warnings:
+            logging.warning(
+                "Athlete %s %s not at minimum meet level %s has level %s",
+                warning.firstname,
+                warning.lastname,
+                _para_level,
+                warning.level,
+            )
+
+        finish_plan(plan, con, _update_db, _plan_file)
         logging.info("Report Complete")
 
 
 class Update_Para_Names(Thread):
     # Update the para names from the active roster and create a rollback file
-    def __init__(self, config: appConfig):
+    def __init__(self, config: appConfig, after_id: int = 0):
         super().__init__()
         self._config: appConfig = config
+        self._after_id = after_id  # Only athletes with a higher ATHLETEID (watch mode)
 
+    @tracked("Update Para Names")
     def run(self):
         logging.info("Updating Para Athlete Names...")
 
@@ -330,68 +545,49 @@ class Update_Para_Names(Thread):
         _splash_db_driver = "{Microsoft Access Driver (*.mdb, *.accdb)}"
         _update_db = self._config.get_bool("update_database")
         _rollback_file = self._config.get_str("rollback_file")
+        _plan_file = self._config.get_str("plan_file")
 
         logging.info("Reading Splash Database...")
 
         connection_string = "DRIVER={};DBQ={};".format(_splash_db_driver, _splash_db_file)
-        try:
-            con = pyodbc.connect(connection_string)
-        except pyodbc.Error as ex:
-            logging.error("Error connecting to database")
-            logging.error(ex)
-            return
-
-        # Get the active roster
-
-        roster = get_active_roster()
-        if len(roster) == 0:
-            con.close()
+        _file_reads = self._config.get_bool("file_reads") and not _update_db
+        con = open_database(connection_string, _file_reads)
+        if con is None and not _file_reads:
             return
 
-        # Get all the Athlete Data
+        # Get the active roster and all the Athlete Data at the same time
 
-        SQL = "SELECT ATHLETEID, FIRSTNAME, LASTNAME, LICENSE, NATION FROM ATHLETE"
-
-        # iterate over the returned rows and update the firname and lastname fields. Create a rollback file with the old names
-
-        try:
-            cursor = con.cursor()
-            cursor.execute(SQL)
-        except pyodbc.Error as ex:
-            logging.error("Error reading database")
-            # log the error reason and return
-            logging.error(ex)
-            con.close()
+        prefetched = prefetch_roster_and_athletes(
+            con if con is not None else _splash_db_file,
+            ("ATHLETEID", "FIRSTNAME", "LASTNAME", "LICENSE", "NATION"),
+            self._after_id,
+        )
+        if prefetched is None:
+            if con is not None:
+                con.close()
             return
+        roster, athletes = prefetched
+        roster_index = index_roster(roster)
+        plan = ChangePlan("Update_Para_Names", _splash_db_file)
 
-        rows = cursor.fetchall()
+        # iterate over the Canadian athletes and update the firname and lastname fields. Create a rollback file with the old names
 
-        for row in rows:
-            athlete_id = row[0]
-            firstname = row[1]
-            lastname = row[2]
-            license = row[3]
-            nation = row[4]
+        canadian = athletes.where_equal("NATION", "CAN")
+        metrics.begin_stage("Checking names", len(canadian))
+        for row in athletes.rows(canadian):
+            metrics.advance()
+            athlete_id, firstname, lastname, license, nation = row
 
             # find the athlete in the roster
 
-            if nation != "CAN":
-                continue
+            athlete = roster_index.get(license)
 
-            mylist = list(filter(lambda person: str(person["SNC_ID"]) == license, roster))
-
-            if len(mylist) != 1:  # We only update Para Athletes so skip anyone not on the roster
+            if athlete is None:  # We only update Para Athletes so skip anyone not on the roster
                 continue
 
-            athlete = mylist[0]
-
             if (firstname != athlete["Given_Name"]) or (lastname != athlete["Family_Name"]):
-#                SQL = "UPDATE ATHLETE SET FIRSTNAMEEN = ?, LASTNAMEEN = ? WHERE ATHLETEID = ? "
-                SQL = "UPDATE ATHLETE SET FIRSTNAME = ?, LASTNAME = ? WHERE ATHLETEID = ? "
-
-                if _update_db:
-                    con.execute(SQL, (athlete["Given_Name"], athlete["Family_Name"], athlete_id))
-                    con.commit()
+                plan.add("ATHLETE", athlete_id, "FIRSTNAME", firstname, athlete["Given_Name"])
+                plan.add("ATHLETE", athlete_id, "LASTNAME", lastname, athlete["Family_Name"])
                 logging.info(
                     "Athlete %s %s updated to %s %s",
                     firstname,
@@ -400,7 +596,7 @@ class Update_Para_Names(Thread):
                     athlete["Family_Name"],
                 )
 
-        con.close()
+        finish_plan(plan, con, _update_db, _plan_file)
         logging.info("Update Complete")
 
 
@@ -411,6 +607,7 @@ class Rollback_Names(Thread):
         super().__init__()
         self._config: appConfig = config
 
+    @tracked("Rollback Names")
     def run(self):
         logging.info("Restoring Athlete Names...")
 
@@ -418,11 +615,15 @@ class Rollback_Names(Thread):
         _splash_db_driver = "{Microsoft Access Driver (*.mdb, *.accdb)}"
         _rollback_file = self._config.get_str("rollback_file")
         _update_db = self._config.get_bool("update_database")
+        _plan_file = self._config.get_str("plan_file")
 
         logging.info("Updating Splash Database...")
 
         connection_string = "DRIVER={};DBQ={};".format(_splash_db_driver, _splash_db_file)
-        con = pyodbc.connect(connection_string)
+        con = open_database(connection_string, False)
+        if con is None:
+            return
+        plan = ChangePlan("Rollback_Names", _splash_db_file)
 
         with open(_rollback_file, "r") as file:
             reader = csv.reader(file)
@@ -432,25 +633,21 @@ class Rollback_Names(Thread):
                 firstname = row[1]
                 lastname = row[2]
 
-                SQL = "UPDATE ATHLETE SET FIRSTNAME = ?, LASTNAME = ? WHERE ATHLETEID = ? "
-                if _update_db:
-                    try:
-                        con.execute(SQL, (firstname, lastname, athlete_id))
-                        con.commit()
-                        logging.info("Athlete %s restored to %s %s", athlete_id, firstname, lastname)
-                    except pyodbc.Error as ex:
-                        logging.error("Error updating database for %s %s", lastname, firstname)
-                        logging.error(ex)
+                plan.add("ATHLETE", athlete_id, "FIRSTNAME", None, firstname)
+                plan.add("ATHLETE", athlete_id, "LASTNAME", None, lastname)
+                logging.info("Athlete %s restored to %s %s", athlete_id, firstname, lastname)
 
-        con.close()
+        finish_plan(plan, con, _update_db, _plan_file)
         logging.info("Restore Complete")
 
 
 class Clear_Exceptions(Thread):
-    def __init__(self, config: appConfig):
+    def __init__(self, config: appConfig, after_id: int = 0):
         super().__init__()
         self._config: appConfig = config
+        self._after_id = after_id  # Only athletes with a higher ATHLETEID (watch mode)
 
+    @tracked("Clear Non-Para")
     def run(self):
         logging.info("Clearing exceptions on non-para Athletes...")
 
@@ -458,101 +655,138 @@ class Clear_Exceptions(Thread):
         #        _splash_db_driver = self._config.get_str("splash_db_driver")
         _splash_db_driver = "{Microsoft Access Driver (*.mdb, *.accdb)}"
         _update_db = self._config.get_bool("update_database")
+        _plan_file = self._config.get_str("plan_file")
+        _set_based = self._config.get_bool("set_based_updates")
 
         logging.info("Reading Splash Database...")
 
         connection_string = "DRIVER={};DBQ={};".format(_splash_db_driver, _splash_db_file)
-        
-        try:
-            con = pyodbc.connect(connection_string)
-        except pyodbc.Error as ex:
-            logging.error("Error connecting to database")
-            logging.error(ex)
-
-        # Get the active roster
-
-        roster = get_active_roster()
-        if len(roster) == 0:
-            con.close()
+        _file_reads = self._config.get_bool("file_reads") and not _update_db
+        con = open_database(connection_string, _file_reads)
+        if con is None and not _file_reads:
             return
 
-        # Get all the Athlete Data
+        # The set-based update stages the roster keys in the database, so a dry run plans row by row without writing
+        if _set_based and _update_db:
+            self._run_set_based(con, _splash_db_file)
+            return
 
-        SQL = "SELECT ATHLETEID, FIRSTNAME, LASTNAME,  LICENSE, HANDICAPEX, NATION FROM ATHLETE"
+        # Get the active roster and all the Athlete Data at the same time
 
-        # iterate over the returned rows and set the region code to the province field from the CSV file
+        COLUMNS = ("ATHLETEID", "FIRSTNAME", "LASTNAME", "LICENSE", "HANDICAPEX", "NATION")
 
-        cursor = con.cursor()
-        try:
-            cursor.execute(SQL)
-            rows = cursor.fetchall()
-        except pyodbc.Error as ex:
-            logging.error("Error reading database")
-            # log the error reason and return
-            logging.error(ex)
-            con.close()
+        prefetched = prefetch_roster_and_athletes(con if con is not None else _splash_db_file, COLUMNS, self._after_id)
+        if prefetched is None:
+            if con is not None:
+                con.close()
             return
-        _count_exceptions = 0
-        
-        for row in rows:
-            athlete_id = row[0]
-            firstname = row[1]
-            lastname = row[2]
-            license = row[3]
-            handicapex = row[4]
-            nation = row[5]
+        roster, athletes = prefetched
+        roster_index = index_roster(roster)
+        plan = ChangePlan("Clear_Exceptions", _splash_db_file)
 
-            # find the athlete in the roster
-
-            if nation != "CAN":
-                continue
-
-            mylist = list(filter(lambda person: str(person["SNC_ID"]) == license, roster))
+        _count_exceptions = 0
 
+        canadian = athletes.where_equal("NATION", "CAN")
+        metrics.begin_stage("Checking exceptions", len(canadian))
+        for row in athletes.rows(canadian):
+            metrics.advance()
+            athlete_id, firstname, lastname, license, handicapex, nation = row
 
+            # find the athlete in the roster
 
-            if len(mylist) != 1:
+            if license not in roster_index:
                 if handicapex is not None:
                     # Clear the exceptions
                     logging.info("Athlete %s %s exceptions cleared, was set to: %s", firstname, lastname, handicapex)
-                    handicapex = None
-                    SQL = "UPDATE ATHLETE SET HANDICAPEX = ? WHERE ATHLETEID = ? "
                     _count_exceptions += 1
-                    if _update_db:
-                        con.execute(SQL, (handicapex, athlete_id))
-                        con.commit()
+                    plan.add("ATHLETE", athlete_id, "HANDICAPEX", handicapex, None)
 
-        con.close()
+        finish_plan(plan, con, _update_db, _plan_file)
         logging.info("Updatng Exceptions Complete - %s exceptions cleared", _count_exceptions)
 
+    _STAGING = "SU_ROSTER"
+    # Canadian athletes with exceptions who aren't on the roster - shared by the journal and the update
+    _WHERE = (
+        "NATION = 'CAN' AND HANDICAPEX IS NOT NULL AND ATHLETEID > ? "
+        "AND (LICENSE IS NULL OR LICENSE NOT IN (SELECT SNC_ID FROM SU_ROSTER))"
+    )
+
+    def _run_set_based(self, con, splash_db_file: str) -> None:
+        """Stage the roster keys and clear the exceptions with one UPDATE, journalling the old values first"""
+        _journal_file = self._config.get_str("exceptions_journal")
+
+        roster = get_active_roster()
+        if len(roster) == 0:
+            logging.error("No Active Roster")
+            con.close()
+            return
+        # Same keys as the row-by-row job matches on (IDs listed twice on the roster are left out)
+        keys = [(key,) for key in index_roster(roster)]
+
+        cursor = con.cursor()
+        try:
+            create_staging_table(con, self._STAGING, (("SNC_ID", "TEXT(20)"),), keys)
+            cursor.execute(
+                "SELECT ATHLETEID, FIRSTNAME, LASTNAME, HANDICAPEX FROM ATHLETE WHERE {} ORDER BY ATHLETEID".format(
+                    self._WHERE
+                ),
+                self._after_id,
+            )
+            affected = cursor.fetchall()
+
+            for _, firstname, lastname, handicapex in affected:
+                logging.info("Athlete %s %s exceptions cleared, was set to: %s", firstname, lastname, handicapex)
+
+            if affected:
+                append_journal(_journal_file, splash_db_file, affected)
+                logging.info("Previous exceptions of %s athletes added to %s", len(affected), _journal_file)
+                scheduler = WriteScheduler.for_connection(con)
+                updated = scheduler.execute(
+                    "UPDATE ATHLETE SET HANDICAPEX = NULL WHERE {}".format(self._WHERE), self._after_id
+                )
+                if updated != len(affected):
+                    logging.warning("%s rows updated, %s expected", updated, len(affected))
+                logging.info("%.1f s waiting on database locks", scheduler.stats().lock_wait)
+        except (pyodbc.Error, LockTimeout, OSError) as ex:
+            con.rollback()
+            logging.error("Error updating database - no changes were made")
+            logging.error(ex)
+            drop_staging_table(con, self._STAGING)
+            con.close()
+            return
+
+        drop_staging_table(con, self._STAGING)
+        con.close()
+        logging.info("Updatng Exceptions Complete - %s exceptions cleared", len(affected))
+
 
 class Remove_Initial(Thread):
-    def __init__(self, config: appConfig):
+    def __init__(self, config: appConfig, after_id: int = 0):
         super().__init__()
         self._config: appConfig = config
+        self._after_id = after_id  # Only athletes with a higher ATHLETEID (watch mode)
 
+    @tracked("Remove Initials")
     def run(self):
         logging.info("Removing the trailing initial from first names...")
 
         _splash_db_file = self._config.get_str("splash_db")
         _splash_db_driver = "{Microsoft Access Driver (*.mdb, *.accdb)}"
         _update_db = self._config.get_bool("update_database")
+        _plan_file = self._config.get_str("plan_file")
 
         logging.info("Reading Splash Database...")
 
         connection_string = "DRIVER={};DBQ={};".format(_splash_db_driver, _splash_db_file)
-        try: 
-            con = pyodbc.connect(connection_string)
-        except pyodbc.Error as ex:
-            logging.error("Error connecting to database")
-            logging.error(ex)
+        con = open_database(connection_string, False)
+        if con is None:
             return
 
-        SQL = "SELECT ATHLETEID, FIRSTNAME, LASTNAME FROM ATHLETE ORDER BY LASTNAME, FIRSTNAME"
+        SQL = "SELECT ATHLETEID, FIRSTNAME, LASTNAME FROM ATHLETE WHERE ATHLETEID > ? ORDER BY LASTNAME, FIRSTNAME"
 
         cursor = con.cursor()
         try:
-            cursor.execute(SQL)
+            cursor.execute(SQL, self._after_id)
             rows = cursor.fetchall()
         except pyodbc.Error as ex:
             logging.error("Error reading database")
@@ -562,8 +796,11 @@ class Remove_Initial(Thread):
             return
 
         number_changed = 0
+        plan = ChangePlan("Remove_Initial", _splash_db_file)
+        metrics.begin_stage("Checking names", len(rows))
 
         for row in rows:
+            metrics.advance()
             athlete_id = row[0]
             firstname = row[1]
             lastname = row[2]
@@ -578,24 +815,679 @@ class Remove_Initial(Thread):
 
                 new_firstname = " ".join(y)
 
-#                SQL = "UPDATE ATHLETE SET FIRSTNAMEEN = ? WHERE ATHLETEID = ? "
-                SQL = "UPDATE ATHLETE SET FIRSTNAME = ? WHERE ATHLETEID = ? "
-
-                if _update_db:
-                    try:
-                        cursor.execute(SQL, (new_firstname, athlete_id))
-                        con.commit()
-                    except pyodbc.Error as ex:
-                        logging.error("Error updating database for %s %s", lastname, firstname)
-                        logging.error(ex)
-                        con.close()
-                        return
+                plan.add("ATHLETE", athlete_id, "FIRSTNAME", firstname, new_firstname)
 
                 logging.info("Athlete %s, %s updated to %s, %s", lastname, firstname, lastname, new_firstname)
 
-        con.close()
+        finish_plan(plan, con, _update_db, _plan_file)
         logging.info("Finished Name Updates - %s names changed", number_changed)
 
 
+class Apply_Plan(Thread):
+    # Write a saved change plan without re-reading the roster or rescanning the database
+
+    def __init__(self, config: appConfig):
+        super().__init__()
+        self._config: appConfig = config
+
+    @tracked("Apply Plan")
+    def run(self):
+        _splash_db_file = self._config.get_str("splash_db")
+        _splash_db_driver = "{Microsoft Access Driver (*.mdb, *.accdb)}"
+        _plan_file = self._config.get_str("plan_file")
+
+        try:
+            plan = ChangePlan.load(_plan_file)
+            logging.info("Applying %s plan from %s - %s changes", plan.job, plan.created, len(plan))
+            plan.verify(_splash_db_file)
+        except (PlanError, OSError) as ex:
+            logging.error("Change plan not applied: %s", ex)
+            return
+
+        connection_string = "DRIVER={};DBQ={};".format(_splash_db_driver, _splash_db_file)
+        con = open_database(connection_string, False)
+        if con is None:
+            return
+
+        apply_plan(plan, con, _plan_file)
+
+
+class Check_Entries(Thread):
+    # Check a Lenex entry file against the roster and club list before it is imported into Splash
+
+    def __init__(self, config: appConfig):
+        super().__init__()
+        self._config: appConfig = config
+
+    @tracked("Check Entries")
+    def run(self):
+        _entry_file = self._config.get_str("entry_file")
+        _csv_file = self._config.get_str("csv_file")
+        _fix_entries = self._config.get_bool("fix_entry_file")
+        _update_sdms = self._config.get_bool("update_sdms")
+        _para_levels = eligible_levels(self._config.get_str("para_level"))
+
+        logging.info("Checking entry file %s...", _entry_file)
+
+        try:
+            clubs = load_club_list(_csv_file)
+        except FileNotFoundError:
+            logging.error("CSV File not found")
+            return
+        except (ValueError, UnicodeDecodeError) as ex:
+            logging.error("Error reading CSV File: %s", ex)
+            return
+
+        roster = get_active_roster()
+        if len(roster) == 0:
+            logging.error("No Active Roster")
+            return
+
+        # Entry files hold a few hundred athletes - look them up in the saved snapshot, which decodes just
+        # those, rather than indexing the whole roster
+        snapshot = open_roster_snapshot()
+        roster_index = snapshot if snapshot is not None else index_roster(roster)
+
+        output = corrected_file_name(_entry_file) if _fix_entries else None
+        metrics.begin_stage("Checking entry file")
+        try:
+            result = check_entry_file(_entry_file, roster_index, clubs, _para_levels, output, _update_sdms)
+        except (OSError, ValueError, zipfile.BadZipFile, xml.sax.SAXException) as ex:
+            logging.error("Error reading entry file: %s", ex)
+            return
+        finally:
+            if snapshot is not None:
+                snapshot.close()
+
+        logging.info(
+            "Entry Check Complete - %s Canadian athletes (%s on the roster), %s athlete fixes, %s level warnings",
+            result.athletes,
+            result.matched,
+            result.athlete_changes,
+            result.level_warnings,
+        )
+        logging.info(
+            "  %s Canadian clubs, %s club fixes, %s not in the club list",
+            result.clubs,
+            result.club_changes,
+            result.unknown_clubs,
+        )
+        if output is not None:
+            logging.info("Corrected entry file written to %s", output)
+
+
+class Eligibility_Report(Thread):
+    # Count the para athletes in the database by club and roster level and write a per-club summary
+
+    def __init__(self, config: appConfig):
+        super().__init__()
+        self._config: appConfig = config
+
+    @tracked("Eligibility Report")
+    def run(self):
+        logging.info("Building the para eligibility report...")
+
+        _splash_db_file = self._config.get_str("splash_db")
+        _splash_db_driver = "{Microsoft Access Driver (*.mdb, *.accdb)}"
+        _para_level = self._config.get_str("para_level")
+        _para_levels = eligible_levels(_para_level)
+        _report_file = self._config.get_str("eligibility_file")
+
+        # Read only - the database file can always be read directly when that is turned on
+        connection_string = "DRIVER={};DBQ={};".format(_splash_db_driver, _splash_db_file)
+        _file_reads = self._config.get_bool("file_reads")
+        con = open_database(connection_string, _file_reads)
+        if con is None and not _file_reads:
+            return
+
+        COLUMNS = ("ATHLETEID", "FIRSTNAME", "LASTNAME", "LICENSE", "NATION", "CLUBID")
+
+        prefetched = prefetch_roster_and_athletes(con if con is not None else _splash_db_file, COLUMNS)
+        if prefetched is None:
+            if con is not None:
+                con.close()
+            return
+        roster, athletes = prefetched
+        roster_index = index_roster(roster)
+
+        try:
+            if con is None:
+                with MdbReader(_splash_db_file) as mdb:
+                    club_rows = list(mdb.read_table("CLUB", ("CLUBID", "CODE", "NAME")))
+            else:
+                cursor = con.cursor()
+                cursor.execute("SELECT CLUBID, CODE, NAME FROM CLUB")
+                club_rows = cursor.fetchall()
+        except (pyodbc.Error, MdbError, OSError) as ex:
+            logging.error("Error reading database")
+            logging.error(ex)
+            return
+        finally:
+            if con is not None:
+                con.close()
+        clubs = {row[0]: (row[1] or "", row[2] or "") for row in club_rows}
+
+        # One pass over the Canadian athletes - level counts and the athletes below the minimum, per club
+
+        counts: dict = {}
+        below: dict = {}
+        canadian = athletes.where_equal("NATION", "CAN")
+        metrics.begin_stage("Counting para athletes", len(canadian))
+        for row in athletes.rows(canadian):
+            metrics.advance()
+            athlete_id, firstname, lastname, license, nation, club_id = row
+            athlete = roster_index.get(license)
+            if athlete is None:
+                continue
+            level = str(athlete["Level"])
+            counts.setdefault(club_id, Counter())[level] += 1
+            if level not in _para_levels:
+                below.setdefault(club_id, []).append("{} {} ({})".format(firstname, lastname, level))
+
+        header = ["Club Code", "Club Name"] + ["Level " + level for level in PARA_LEVELS]
+        header += ["Other", "Eligible", "Below Minimum", "Athletes Below Minimum"]
+        summary = []
+        for club_id, levels in counts.items():
+            code, name = clubs.get(club_id, ("", ""))
+            eligible = sum(levels[level] for level in _para_levels)
+            other = sum(n for level, n in levels.items() if level not in PARA_LEVELS)
+            total = sum(levels.values())
+            summary.append(
+                [code, name]
+                + [levels[level] for level in PARA_LEVELS]
+                + [other, eligible, total - eligible, "; ".join(sorted(below.get(club_id, [])))]
+            )
+        summary.sort(key=lambda line: (line[0], line[1]))
+
+        # The whole roster by level, from the roster store, to set the clubs against
+        try:
+            with open_roster_store() as store:
+                levels = Counter(store.count_by("level"))
+        except sqlite3.Error as ex:
+            logging.warning("Unable to read the roster store: %s", ex)
+            levels = Counter()
+        if levels:
+            eligible = sum(levels[level] for level in _para_levels)
+            other = sum(n for level, n in levels.items() if level not in PARA_LEVELS)
+            summary.append(
+                ["", "Whole Roster"]
+                + [levels[level] for level in PARA_LEVELS]
+                + [other, eligible, sum(levels.values()) - eligible, ""]
+            )
+
+        try:
+            with open(_report_file, "w", newline="", encoding="utf-8") as file:
+                writer = csv.writer(file)
+                writer.writerow(header)
+                writer.writerows(summary)
+        except OSError as ex:
+            logging.error("Unable to write the eligibility report: %s", ex)
+            return
+
+        logging.info(
+            "Eligibility Report Complete - %s para athletes in %s clubs, %s below minimum level %s. Written to %s",
+            sum(sum(levels.values()) for levels in counts.values()),
+            len(counts),
+            sum(len(names) for names in below.values()),
+            _para_level,
+            _report_file,
+        )
+
+
+class Find_Duplicates(Thread):
+    # Report athletes entered more than once, grouped on license or on name and birth date
+
+    def __init__(self, config: appConfig):
+        super().__init__()
+        self._config: appConfig = config
+
+    @tracked("Find Duplicates")
+    def run(self):
+        logging.info("Looking for duplicate athletes...")
+
+        _splash_db_file = self._config.get_str("splash_db")
+        _splash_db_driver = "{Microsoft Access Driver (*.mdb, *.accdb)}"
+        _report_file = self._config.get_str("duplicates_file")
+
+        connection_string = "DRIVER={};DBQ={};".format(_splash_db_driver, _splash_db_file)
+        _file_reads = self._config.get_bool("file_reads")
+        con = open_database(connection_string, _file_reads)
+        if con is None and not _file_reads:
+            return
+
+        metrics.begin_stage("Loading athletes")
+        try:
+            if con is None:
+                athletes = AthleteSnapshot.load_mdb(_splash_db_file, DUPLICATE_COLUMNS)
+            else:
+                athletes = AthleteSnapshot.load(con, DUPLICATE_COLUMNS)
+        except (pyodbc.Error, MdbError, OSError) as ex:
+            logging.error("Error reading database")
+            logging.error(ex)
+            return
+        finally:
+            if con is not None:
+                con.close()
+
+        groups = find_duplicates(athletes)
+
+        try:
+            with open(_report_file, "w", newline="", encoding="utf-8") as file:
+                writer = csv.writer(file)
+                writer.writerow(REPORT_HEADER)
+                writer.writerows(report_rows(groups))
+        except OSError as ex:
+            logging.error("Unable to write the duplicates report: %s", ex)
+            return
+
+        for group in groups[:20]:
+            logging.warning(
+                "%s %s: ATHLETEID %s and %s",
+                group.reason,
+                group.key,
+                group.keep[0],
+                ", ".join(str(row[0]) for row in group.merge),
+            )
+        if len(groups) > 20:
+            logging.warning("... and %s more", len(groups) - 20)
+        logging.info(
+            "Find Duplicates Complete - %s athletes checked, %s duplicate groups. Written to %s",
+            len(athletes),
+            len(groups),
+            _report_file,
+        )
+
+
+class Find_Club_Duplicates(Thread):
+    # Report CLUB rows that duplicate another club, and Canadian clubs missing from the club list
+
+    def __init__(self, config: appConfig):
+        super().__init__()
+        self._config: appConfig = config
+
+    @tracked("Find Club Duplicates")
+    def run(self):
+        logging.info("Looking for duplicate clubs...")
+
+        _splash_db_file = self._config.get_str("splash_db")
+        _splash_db_driver = "{Microsoft Access Driver (*.mdb, *.accdb)}"
+        _csv_file = self._config.get_str("csv_file")
+        _report_file = self._config.get_str("club_duplicates_file")
+
+        try:
+            data = load_club_list(_csv_file)
+        except FileNotFoundError:
+            logging.error("CSV File not found")
+            return
+        except (ValueError, UnicodeDecodeError) as ex:
+            logging.error("Error reading CSV File: %s", ex)
+            return
+
+        connection_string = "DRIVER={};DBQ={};".format(_splash_db_driver, _splash_db_file)
+        _file_reads = self._config.get_bool("file_reads")
+        con = open_database(connection_string, _file_reads)
+        if con is None and not _file_reads:
+            return
+
+        try:
+            if con is None:
+                with MdbReader(_splash_db_file) as mdb:
+                    rows = list(mdb.read_table("CLUB", ("CLUBID", "CODE", "NAME", "NATION")))
+            else:
+                cursor = con.cursor()
+                cursor.execute("SELECT CLUBID, CODE, NAME, NATION FROM CLUB")
+                rows = cursor.fetchall()
+        except (pyodbc.Error, MdbError, OSError) as ex:
+            logging.error("Error reading database")
+            logging.error(ex)
+            return
+        finally:
+            if con is not None:
+                con.close()
+
+        findings = find_club_duplicates([ClubRow(*row) for row in rows if row[0] is not None], data)
+
+        try:
+            with open(_report_file, "w", newline="", encoding="utf-8") as file:
+                writer = csv.writer(file)
+                writer.writerow(CLUB_REPORT_HEADER)
+                writer.writerows(club_report_rows(findings))
+        except OSError as ex:
+            logging.error("Unable to write the club duplicates report: %s", ex)
+            return
+
+        flagged = [finding for finding in findings if finding.suggestion != "Keep"]
+        for finding in flagged[:20]:
+            logging.warning(
+                "Club %s <%s> (CLUBID %s): %s",
+                finding.club.code,
+                finding.club.name,
+                finding.club.club_id,
+                finding.suggestion,
+            )
+        if len(flagged) > 20:
+            logging.warning("... and %s more", len(flagged) - 20)
+        logging.info(
+            "Find Club Duplicates Complete - %s clubs checked, %s duplicate groups, %s not in the club list. "
+            "Written to %s",
+            len(rows),
+            max((finding.group for finding in findings), default=0),
+            sum(1 for finding in findings if finding.group == 0),
+            _report_file,
+        )
+
+
+class Cross_Meet_Check(Thread):
+    # Compare para athletes' sport classes, exceptions and SDMS ID across all the meet databases in a folder
+
+    def __init__(self, config: appConfig):
+        super().__init__()
+        self._config: appConfig = config
+
+    @tracked("Cross-Meet Check")
+    def run(self):
+        _meet_folder = self._config.get_str("meet_folder")
+        _report_file = self._config.get_str("consistency_file")
+        _workers = self._config.get_int("meet_scan_workers")
+
+        meet_files = find_meet_files(_meet_folder)
+        if len(meet_files) < 2:
+            logging.error("Need at least two meet databases in %s, found %s", _meet_folder, len(meet_files))
+            return
+        logging.info("Comparing para athletes across %s meet databases...", len(meet_files))
+
+        start = time.perf_counter()
+        scans = scan_meets(meet_files, _workers)
+        for scan in scans:
+            if scan.error is not None:
+                logging.error("Unable to read %s: %s", scan.meet, scan.error)
+        index = build_index(scans)
+        logging.info(
+            "  %s meets read in %.1f s - %s athletes",
+            sum(1 for scan in scans if scan.error is None),
+            time.perf_counter() - start,
+            len(index),
+        )
+
+        inconsistencies = find_inconsistencies(index)
+
+        try:
+            with open(_report_file, "w", newline="", encoding="utf-8") as file:
+                writer = csv.writer(file)
+                writer.writerow(MEET_REPORT_HEADER)
+                writer.writerows(meet_report_rows(inconsistencies))
+        except OSError as ex:
+            logging.error("Unable to write the consistency report: %s", ex)
+            return
+
+        for found in inconsistencies:
+            logging.warning(
+                "Athlete %s %s (%s) %s differs between meets: %s",
+                found.firstname,
+                found.lastname,
+                found.license,
+                found.field,
+                ", ".join("{} {}".format(meet, value or "(blank)") for meet, value in found.values),
+            )
+        logging.info(
+            "Cross-Meet Check Complete - %s differences for %s athletes. Written to %s",
+            len(inconsistencies),
+            len({found.license for found in inconsistencies}),
+            _report_file,
+        )
+
+
+class Roster_Changes(Thread):
+    # Report what changed on the Active Roster since a date, from the roster history
+
+    def __init__(self, config: appConfig):
+        super().__init__()
+        self._config: appConfig = config
+
+    @tracked("Roster Changes")
+    def run(self):
+        _since = self._config.get_str("roster_changes_since")
+        _report_file = self._config.get_str("roster_changes_file")
+
+        today = datetime.date.today()
+        try:
+            since = datetime.date.fromisoformat(_since) if _since else today - datetime.timedelta(days=7)
+        except ValueError:
+            logging.error("Roster changes date %s is not a date (YYYY-MM-DD)", _since)
+            return
+        logging.info("Listing Active Roster changes since %s...", since)
+
+        # Brings the history up to date
+        if len(get_active_roster(max_age=0)) == 0:
+            return
+
+        metrics.begin_stage("Comparing roster history")
+        try:
+            with open_roster_store() as store:
+                dates = store.history_dates()
+                changes = store.changes_between(since, today)
+        except sqlite3.Error as ex:
+            logging.error("Unable to read the roster history: %s", ex)
+            return
+        if dates and dates[0] > since.isoformat():
+            logging.warning("The roster history only goes back to %s", dates[0])
+
+        try:
+            with open(_report_file, "w", newline="", encoding="utf-8") as file:
+                writer = csv.writer(file)
+                writer.writerow(["SNC ID", "Given Name", "Family Name", "Field", "Was", "Now"])
+                writer.writerows(changes)
+        except OSError as ex:
+            logging.error("Unable to write the roster changes: %s", ex)
+            return
+
+        logging.info(
+            "Roster Changes Complete - %s changes for %s athletes between %s and %s. Written to %s",
+            len(changes),
+            len({change.snc_id for change in changes}),
+            since,
+            today,
+            _report_file,
+        )
+
+
+# Columns the jobs read, checked by the warm-up
+EXPECTED_COLUMNS = {
+    "ATHLETE": tuple(dict.fromkeys(DIFF_COLUMNS + DUPLICATE_COLUMNS)),
+    "CLUB": ("CLUBID", "CODE", "NAME", "NATION", "REGION"),
+}
+
+
+class Warm_Up(Thread):
+    # Get the slow first steps of a job out of the way as soon as a database is chosen: load the ODBC
+    # driver with a test connection, check the tables have the columns the jobs use, and download the roster.
+    # Nothing is kept open - an open connection would hold Access's lock file and look like Splash.
+
+    def __init__(self, config: appConfig):
+        super().__init__(daemon=True)
+        self._config: appConfig = config
+
+    def run(self):
+        _splash_db_file = self._config.get_str("splash_db")
+        _splash_db_driver = "{Microsoft Access Driver (*.mdb, *.accdb)}"
+        _file_reads = self._config.get_bool("file_reads") and not self._config.get_bool("update_database")
+
+        # The download and the database check don't wait on each other
+        roster = Thread(target=get_active_roster, name="warm-up-roster", daemon=True)
+        roster.start()
+
+        start = time.perf_counter()
+        if not os.path.exists(_splash_db_file):
+            logging.warning("Database %s not found", _splash_db_file)
+        elif self._check_columns(_splash_db_file, _splash_db_driver, _file_reads):
+            logging.info("Database checked in %.1f s", time.perf_counter() - start)
+
+        roster.join()
+
+    @staticmethod
+    def _check_columns(splash_db_file: str, splash_db_driver: str, file_reads: bool) -> bool:
+        """Log any columns the jobs need that a table lacks. False if the database couldn't be read."""
+        try:
+            if file_reads:
+                with MdbReader(splash_db_file) as mdb:
+                    found = {table: {c.name.upper() for c in mdb.table(table).columns} for table in EXPECTED_COLUMNS}
+            else:
+                connection_string = "DRIVER={};DBQ={};".format(splash_db_driver, splash_db_file)
+                con = pyodbc.connect(connection_string)
+                try:
+                    cursor = con.cursor()
+                    found = {
+                        table: {row.column_name.upper() for row in cursor.columns(table=table)}
+                        for table in EXPECTED_COLUMNS
+                    }
+                finally:
+                    con.close()
+        except (pyodbc.Error, MdbError, OSError) as ex:
+            logging.error("Unable to open database %s", splash_db_file)
+            logging.error(ex)
+            return False
+
+        for table, columns in EXPECTED_COLUMNS.items():
+            if not found[table]:
+                logging.error("Database has no %s table - is it a Splash Meet Manager database?", table)
+                continue
+            missing = [column for column in columns if column not in found[table]]
+            if missing:
+                logging.warning("%s table is missing column(s) %s", table, ", ".join(missing))
+        return True
+
+
+# Jobs that can run in watch mode, and the table whose new rows they check
+WATCH_JOBS = {
+    "Update_Clubs": (Update_Clubs, "CLUB"),
+    "Update_Para": (Update_Para, "ATHLETE"),
+    "Update_Para_Names": (Update_Para_Names, "ATHLETE"),
+    "Clear_Exceptions": (Clear_Exceptions, "ATHLETE"),
+    "Remove_Initial": (Remove_Initial, "ATHLETE"),
+}
+
+
+class Watch_Database(Thread):
+    # Re-run the selected jobs on the athletes and clubs Splash adds while the meet is being set up.
+    # The first pass checks everything, later passes only rows above the previous pass's high-water mark.
+
+    def __init__(self, config: appConfig):
+        super().__init__(daemon=True)
+        self._config: appConfig = config
+        self._watcher = DatabaseWatcher(
+            config.get_str("splash_db"), config.get_float("watch_interval"), config.get_float("watch_debounce")
+        )
+        self._plan: Optional[ChangePlan] = None  # Dry runs: the changes of every pass so far
+
+    def stop(self) -> None:
+        """Stop watching once the current pass has finished"""
+        self._watcher.stop()
+
+    def run(self):
+        _splash_db_file = self._config.get_str("splash_db")
+        _splash_db_driver = "{Microsoft Access Driver (*.mdb, *.accdb)}"
+        _update_db = self._config.get_bool("update_database")
+        _file_reads = self._config.get_bool("file_reads") and not _update_db
+
+        jobs = []
+        for name in self._config.get_str("watch_jobs").split(","):
+            name = name.strip()
+            if name in WATCH_JOBS:
+                jobs.append(name)
+            elif name:
+                logging.error("Unknown watch job %s", name)
+        if not jobs:
+            logging.error("No jobs selected to watch")
+            return
+
+        logging.info("Watching %s - %s", _splash_db_file, ", ".join(jobs))
+        connection_string = "DRIVER={};DBQ={};".format(_splash_db_driver, _splash_db_file)
+        marks = {table: 0 for table in TABLE_KEYS}
+        waited = False
+
+        while not self._watcher.stopped:
+            new_marks = self._read_marks(connection_string, _splash_db_file, _file_reads)
+            # Reading the marks opened the database and touched its .ldb - that isn't a change by Splash
+            self._watcher.rebase()
+            if new_marks is not None:
+                if new_marks != marks:
+                    self._run_pass(jobs, marks, new_marks)
+                    marks = new_marks
+                    # Look again rather than wait: the pass's own connections touched the .ldb (so it can't
+                    # be told apart from a write), and Splash may have added rows while the pass ran
+                    waited = False
+                    continue
+                if waited:
+                    logging.info("Database changed - no new athletes or clubs")
+
+            if self._watcher.wait() is None:
+                break
+            waited = True
+
+        logging.info("Stopped watching %s", _splash_db_file)
+
+    @staticmethod
+    def _read_marks(connection_string: str, splash_db_file: str, file_reads: bool) -> Optional[Dict[str, int]]:
+        con = open_database(connection_string, file_reads)
+        if con is None and not file_reads:
+            return None
+        try:
+            return high_water_marks(con if con is not None else splash_db_file, TABLE_KEYS)
+        except (pyodbc.Error, MdbError, OSError) as ex:
+            # Most likely caught Splash part way through a write - try again on the next change
+            logging.warning("Unable to read the database, will retry: %s", ex)
+            return None
+        finally:
+            if con is not None:
+                con.close()
+
+    def _run_pass(self, jobs: list, marks: Dict[str, int], new_marks: Dict[str, int]) -> None:
+        _update_db = self._config.get_bool("update_database")
+        _plan_file = self._config.get_str("plan_file")
+
+        start = time.perf_counter()
+        for name in jobs:
+            job, table = WATCH_JOBS[name]
+            if new_marks[table] <= marks[table]:
+                continue
+            if marks[table]:
+                logging.info("%s: checking %s rows with ID above %s", name, table, marks[table])
+            saved = _file_stamp(_plan_file)
+            # Rows added after the marks were read are above the old mark too, so nothing is missed
+            job(self._config, marks[table]).run()
+            if not _update_db and _file_stamp(_plan_file) != saved:
+                self._collect_plan(_plan_file)
+        if not _update_db and self._plan is not None:
+            self._save_plan(_plan_file)
+        logging.info("Watch pass complete in %.1f s", time.perf_counter() - start)
+
+    def _collect_plan(self, plan_file: str) -> None:
+        """Add the plan a job just saved to the plan of the whole watch"""
+        try:
+            plan = ChangePlan.load(plan_file)
+        except PlanError as ex:
+            logging.warning("Unable to read change plan: %s", ex)
+            return
+        self._plan = plan if self._plan is None else ChangePlan.merge("Watch", [self._plan, plan])
+
+    def _save_plan(self, plan_file: str) -> None:
+        # Each dry-run job saves its own plan to the same file - write back the lot, from every pass so far
+        try:
+            self._plan.save(plan_file)
+        except OSError as ex:
+            logging.error("Unable to save change plan: %s", ex)
+            return
+        logging.info("Watch change plan with %s changes saved to %s", len(self._plan), plan_file)
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    """(mtime, size) of path, or None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
 if __name__ == "__main__":
     print(get_active_roster())
@@ -13,9 +13,27 @@ from platformdirs import user_config_dir
 import pathlib
 
 # Appliction Specific Imports
+from app_logging import setup_logging
 from config import appConfig
+from job_metrics import metrics
 from version import APP_VERSION
-from splashutilities_core import Update_Clubs, Update_Para, Remove_Initial, Update_Para_Names, Rollback_Names, Clear_Exceptions
+from splashutilities_core import (
+    Update_Clubs,
+    Update_Para,
+    Remove_Initial,
+    Update_Para_Names,
+    Rollback_Names,
+    Clear_Exceptions,
+    Apply_Plan,
+    Check_Entries,
+    Eligibility_Report,
+    Find_Duplicates,
+    Find_Club_Duplicates,
+    Cross_Meet_Check,
+    Roster_Changes,
+    Warm_Up,
+    Watch_Database,
+)
 
 tkContainer = Any
 
@@ -54,9 +72,25 @@ class _Splash_Fixes_Tab(ctk.CTkFrame):  # pylint: disable=too-many-ancestors
         self._splash_db = StringVar(value=self._config.get_str("splash_db"))
         self._csv_file = StringVar(value=self._config.get_str("csv_file"))
         self._rollback_file = StringVar(value=self._config.get_str("rollback_file"))
+        self._plan_file = StringVar(value=self._config.get_str("plan_file"))
+        self._entry_file = StringVar(value=self._config.get_str("entry_file"))
+        self._eligibility_file = StringVar(value=self._config.get_str("eligibility_file"))
+        self._duplicates_file = StringVar(value=self._config.get_str("duplicates_file"))
+        self._club_duplicates_file = StringVar(value=self._config.get_str("club_duplicates_file"))
+        self._meet_folder = StringVar(value=self._config.get_str("meet_folder"))
+        self._consistency_file = StringVar(value=self._config.get_str("consistency_file"))
+        self._roster_changes_file = StringVar(value=self._config.get_str("roster_changes_file"))
+        self._fix_entry_file = BooleanVar(value=self._config.get_bool("fix_entry_file"))
         self._update_db = BooleanVar(value=self._config.get_bool("update_database"))
         self._para_level = StringVar(value=self._config.get_str("para_level"))
         self._update_sdms = BooleanVar(value=self._config.get_bool("update_sdms"))
+        self._watch = BooleanVar(value=False)
+        self._watch_thread = None
+        _watch_jobs = self._config.get_str("watch_jobs").split(",")
+        self._watch_jobs = {
+            name: BooleanVar(value=name in _watch_jobs)
+            for name in ("Update_Clubs", "Update_Para", "Update_Para_Names", "Clear_Exceptions", "Remove_Initial")
+        }
 
         # self is a vertical container that will contain 3 frames
         self.columnconfigure(0, weight=1)
@@ -94,6 +128,48 @@ class _Splash_Fixes_Tab(ctk.CTkFrame):  # pylint: disable=too-many-ancestors
         btn3.grid(column=0, row=5, padx=20, pady=10)
         ctk.CTkLabel(filesframe, textvariable=self._rollback_file).grid(column=1, row=5, sticky="w", padx=(0, 10))
 
+        btn4 = ctk.CTkButton(filesframe, text="Change Plan File", command=self._handle_plan_file_browse)
+        btn4.grid(column=0, row=6, padx=20, pady=10)
+        ctk.CTkLabel(filesframe, textvariable=self._plan_file).grid(column=1, row=6, sticky="w", padx=(0, 10))
+
+        btn5 = ctk.CTkButton(filesframe, text="Lenex Entry File", command=self._handle_entry_file_browse)
+        btn5.grid(column=0, row=7, padx=20, pady=10)
+        ctk.CTkLabel(filesframe, textvariable=self._entry_file).grid(column=1, row=7, sticky="w", padx=(0, 10))
+
+        btn6 = ctk.CTkButton(filesframe, text="Eligibility Report", command=self._handle_eligibility_file_browse)
+        btn6.grid(column=0, row=8, padx=20, pady=10)
+        ctk.CTkLabel(filesframe, textvariable=self._eligibility_file).grid(column=1, row=8, sticky="w", padx=(0, 10))
+
+        btn7 = ctk.CTkButton(filesframe, text="Duplicates Report", command=self._handle_duplicates_file_browse)
+        btn7.grid(column=0, row=9, padx=20, pady=10)
+        ctk.CTkLabel(filesframe, textvariable=self._duplicates_file).grid(column=1, row=9, sticky="w", padx=(0, 10))
+
+        btn8 = ctk.CTkButton(
+            filesframe, text="Club Duplicates Report", command=self._handle_club_duplicates_file_browse
+        )
+        btn8.grid(column=0, row=10, padx=20, pady=10)
+        ctk.CTkLabel(filesframe, textvariable=self._club_duplicates_file).grid(
+            column=1, row=10, sticky="w", padx=(0, 10)
+        )
+
+        btn9 = ctk.CTkButton(filesframe, text="Meet Folder", command=self._handle_meet_folder_browse)
+        btn9.grid(column=0, row=11, padx=20, pady=10)
+        ctk.CTkLabel(filesframe, textvariable=self._meet_folder).grid(column=1, row=11, sticky="w", padx=(0, 10))
+
+        btn10 = ctk.CTkButton(filesframe, text="Consistency Report", command=self._handle_consistency_file_browse)
+        btn10.grid(column=0, row=12, padx=20, pady=10)
+        ctk.CTkLabel(filesframe, textvariable=self._consistency_file).grid(
+            column=1, row=12, sticky="w", padx=(0, 10)
+        )
+
+        btn11 = ctk.CTkButton(
+            filesframe, text="Roster Changes Report", command=self._handle_roster_changes_file_browse
+        )
+        btn11.grid(column=0, row=13, padx=20, pady=10)
+        ctk.CTkLabel(filesframe, textvariable=self._roster_changes_file).grid(
+            column=1, row=13, sticky="w", padx=(0, 10)
+        )
+
         # Right options frame for status options
 
         ctk.CTkLabel(right_optionsframe, text="Program Options").grid(column=0, row=0, sticky="nw", padx=10)
@@ -117,6 +193,15 @@ class _Splash_Fixes_Tab(ctk.CTkFrame):  # pylint: disable=too-many-ancestors
             offvalue=False,
             command=self._handle_opt_update_sdms,
         ).grid(column=0, row=4, sticky="w", padx=20, pady=10)
+
+        ctk.CTkSwitch(
+            right_optionsframe,
+            text="Write Corrected Entries",
+            variable=self._fix_entry_file,
+            onvalue=True,
+            offvalue=False,
+            command=self._handle_opt_fix_entry_file,
+        ).grid(column=0, row=5, sticky="w", padx=20, pady=10)
         # Dropdown list for Para Level
 
         ctk.CTkLabel(right_optionsframe, text="Para Minimum Level", anchor="w").grid(column=0, row=6, sticky="w")
@@ -127,6 +212,36 @@ class _Splash_Fixes_Tab(ctk.CTkFrame):  # pylint: disable=too-many-ancestors
             variable=self._para_level,
         ).grid(column=0, row=7, sticky="w", padx=20, pady=10)
 
+        # Watch mode - re-run the ticked fixes on new athletes/clubs as Splash adds them
+
+        ctk.CTkLabel(right_optionsframe, text="Watch Database", anchor="w").grid(column=0, row=8, sticky="w")
+        watch_labels = {
+            "Update_Clubs": "Fix Clubs",
+            "Update_Para": "Fix Para",
+            "Update_Para_Names": "Update Para Names",
+            "Clear_Exceptions": "Clear Non-Para",
+            "Remove_Initial": "Remove Initials",
+        }
+        for i, (name, label) in enumerate(watch_labels.items()):
+            ctk.CTkCheckBox(
+                right_optionsframe,
+                text=label,
+                variable=self._watch_jobs[name],
+                onvalue=True,
+                offvalue=False,
+                command=self._handle_watch_jobs,
+            ).grid(column=0, row=9 + i, sticky="w", padx=20, pady=2)
+
+        self.watch_switch = ctk.CTkSwitch(
+            right_optionsframe,
+            text="Watch",
+            variable=self._watch,
+            onvalue=True,
+            offvalue=False,
+            command=self._handle_watch,
+        )
+        self.watch_switch.grid(column=0, row=14, sticky="w", padx=20, pady=10)
+
         # Buttons Section
         ctk.CTkLabel(buttonsframe, text="Apply Fixes").grid(column=0, row=0, sticky="w", padx=10, pady=10)
 
@@ -152,6 +267,50 @@ class _Splash_Fixes_Tab(ctk.CTkFrame):  # pylint: disable=too-many-ancestors
         self.rollback_names = ctk.CTkButton(buttonsframe, text="Rollback Names", command=self._handle_rollback_names)
         self.rollback_names.grid(column=6, row=1, sticky="news", padx=20, pady=10)
 
+        self.apply_plan_btn = ctk.CTkButton(buttonsframe, text="Apply Plan", command=self._handle_apply_plan)
+        self.apply_plan_btn.grid(column=7, row=1, sticky="news", padx=20, pady=10)
+
+        self.check_entries_btn = ctk.CTkButton(buttonsframe, text="Check Entries", command=self._handle_check_entries)
+        self.check_entries_btn.grid(column=8, row=1, sticky="news", padx=20, pady=10)
+
+        self.eligibility_btn = ctk.CTkButton(buttonsframe, text="Eligibility Report", command=self._handle_eligibility)
+        self.eligibility_btn.grid(column=9, row=1, sticky="news", padx=20, pady=10)
+
+        self.duplicates_btn = ctk.CTkButton(buttonsframe, text="Find Duplicates", command=self._handle_duplicates)
+        self.duplicates_btn.grid(column=10, row=1, sticky="news", padx=20, pady=10)
+
+        self.club_duplicates_btn = ctk.CTkButton(
+            buttonsframe, text="Find Club Duplicates", command=self._handle_club_duplicates
+        )
+        self.club_duplicates_btn.grid(column=11, row=1, sticky="news", padx=20, pady=10)
+
+        self.cross_meet_btn = ctk.CTkButton(buttonsframe, text="Cross-Meet Check", command=self._handle_cross_meet)
+        self.cross_meet_btn.grid(column=12, row=1, sticky="news", padx=20, pady=10)
+
+        self.roster_changes_btn = ctk.CTkButton(
+            buttonsframe, text="Roster Changes", command=self._handle_roster_changes
+        )
+        self.roster_changes_btn.grid(column=13, row=1, sticky="news", padx=20, pady=10)
+
+        self._warm_up = None  # The last Warm_Up started, and the database it checks
+        self._warm_up_db = ""
+
+    def warm_up(self) -> None:
+        """
+        Connect to the chosen database and download the roster in the
+        background. Logging must be set up first - mainApp starts it once the
+        logging window exists.
+        """
+        splash_db = self._config.get_str("splash_db")
+        if self._warm_up is not None and self._warm_up.is_alive() and self._warm_up_db == splash_db:
+            return
+        if self._watch_thread is not None and self._watch_thread.is_alive():
+            # The watcher reads the database already, and our connection would look like a write by Splash
+            return
+        self._warm_up = Warm_Up(self._config)
+        self._warm_up_db = splash_db
+        self._warm_up.start()
+
     def _handle_splash_db_browse(self) -> None:
         splash_db = filedialog.askopenfilename(
             filetypes=[("Splash Database", "*.mdb")],
@@ -164,6 +323,7 @@ class _Splash_Fixes_Tab(ctk.CTkFrame):  # pylint: disable=too-many-ancestors
             return
         self._config.set_str("splash_db", splash_db)
         self._splash_db.set(splash_db)
+        self.warm_up()
 
     def _handle_csv_file_browse(self) -> None:
         csv_file = filedialog.askopenfilename(
@@ -191,6 +351,107 @@ class _Splash_Fixes_Tab(ctk.CTkFrame):  # pylint: disable=too-many-ancestors
         self._config.set_str("rollback_file", rollback_file)
         self._rollback_file.set(rollback_file)
 
+    def _handle_plan_file_browse(self) -> None:
+        plan_file = filedialog.asksaveasfilename(
+            filetypes=[("Change Plan", "*.json")],
+            defaultextension=".json",
+            title="Change Plan File",
+            initialfile=os.path.basename(self._plan_file.get()),
+            initialdir=os.path.dirname(self._plan_file.get()),
+        )
+        if len(plan_file) == 0:
+            return
+        self._config.set_str("plan_file", plan_file)
+        self._plan_file.set(plan_file)
+
+    def _handle_entry_file_browse(self) -> None:
+        entry_file = filedialog.askopenfilename(
+            filetypes=[("Lenex Entry File", "*.lxf *.lef")],
+            defaultextension=".lxf",
+            title="Lenex Entry File",
+            initialfile=os.path.basename(self._entry_file.get()),
+            initialdir=os.path.dirname(self._entry_file.get()),
+        )
+        if len(entry_file) == 0:
+            return
+        self._config.set_str("entry_file", entry_file)
+        self._entry_file.set(entry_file)
+
+    def _handle_eligibility_file_browse(self) -> None:
+        eligibility_file = filedialog.asksaveasfilename(
+            filetypes=[("CSV File", "*.csv")],
+            defaultextension=".csv",
+            title="Eligibility Report File",
+            initialfile=os.path.basename(self._eligibility_file.get()),
+            initialdir=os.path.dirname(self._eligibility_file.get()),
+        )
+        if len(eligibility_file) == 0:
+            return
+        self._config.set_str("eligibility_file", eligibility_file)
+        self._eligibility_file.set(eligibility_file)
+
+    def _handle_duplicates_file_browse(self) -> None:
+        duplicates_file = filedialog.asksaveasfilename(
+            filetypes=[("CSV File", "*.csv")],
+            defaultextension=".csv",
+            title="Duplicates Report File",
+            initialfile=os.path.basename(self._duplicates_file.get()),
+            initialdir=os.path.dirname(self._duplicates_file.get()),
+        )
+        if len(duplicates_file) == 0:
+            return
+        self._config.set_str("duplicates_file", duplicates_file)
+        self._duplicates_file.set(duplicates_file)
+
+    def _handle_club_duplicates_file_browse(self) -> None:
+        club_duplicates_file = filedialog.asksaveasfilename(
+            filetypes=[("CSV File", "*.csv")],
+            defaultextension=".csv",
+            title="Club Duplicates Report File",
+            initialfile=os.path.basename(self._club_duplicates_file.get()),
+            initialdir=os.path.dirname(self._club_duplicates_file.get()),
+        )
+        if len(club_duplicates_file) == 0:
+            return
+        self._config.set_str("club_duplicates_file", club_duplicates_file)
+        self._club_duplicates_file.set(club_duplicates_file)
+
+    def _handle_meet_folder_browse(self) -> None:
+        meet_folder = filedialog.askdirectory(title="Meet Databases Folder", initialdir=self._meet_folder.get())
+        if len(meet_folder) == 0:
+            return
+        self._config.set_str("meet_folder", meet_folder)
+        self._meet_folder.set(meet_folder)
+
+    def _handle_consistency_file_browse(self) -> None:
+        consistency_file = filedialog.asksaveasfilename(
+            filetypes=[("CSV File", "*.csv")],
+            defaultextension=".csv",
+            title="Consistency Report File",
+            initialfile=os.path.basename(self._consistency_file.get()),
+            initialdir=os.path.dirname(self._consistency_file.get()),
+        )
+        if len(consistency_file) == 0:
+            return
+        self._config.set_str("consistency_file", consistency_file)
+        self._consistency_file.set(consistency_file)
+
+    def _handle_roster_changes_file_browse(self) -> None:
+        roster_changes_file = filedialog.asksaveasfilename(
+            filetypes=[("CSV File", "*.csv")],
+            defaultextension=".csv",
+            title="Roster Changes Report File",
+            initialfile=os.path.basename(self._roster_changes_file.get()),
+            initialdir=os.path.dirname(self._roster_changes_file.get()),
+        )
+        if len(roster_changes_file) == 0:
+            return
+        self._config.set_str("roster_changes_file", roster_changes_file)
+        self._roster_changes_file.set(roster_changes_file)
+
+    def _handle_opt_fix_entry_file(self) -> None:
+        self._config.set_bool("fix_entry_file", self._fix_entry_file.get())
+
     def _handle_opt_update_db(self) -> None:
         self._config.set_bool("update_database", self._update_db.get())
 
@@ -200,10 +461,50 @@ class _Splash_Fixes_Tab(ctk.CTkFrame):  # pylint: disable=too-many-ancestors
     def _handle_para_level_event(self, new_para_level: str) -> None:
         self._config.set_str("para_level", new_para_level)
 
-    def buttons(self, newstate) -> None:
-        """Enable/disable all buttons"""
-        self.qb_report_btn.configure(state=newstate)
-        self.para_btn.configure(state=newstate)
+    def _handle_watch_jobs(self) -> None:
+        jobs = [name for name, selected in self._watch_jobs.items() if selected.get()]
+        self._config.set_str("watch_jobs", ",".join(jobs))
+
+    def _handle_watch(self) -> None:
+        if self._watch.get():
+            # The switch stays live to stop watching
+            self.buttons("disabled", watch=False)
+            self._watch_thread = Watch_Database(self._config)
+            self._watch_thread.start()
+            self.monitor_watch_thread(self._watch_thread)
+        elif self._watch_thread is not None:
+            self._watch_thread.stop()
+
+    def monitor_watch_thread(self, thread):
+        if thread.is_alive():
+            # check the thread every 500ms
+            self.after(500, lambda: self.monitor_watch_thread(thread))
+        else:
+            self._watch.set(False)
+            self._watch_thread = None
+            self.buttons("enabled")
+            thread.join()
+
+    def buttons(self, newstate, watch: bool = True) -> None:
+        """Enable/disable all job buttons, and the Watch switch unless watch is False"""
+        for button in (
+            self.qb_report_btn,
+            self.para_btn,
+            self.remove_initial_btn,
+            self.clear_exceptions_btn,
+            self.update_para_names,
+            self.rollback_names,
+            self.apply_plan_btn,
+            self.check_entries_btn,
+            self.eligibility_btn,
+            self.duplicates_btn,
+            self.club_duplicates_btn,
+            self.cross_meet_btn,
+            self.roster_changes_btn,
+        ):
+            button.configure(state=newstate)
+        if watch:
+            self.watch_switch.configure(state=newstate)
 
     def _handle_reports_btn(self) -> None:
         self.buttons("disabled")
@@ -295,6 +596,55 @@ class _Splash_Fixes_Tab(ctk.CTkFrame):  # pylint: disable=too-many-ancestors
             self.buttons("enabled")
             thread.join()
 
+    def _handle_apply_plan(self) -> None:
+        self.buttons("disabled")
+
+        apply_thread = Apply_Plan(self._config)
+        apply_thread.start()
+        self.monitor_reports_thread(apply_thread)
+
+    def _handle_check_entries(self) -> None:
+        self.buttons("disabled")
+
+        check_thread = Check_Entries(self._config)
+        check_thread.start()
+        self.monitor_reports_thread(check_thread)
+
+    def _handle_eligibility(self) -> None:
+        self.buttons("disabled")
+
+        eligibility_thread = Eligibility_Report(self._config)
+        eligibility_thread.start()
+        self.monitor_reports_thread(eligibility_thread)
+
+    def _handle_duplicates(self) -> None:
+        self.buttons("disabled")
+
+        duplicates_thread = Find_Duplicates(self._config)
+        duplicates_thread.start()
+        self.monitor_reports_thread(duplicates_thread)
+
+    def _handle_club_duplicates(self) -> None:
+        self.buttons("disabled")
+
+        club_duplicates_thread = Find_Club_Duplicates(self._config)
+        club_duplicates_thread.start()
+        self.monitor_reports_thread(club_duplicates_thread)
+
+    def _handle_cross_meet(self) -> None:
+        self.buttons("disabled")
+
+        cross_meet_thread = Cross_Meet_Check(self._config)
+        cross_meet_thread.start()
+        self.monitor_reports_thread(cross_meet_thread)
+
+    def _handle_roster_changes(self) -> None:
+        self.buttons("disabled")
+
+        roster_changes_thread = Roster_Changes(self._config)
+        roster_changes_thread.start()
+        self.monitor_reports_thread(roster_changes_thread)
+
 
 class _Configuration_Tab(ctk.CTkFrame):  # pylint: disable=too-many-ancestors
     """Configuration Tab"""
@@ -368,6 +718,46 @@ class _Configuration_Tab(ctk.CTkFrame):  # pylint: disable=too-many-ancestors
         self._config.set_str("Colour", new_colour)
 
 
+class _Performance_Tab(ctk.CTkFrame):  # pylint: disable=too-many-ancestors
+    """Progress of the running job, from the counters it publishes"""
+
+    # Refresh interval in ms
+    _REFRESH = 500
+
+    def __init__(self, container: tkContainer, config: appConfig):
+        super().__init__(container)
+        self._config = config
+        self.columnconfigure(1, weight=1)
+
+        self._values = {}
+        for row, name in enumerate(
+            ("Job", "Stage", "Rows Processed", "Rows/s", "ETA", "SQL Statements", "Peak Memory", "Elapsed")
+        ):
+            ctk.CTkLabel(self, text=name, anchor="w").grid(column=0, row=row, sticky="w", padx=20, pady=2)
+            value = StringVar(value="-")
+            ctk.CTkLabel(self, textvariable=value, anchor="w").grid(column=1, row=row, sticky="w", padx=10, pady=2)
+            self._values[name] = value
+
+        self.after(self._REFRESH, self._refresh)
+
+    def _refresh(self) -> None:
+        snapshot = metrics.snapshot()
+        if snapshot.job is not None:
+            self._values["Job"].set(snapshot.job + ("" if snapshot.running else " (finished)"))
+            self._values["Stage"].set(snapshot.stage)
+            if snapshot.total is not None:
+                self._values["Rows Processed"].set("{:,} of {:,}".format(snapshot.rows, snapshot.total))
+            else:
+                self._values["Rows Processed"].set("{:,}".format(snapshot.rows))
+            self._values["Rows/s"].set("{:,.0f}".format(snapshot.rate) if snapshot.running else "-")
+            self._values["ETA"].set("{:.0f} s".format(snapshot.eta) if snapshot.eta is not None else "-")
+            self._values["SQL Statements"].set("{:,}".format(snapshot.sql))
+            self._values["Elapsed"].set("{:.1f} s".format(snapshot.elapsed))
+        if snapshot.peak_memory is not None:
+            self._values["Peak Memory"].set("{:.0f} MB".format(snapshot.peak_memory / (1024 * 1024)))
+        self.after(self._REFRESH, self._refresh)
+
+
 class _Logging(ctk.CTkFrame):  # pylint: disable=too-many-ancestors,too-many-instance-attributes
     """Logging Window"""
 
@@ -383,17 +773,20 @@ class _Logging(ctk.CTkFrame):  # pylint: disable=too-many-ancestors,too-many-ins
         self.logwin.grid(column=0, row=2, sticky="new", padx=(10, 10), pady=(0, 10))
         self.logwin.configure(height=100, wrap="word")
         # Logging configuration
-        userconfdir = user_config_dir("TimeValidate", "Swimming Canada")
+        userconfdir = user_config_dir("SplashUtilities", "Swimming Canada")
         pathlib.Path(userconfdir).mkdir(parents=True, exist_ok=True)
-        logfile = os.path.join(userconfdir, "timevalidate.log")
+        logfile = os.path.join(userconfdir, "splashutilities.log")
 
-        logging.basicConfig(filename=logfile, level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
         # Create textLogger
         text_handler = TextHandler(self.logwin)
         text_handler.setFormatter(logging.Formatter("%(levelname)s - %(message)s"))
-        # Add the handler to logger
-        logger = logging.getLogger()
-        logger.addHandler(text_handler)
+        # Records are queued by the job threads and written to the file and window by a listener thread
+        setup_logging(
+            logfile,
+            max_bytes=self._config.get_int("log_max_bytes"),
+            backups=self._config.get_int("log_backups"),
+            handlers=[text_handler],
+        )
 
 
 class mainApp(ctk.CTkFrame):  # pylint: disable=too-many-ancestors
@@ -413,6 +806,7 @@ class mainApp(ctk.CTkFrame):  # pylint: disable=too-many-ancestors
         self.tabview = ctk.CTkTabview(self, width=container.winfo_width())
         self.tabview.grid(row=0, column=0, padx=(20, 20), pady=(20, 0), sticky="nsew")
         self.tabview.add("Splash Fixes")
+        self.tabview.add("Performance")
         self.tabview.add("Configuration")
 
         # Generate Documents Tab
@@ -420,6 +814,10 @@ class mainApp(ctk.CTkFrame):  # pylint: disable=too-many-ancestors
         self.SplashFixesTab = _Splash_Fixes_Tab(self.tabview.tab("Splash Fixes"), self._config)
         self.SplashFixesTab.grid(column=0, row=0, sticky="news")
 
+        self.tabview.tab("Performance").grid_columnconfigure(0, weight=1)
+        self.performance = _Performance_Tab(self.tabview.tab("Performance"), self._config)
+        self.performance.grid(column=0, row=0, sticky="news")
+
         self.tabview.tab("Configuration").grid_columnconfigure(0, weight=1)
         self.configinfo = _Configuration_Tab(self.tabview.tab("Configuration"), self._config)
         self.configinfo.grid(column=0, row=0, sticky="news")
@@ -428,6 +826,10 @@ class mainApp(ctk.CTkFrame):  # pylint: disable=too-many-ancestors
         loggingwin = _Logging(self, self._config)
         loggingwin.grid(column=0, row=2, padx=(20, 20), pady=(20, 0), sticky="new")
 
+        # Connect to the saved database and download the roster while the window comes up - now that the
+        # logging is set up, so what it finds reaches the log file and the window
+        self.SplashFixesTab.warm_up()
+
         # Info panel
         fr8 = ctk.CTkFrame(self)
         fr8.grid(column=0, row=4, sticky="news", pady=(10, 0))
@@ -0,0 +1,46 @@
+"""
+Scratch tables in the Splash database for set-based updates.
+
+Access has no temporary tables, so the data to join against is loaded into
+an ordinary table (prefixed SU_) with one executemany, used by a few joined
+statements and dropped again.
+"""
+
+from typing import Iterable, Sequence, Tuple
+
+import pyodbc  # type: ignore
+
+# Prefix of every table this program creates, so they can't clash with Splash's own
+STAGING_PREFIX = "SU_"
+
+
+def drop_staging_table(con, name: str) -> None:
+    """Drop a staging table if it exists (Access has no DROP TABLE IF EXISTS)"""
+    cursor = con.cursor()
+    try:
+        cursor.execute("DROP TABLE {}".format(name))
+        con.commit()
+    except pyodbc.Error:
+        con.rollback()
+    cursor.close()
+
+
+def create_staging_table(con, name: str, columns: Sequence[Tuple[str, str]], rows: Iterable[Sequence]) -> int:
+    """
+    (Re)create staging table name with columns [(name, Access type)], keyed on
+    the first column, and load rows into it. Returns the number of rows.
+    """
+    if not name.startswith(STAGING_PREFIX):
+        raise ValueError("Staging table names must start with " + STAGING_PREFIX)
+    drop_staging_table(con, name)
+
+    rows = list(rows)
+    definition = ", ".join("{} {}".format(column, sql_type) for column, sql_type in columns)
+    cursor = con.cursor()
+    cursor.execute("CREATE TABLE {} ({}, PRIMARY KEY ({}))".format(name, definition, columns[0][0]))
+    if rows:
+        insert = "INSERT INTO {} VALUES ({})".format(name, ", ".join("?" * len(columns)))
+        cursor.executemany(insert, rows)
+    con.commit()
+    cursor.close()
+    return len(rows)
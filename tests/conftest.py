@@ -0,0 +1,90 @@
+"""Shared fixtures - the modules live at the top of the repository, next to this folder"""
+
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, NamedTuple
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+class StubResponse(NamedTuple):
+    status: int = 200
+    body: bytes = b""
+    headers: dict = {}
+    delay: float = 0.0  # Seconds to wait before answering
+
+
+class StubRequest(NamedTuple):
+    path: str
+    headers: dict
+
+
+class StubServer:
+    """
+    An HTTP server on localhost that answers GETs from a script of responses.
+    The last response is repeated once the script runs out.
+    """
+
+    def __init__(self):
+        self.responses: List[StubResponse] = []
+        self.requests: List[StubRequest] = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):  # noqa: N802
+                stub.requests.append(StubRequest(self.path, dict(self.headers)))
+                response = stub.responses.pop(0) if len(stub.responses) > 1 else stub.responses[0]
+                if response.delay:
+                    time.sleep(response.delay)
+                try:
+                    self.send_response(response.status)
+                    for name, value in response.headers.items():
+                        self.send_header(name, value)
+                    self.send_header("Content-Length", str(len(response.body)))
+                    self.end_headers()
+                    self.wfile.write(response.body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client timed out and hung up - which is what a delayed response is for
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self) -> str:
+        return "http://127.0.0.1:{}/roster".format(self._server.server_address[1])
+
+    def reply(self, *responses: StubResponse) -> None:
+        self.responses = list(responses)
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def http_session(monkeypatch):
+    """A fresh pooled session without the backoff sleeps, closed afterwards"""
+    import http_client  # pylint: disable=import-outside-toplevel
+
+    monkeypatch.setattr(http_client, "BACKOFF_FACTOR", 0)
+    http_client.close_session()
+    yield http_client
+    http_client.close_session()
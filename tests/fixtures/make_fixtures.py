@@ -0,0 +1,335 @@
+"""
+Write the small Jet 4 databases the tests read.
+
+    python tests/fixtures/make_fixtures.py
+
+The .mdb files are checked in; run this again only after changing it. It writes
+just enough of the format for MdbReader - the header page, table definitions,
+data pages and long value (LVAL) pages, with no indexes or usage maps - so the
+files are not something Access itself would open for writing.
+"""
+
+import datetime
+import os
+import struct
+import uuid
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+PAGE_SIZE = 4096
+FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+# Column types
+BOOL = 0x01
+BYTE = 0x02
+INT = 0x03
+LONGINT = 0x04
+MONEY = 0x05
+DOUBLE = 0x07
+DATETIME = 0x08
+TEXT = 0x0A
+MEMO = 0x0C
+GUID = 0x0F
+NUMERIC = 0x10
+
+_FIXED_SIZES = {BOOL: 0, BYTE: 1, INT: 2, LONGINT: 4, MONEY: 8, DOUBLE: 8, DATETIME: 8, GUID: 16, NUMERIC: 17}
+_VARIABLE = (TEXT, MEMO)
+
+DELETED = 0x8000
+LOOKUP = 0x4000
+LVAL_OWNER = struct.unpack("<I", b"LVAL")[0]
+EPOCH = datetime.datetime(1899, 12, 30)
+
+
+class Column(NamedTuple):
+    name: str
+    type: int
+    scale: int = 0
+
+
+class Table(NamedTuple):
+    name: str
+    columns: Sequence[Column]
+    rows: Sequence[Sequence]
+    deleted: Sequence[int] = ()  # Rows written but flagged deleted
+    old_rows: Sequence[int] = ()  # Rows written before the last column was added
+    overflow: Sequence[int] = ()  # Rows moved to another page, leaving a lookup pointer
+
+
+def text(value: str) -> bytes:
+    """Jet 4 compressed text when every character fits a byte, UTF-16LE otherwise"""
+    if all(0 < ord(c) < 256 for c in value):
+        return b"\xff\xfe" + value.encode("latin-1")
+    return value.encode("utf-16-le")
+
+
+class Writer:
+    def __init__(self):
+        header = bytearray(PAGE_SIZE)
+        header[0:4] = b"\x00\x01\x00\x00"
+        header[4:19] = b"Standard Jet DB"
+        header[0x14] = 1  # Jet 4
+        self.pages: List[bytearray] = [header, bytearray(PAGE_SIZE)]
+        self._lval: Optional[int] = None
+
+    def reserve(self) -> int:
+        self.pages.append(bytearray(PAGE_SIZE))
+        return len(self.pages) - 1
+
+    def data_page(self, owner: int) -> int:
+        page = self.reserve()
+        self.pages[page][0:2] = b"\x01\x01"
+        struct.pack_into("<HI", self.pages[page], 2, PAGE_SIZE - 14, owner)
+        return page
+
+    def add_row(self, page: int, data: bytes, flags: int = 0) -> int:
+        """Put data on a data page, returning its row number (rows fill the page from the end)"""
+        buffer = self.pages[page]
+        (count,) = struct.unpack_from("<H", buffer, 12)
+        end = PAGE_SIZE if count == 0 else struct.unpack_from("<H", buffer, 14 + 2 * (count - 1))[0] & 0x1FFF
+        start = end - len(data)
+        if start < 14 + 2 * (count + 1):
+            raise ValueError("Page {} is full".format(page))
+        buffer[start:end] = data
+        struct.pack_into("<H", buffer, 14 + 2 * count, start | flags)
+        struct.pack_into("<H", buffer, 12, count + 1)
+        return count
+
+    def long_value(self, data: bytes, chunk: Optional[int] = None) -> bytes:
+        """The 12 byte memo field for data - inline when short, else on LVAL pages (chained in chunks if given)"""
+        if len(data) <= 64 and chunk is None:
+            return struct.pack("<III", len(data) | 0x80000000, 0, 0) + data
+        if chunk is None:
+            page = self._lval_page(len(data))
+            return struct.pack("<III", len(data) | 0x40000000, page << 8 | self.add_row(page, data), 0)
+        # Chained - written last piece first so each row can point at the next
+        pointer = 0
+        pieces = [data[i : i + chunk] for i in range(0, len(data), chunk)]
+        for piece in reversed(pieces):
+            page = self._lval_page(len(piece) + 4)
+            pointer = page << 8 | self.add_row(page, struct.pack("<I", pointer) + piece)
+        return struct.pack("<III", len(data), pointer, 0)
+
+    def _lval_page(self, size: int) -> int:
+        if self._lval is None or self._free(self._lval) < size + 2:
+            self._lval = self.data_page(LVAL_OWNER)
+        return self._lval
+
+    def _free(self, page: int) -> int:
+        buffer = self.pages[page]
+        (count,) = struct.unpack_from("<H", buffer, 12)
+        end = PAGE_SIZE if count == 0 else struct.unpack_from("<H", buffer, 14 + 2 * (count - 1))[0] & 0x1FFF
+        return end - (14 + 2 * count)
+
+    def tdef(self, page: int, columns: Sequence[Column]) -> None:
+        buffer = self.pages[page]
+        buffer[0:2] = b"\x02\x01"
+        variable = sum(1 for c in columns if c.type in _VARIABLE)
+        struct.pack_into("<HHII", buffer, 43, variable, len(columns), 0, 0)
+        pos = 63
+        fixed_offset = var_index = 0
+        for number, column in enumerate(columns):
+            buffer[pos] = column.type
+            if column.type in _VARIABLE:
+                struct.pack_into("<HHH", buffer, pos + 5, number, var_index, number)
+                buffer[pos + 15] = 0x02
+                struct.pack_into("<HH", buffer, pos + 21, 0, 255 if column.type == TEXT else 0)
+                var_index += 1
+            else:
+                size = _FIXED_SIZES[column.type]
+                struct.pack_into("<HHH", buffer, pos + 5, number, 0, number)
+                buffer[pos + 15] = 0x03
+                struct.pack_into("<HH", buffer, pos + 21, fixed_offset, size)
+                fixed_offset += size
+            buffer[pos + 11] = 18 if column.type == NUMERIC else 0
+            buffer[pos + 12] = column.scale
+            pos += 25
+        for column in columns:
+            name = column.name.encode("utf-16-le")
+            struct.pack_into("<H", buffer, pos, len(name))
+            buffer[pos + 2 : pos + 2 + len(name)] = name
+            pos += 2 + len(name)
+
+    def encode(self, column: Column, value) -> bytes:
+        kind = column.type
+        if kind == BYTE:
+            return struct.pack("<B", value)
+        if kind == INT:
+            return struct.pack("<h", value)
+        if kind == LONGINT:
+            return struct.pack("<i", value)
+        if kind == MONEY:
+            return struct.pack("<q", int(value.scaleb(4)))
+        if kind == DOUBLE:
+            return struct.pack("<d", value)
+        if kind == DATETIME:
+            return struct.pack("<d", (value - EPOCH) / datetime.timedelta(days=1))
+        if kind == GUID:
+            return uuid.UUID(value).bytes_le
+        if kind == NUMERIC:
+            digits = int(abs(value).scaleb(column.scale))
+            words = [(digits >> shift) & 0xFFFFFFFF for shift in (96, 64, 32, 0)]
+            return struct.pack("<BIIII", 0x80 if value < 0 else 0, *words)
+        if kind == TEXT:
+            return text(value)
+        if kind == MEMO:
+            data, chunk = value if isinstance(value, tuple) else (value, None)
+            return self.long_value(data.encode("utf-16-le"), chunk)
+        raise ValueError("No encoding for column type {}".format(kind))
+
+    def row(self, columns: Sequence[Column], values: Sequence) -> bytes:
+        """A Jet 4 row: column count, fixed data, variable data, offsets (backwards), variable count, null mask"""
+        fixed = bytearray()
+        variable: List[bytes] = []
+        mask = bytearray((len(columns) + 7) // 8)
+        for number, (column, value) in enumerate(zip(columns, values)):
+            present = bool(value) if column.type == BOOL else value is not None
+            if present:
+                mask[number // 8] |= 1 << (number % 8)
+            if column.type in _VARIABLE:
+                variable.append(b"" if value is None else self.encode(column, value))
+            elif column.type != BOOL:
+                fixed += self.encode(column, value) if value is not None else bytes(_FIXED_SIZES[column.type])
+        body = bytearray(struct.pack("<H", len(columns))) + fixed
+        offsets = []
+        for data in variable:
+            offsets.append(len(body))
+            body += data
+        offsets.append(len(body))
+        tail = b"".join(struct.pack("<H", offset) for offset in reversed(offsets))
+        return bytes(body) + tail + struct.pack("<H", len(variable)) + bytes(mask)
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as file:
+            for page in self.pages:
+                file.write(page)
+
+
+CATALOG = [Column("Id", LONGINT), Column("Name", TEXT), Column("Type", INT), Column("Flags", LONGINT)]
+
+
+def build(path: str, tables: Sequence[Table]) -> None:
+    writer = Writer()
+    catalog_page = writer.reserve()
+    assert catalog_page == 2
+    tdef_pages: Dict[str, int] = {}
+    for table in tables:
+        tdef_pages[table.name] = writer.reserve()
+
+    catalog_rows = [
+        # Flags is a signed long - these are 0x80000000 and 0x80000002, the system object bits
+        (catalog_page, "MSysObjects", 1, -0x80000000),
+        (catalog_page, "MSysACEs", 1, -0x7FFFFFFE),
+    ] + [(page | 0x01000000, name, 1, 0) for name, page in tdef_pages.items()]
+    writer.tdef(catalog_page, CATALOG)
+    page = writer.data_page(catalog_page)
+    for values in catalog_rows:
+        writer.add_row(page, writer.row(CATALOG, values))
+
+    for table in tables:
+        tdef = tdef_pages[table.name]
+        writer.tdef(tdef, table.columns)
+        page = writer.data_page(tdef)
+        for index, values in enumerate(table.rows):
+            columns = table.columns[:-1] if index in table.old_rows else table.columns
+            data = writer.row(columns, values[: len(columns)])
+            if index in table.overflow:
+                # The row itself goes on a page of its own (flagged so a scan skips it), found by a pointer
+                target = writer.data_page(tdef)
+                pointer = target << 8 | writer.add_row(target, data, DELETED)
+                writer.add_row(page, struct.pack("<I", pointer), LOOKUP)
+            else:
+                writer.add_row(page, data, DELETED if index in table.deleted else 0)
+            if index == len(table.rows) // 2:
+                # Spread the table over more than one page
+                page = writer.data_page(tdef)
+    writer.save(path)
+
+
+ATHLETE_COLUMNS = [
+    Column("ATHLETEID", LONGINT),
+    Column("FIRSTNAME", TEXT),
+    Column("LASTNAME", TEXT),
+    Column("BIRTHDATE", DATETIME),
+    Column("GENDER", INT),
+    Column("LICENSE", TEXT),
+    Column("NATION", TEXT),
+    Column("CLUBID", LONGINT),
+    Column("HANDICAPEX", TEXT),
+    Column("HANDICAPS", TEXT),
+    Column("HANDICAPSB", TEXT),
+    Column("HANDICAPSM", TEXT),
+    Column("SDMSID", LONGINT),
+]
+
+CLUB_COLUMNS = [
+    Column("CLUBID", LONGINT),
+    Column("CODE", TEXT),
+    Column("NAME", TEXT),
+    Column("NATION", TEXT),
+    Column("REGION", TEXT),
+]
+
+TYPES_COLUMNS = [
+    Column("ID", LONGINT),
+    Column("FLAG", BOOL),
+    Column("SMALL", BYTE),
+    Column("AMOUNT", MONEY),
+    Column("RATIO", DOUBLE),
+    Column("KEY", GUID),
+    Column("PRECISE", NUMERIC, scale=2),
+    Column("NOTE", MEMO),
+]
+
+
+def born(year: int, month: int, day: int) -> datetime.datetime:
+    return datetime.datetime(year, month, day)
+
+
+ATHLETES = [
+    (1, "Jane", "Doe", born(2005, 3, 14), 2, "100001", "CAN", 1, None, "9", "8", "9", 12345),
+    (2, "Zoë", "Lévesque", born(2006, 7, 1), 2, "100002", "CAN", 2, "4", "5", "5", "4", None),
+    (3, "Deleted", "Row", born(2000, 1, 1), 1, "100003", "CAN", 1, None, None, None, None, None),
+    (4, "中文", "Name", born(2007, 12, 31), 1, "100004", "CAN", 1, None, None, None, None, None),
+    (5, "Moved", "Row", born(2004, 5, 5), 1, "100005", "CAN", 2, None, "14", "14", "14", 54321),
+    (6, "Old", "Format", born(1999, 9, 9), 1, "100006", "CAN", 2, None, None, None, None, 99999),
+    (7, "Visiting", "Swimmer", born(2003, 2, 2), 2, None, "USA", 3, None, "7", "7", "7", None),
+    (8, "Jane", "Doe", born(2005, 3, 14), 2, None, "CAN", 1, None, None, None, None, None),
+]
+
+CLUBS = [
+    (1, "ABC", "Aquatic Club", "CAN", "ON"),
+    (2, "QCN", "Club de Natation Élite", "CAN", None),
+    (3, "USA1", "American Swim Team", "USA", None),
+]
+
+TYPES = [
+    (
+        1,
+        True,
+        255,
+        Decimal("12.3400"),
+        0.5,
+        "6f1c1d3e-2b7a-4c1e-9d2f-0a1b2c3d4e5f",
+        Decimal("-1234.56"),
+        "Short note",
+    ),
+    (2, False, 0, Decimal("-0.0100"), -2.25, None, Decimal("0.00"), "Long note " * 30),
+    (3, False, None, None, None, None, None, ("Chained note " * 40, 200)),
+    (4, False, None, None, None, None, None, None),
+]
+
+
+def main() -> None:
+    build(
+        os.path.join(FOLDER, "meet.mdb"),
+        [
+            Table("ATHLETE", ATHLETE_COLUMNS, ATHLETES, deleted=(2,), old_rows=(5,), overflow=(4,)),
+            Table("CLUB", CLUB_COLUMNS, CLUBS),
+            Table("SU_TYPES", TYPES_COLUMNS, TYPES),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
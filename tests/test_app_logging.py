@@ -0,0 +1,57 @@
+import logging
+import os
+
+import pytest
+
+from app_logging import BufferedRotatingFileHandler, _DeferredQueueHandler, setup_logging, stop_logging
+
+
+@pytest.fixture
+def logfile(tmp_path):
+    yield str(tmp_path / "test.log")
+    stop_logging()
+    logging.getLogger().handlers.clear()
+
+
+def test_rotates_by_bytes(logfile):
+    setup_logging(logfile, max_bytes=400, backups=2)
+    for i in range(30):
+        logging.info("Zoë Lévesque 中文 %s", i)
+    stop_logging()
+    files = [logfile, logfile + ".1", logfile + ".2"]
+    assert all(os.path.getsize(name) < 400 for name in files)
+    with open(logfile, "r", encoding="utf-8") as file:
+        assert file.read().endswith("Zoë Lévesque 中文 29\n")
+
+
+def test_traceback_formatted_by_listener(logfile):
+    setup_logging(logfile)
+    try:
+        raise ZeroDivisionError("boom")
+    except ZeroDivisionError:
+        logging.exception("Failed %s", "job")
+    stop_logging()
+    with open(logfile, "r", encoding="utf-8") as file:
+        text = file.read()
+    assert " - ERROR - Failed job\nTraceback" in text
+    assert text.endswith("ZeroDivisionError: boom\n")
+
+
+def test_record_not_formatted_on_the_calling_thread():
+    handler = _DeferredQueueHandler(None)
+    handler.setFormatter(logging.Formatter("never used %(message)s"))
+    args = ["Jane"]
+    record = logging.LogRecord("root", logging.INFO, __file__, 1, "Athlete %s", (args,), None)
+    prepared = handler.prepare(record)
+    args.append("changed later")
+    assert (prepared.msg, prepared.args) == ("Athlete ['Jane']", None)
+    assert not hasattr(prepared, "message")
+    assert record.args == (args,)
+
+
+def test_size_counts_encoded_bytes(tmp_path):
+    handler = BufferedRotatingFileHandler(str(tmp_path / "size.log"), encoding="utf-8")
+    assert handler._encoded_size("abc") == 3
+    assert handler._encoded_size("é中") == 5
+    assert handler._encoded_size("a\n") == 2 + len(os.linesep) - 1
+    handler.close()
@@ -0,0 +1,113 @@
+import json
+import time
+
+import pytest
+
+import app_version
+from conftest import StubResponse
+
+RELEASES = [
+    {
+        "tag_name": tag,
+        "html_url": "https://github.com/dmanusrex/TimeValidate/releases/" + tag,
+        "draft": False,
+        "prerelease": prerelease,
+        "published_at": "2026-01-01T00:00:00+00:00",
+    }
+    for tag, prerelease in (("v1.0.0", False), ("v1.2.0", False), ("v2.0.0-pre1", True))
+]
+
+
+def full(etag='"v1"'):
+    return StubResponse(200, json.dumps(RELEASES).encode("utf-8"), {"ETag": etag})
+
+
+@pytest.fixture
+def github(stub_server, http_session, monkeypatch):
+    monkeypatch.setattr(app_version, "RELEASES_URL", stub_server.url + "/{}")
+    return stub_server
+
+
+@pytest.fixture
+def cache_file(tmp_path):
+    return str(tmp_path / "latest_release.json")
+
+
+def cached(cache_file) -> dict:
+    with open(cache_file, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def age(cache_file, seconds: float) -> None:
+    body = cached(cache_file)
+    body["checked"] = time.time() - seconds
+    with open(cache_file, "w", encoding="utf-8") as file:
+        json.dump(body, file)
+
+
+def test_first_check_saves_the_release(github, cache_file):
+    github.reply(full())
+    release = app_version.latest(cache_file)
+    assert release.semver == "1.2.0"
+    assert "If-None-Match" not in github.requests[0].headers
+    assert github.requests[0].path.endswith("/dmanusrex/TimeValidate")
+    body = cached(cache_file)
+    assert (body["etag"], body["release"]["tag_name"]) == ('"v1"', "v1.2.0")
+
+
+def test_fresh_check_is_reused(github, cache_file):
+    github.reply(full())
+    app_version.latest(cache_file)
+    github.requests.clear()
+    assert app_version.latest(cache_file).semver == "1.2.0"
+    assert github.requests == []
+
+
+def test_expired_check_not_modified(github, cache_file):
+    github.reply(full())
+    app_version.latest(cache_file)
+    age(cache_file, app_version.CHECK_INTERVAL + 60)
+    github.requests.clear()
+    github.reply(StubResponse(304))
+    assert app_version.latest(cache_file).semver == "1.2.0"
+    assert github.requests[0].headers["If-None-Match"] == '"v1"'
+    # Renewed, so the next call doesn't ask again
+    assert time.time() - cached(cache_file)["checked"] < 60
+    github.requests.clear()
+    app_version.latest(cache_file)
+    assert github.requests == []
+
+
+def test_expired_check_new_release(github, cache_file):
+    github.reply(full())
+    app_version.latest(cache_file)
+    age(cache_file, app_version.CHECK_INTERVAL + 60)
+    newer = dict(RELEASES[0], tag_name="v1.3.0")
+    github.reply(StubResponse(200, json.dumps(RELEASES + [newer]).encode("utf-8"), {"ETag": '"v2"'}))
+    assert app_version.latest(cache_file).semver == "1.3.0"
+    assert cached(cache_file)["etag"] == '"v2"'
+
+
+@pytest.mark.parametrize(
+    "contents",
+    [
+        b"{not json",
+        b"[]",
+        b'{"repo": "dmanusrex/TimeValidate", "release": {}}',
+        b'{"repo": "dmanusrex/TimeValidate", "checked": "yesterday", "etag": "x"}',
+    ],
+)
+def test_corrupt_cache_is_ignored(github, cache_file, contents):
+    with open(cache_file, "wb") as file:
+        file.write(contents)
+    github.reply(full())
+    assert app_version.latest(cache_file).semver == "1.2.0"
+    assert "If-None-Match" not in github.requests[0].headers
+    assert cached(cache_file)["release"]["tag_name"] == "v1.2.0"
+
+
+def test_error_is_not_cached(github, cache_file):
+    github.reply(StubResponse(404))
+    assert app_version.latest(cache_file) is None
+    with pytest.raises(FileNotFoundError):
+        cached(cache_file)
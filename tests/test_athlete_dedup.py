@@ -0,0 +1,68 @@
+import datetime
+
+from athlete_dedup import (
+    DUPLICATE_COLUMNS,
+    REPORT_HEADER,
+    SAME_LICENSE,
+    SAME_NAME,
+    DuplicateGroup,
+    find_duplicates,
+    normalize_name,
+    report_rows,
+)
+from athlete_snapshot import AthleteSnapshot
+
+BORN = datetime.datetime(2005, 3, 14)
+
+# ATHLETEID, FIRSTNAME, LASTNAME, BIRTHDATE, GENDER, LICENSE, CLUBID
+ROWS = [
+    (1, "Jane", "Doe", BORN, 2, "100001", None),
+    (2, "Jane", "Doe", BORN, 2, " 100001 ", 1),  # Same license, with more filled in
+    (3, "JANE", "doe", BORN, 2, None, 1),  # Same name without a license
+    (4, "Zoë", "D'Arcy-Lévesque", datetime.datetime(2006, 7, 1), 1, None, 2),
+    (5, "Zoe", "darcy levesque", datetime.datetime(2006, 7, 1), 1, "100005", None),
+    (6, "Zoe", "darcy levesque", datetime.datetime(2007, 7, 1), 1, None, None),  # Another birth date
+    (7, "Sam", "Lee", BORN, 1, "100007", 3),
+    (8, "Sam", "Lee", BORN, 1, "100007", 3),  # Both in the same license group
+    (9, "No", "Birthdate", None, 1, None, 3),
+    (10, "No", "Birthdate", None, 1, None, 3),
+]
+
+
+def snapshot(rows) -> AthleteSnapshot:
+    athletes = AthleteSnapshot(DUPLICATE_COLUMNS)
+    athletes.extend(rows)
+    return athletes
+
+
+def test_normalize_name():
+    assert normalize_name("D'Arcy-Lée") == normalize_name("darcy lee") == "darcylee"
+    assert normalize_name(None) == ""
+
+
+def test_find_duplicates():
+    assert find_duplicates(snapshot(ROWS)) == [
+        # The row with a license and the most fields filled in is kept
+        DuplicateGroup(SAME_LICENSE, "100001", ROWS[1], [ROWS[0]]),
+        # Lowest ATHLETEID when nothing else decides
+        DuplicateGroup(SAME_LICENSE, "100007", ROWS[6], [ROWS[7]]),
+        # Adds athlete 3 to the license group, so it is reported
+        DuplicateGroup(SAME_NAME, "Jane Doe 2005-03-14", ROWS[1], [ROWS[0], ROWS[2]]),
+        DuplicateGroup(SAME_NAME, "Zoë D'Arcy-Lévesque 2006-07-01", ROWS[4], [ROWS[3]]),
+    ]
+
+
+def test_no_duplicates():
+    assert find_duplicates(snapshot(ROWS[3:4] + ROWS[5:7])) == []
+    assert find_duplicates(snapshot([])) == []
+
+
+def test_report_rows():
+    group = DuplicateGroup(SAME_LICENSE, "100001", ROWS[1], [ROWS[0]])
+    lines = report_rows([group])
+    assert all(len(line) == len(REPORT_HEADER) for line in lines)
+    suggestion = "Keep ATHLETEID 2 and merge ATHLETEID 1 into it"
+    assert lines == [
+        [1, SAME_LICENSE, 2, "Jane", "Doe", "2005-03-14", 2, " 100001 ", 1, "Keep", suggestion],
+        [1, SAME_LICENSE, 1, "Jane", "Doe", "2005-03-14", 2, "100001", None, "Merge", suggestion],
+    ]
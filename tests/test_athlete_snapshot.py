@@ -0,0 +1,101 @@
+import sqlite3
+
+import pytest
+
+import athlete_snapshot
+from athlete_snapshot import AthleteSnapshot, CategoryColumn, IntColumn, StringColumn, index_roster
+
+COLUMNS = ("ATHLETEID", "LASTNAME", "NATION", "HANDICAPS", "CLUBID")
+ROWS = [
+    (1, "Doe", "CAN", "9", 1),
+    (2, "Lévesque", "CAN", None, None),
+    (4, "中文", "USA", "9", 3),
+    (5, "Doe", "CAN", "14", 1),
+    (7, None, None, "9", 2),
+]
+
+
+@pytest.fixture
+def snapshot():
+    athletes = AthleteSnapshot(COLUMNS)
+    athletes.extend(ROWS)
+    return athletes
+
+
+def test_column_types(snapshot):
+    assert isinstance(snapshot.column("ATHLETEID"), IntColumn)
+    assert isinstance(snapshot.column("LASTNAME"), StringColumn)
+    assert isinstance(snapshot.column("NATION"), CategoryColumn)
+    assert snapshot.column("NATION").categories == ["CAN", "USA", None]
+    assert snapshot.column("CLUBID")[1] is None
+    assert len(snapshot) == 5
+    assert len(AthleteSnapshot(())) == 0
+
+
+def test_rows(snapshot):
+    assert list(snapshot.rows()) == ROWS
+    assert list(snapshot.rows([4, 0])) == [ROWS[4], ROWS[0]]
+    assert snapshot.row(2) == ROWS[2]
+
+
+def test_take(snapshot):
+    subset = snapshot.take([4, 1, 1])
+    assert list(subset.rows()) == [ROWS[4], ROWS[1], ROWS[1]]
+    # The nulls move with their rows
+    assert subset.column("CLUBID").nulls == {1: True, 2: True}
+    assert subset.column("HANDICAPS").categories is snapshot.column("HANDICAPS").categories
+    for indexes in ([], [3]):
+        assert list(snapshot.take(indexes).rows()) == [ROWS[i] for i in indexes]
+
+
+def test_where_equal(snapshot):
+    assert snapshot.where_equal("NATION", "CAN") == [0, 1, 3]
+    assert snapshot.where_equal("NATION", None) == [4]
+    assert snapshot.where_equal("NATION", "GBR") == []
+    assert snapshot.where_equal("LASTNAME", "Doe") == [0, 3]
+    assert snapshot.where_equal("CLUBID", 1) == [0, 3]
+    assert snapshot.where_equal("CLUBID", None) == [1]
+
+
+def test_encode_shares_categories(snapshot):
+    column = snapshot.column("HANDICAPS")
+    codes = column.encode(["14", "9", "NE"])
+    assert codes.typecode == "H"
+    assert [column.categories[code] for code in codes] == ["14", "9", "NE"]
+    assert list(codes) == [column.code_of("14"), column.code_of("9"), column.code_of("NE")]
+
+
+def test_codes_widen_past_65535():
+    column = CategoryColumn()
+    column.append("first")
+    subset = column.take([0])
+    values = [str(i) for i in range(0x10001)]
+    codes = column.encode(values)
+    assert codes.typecode == "L"
+    assert codes[-1] == 0x10001
+    assert column.encode([]).typecode == "H"
+    # Added through the shared categories - the subset widens when it first uses one
+    subset.append(values[-1])
+    assert subset.codes.typecode == "L"
+    assert [subset[0], subset[1]] == ["first", values[-1]]
+    for value in values:
+        column.append(value)
+    assert column[len(column) - 1] == values[-1]
+
+
+def test_load(monkeypatch):
+    monkeypatch.setattr(athlete_snapshot, "FETCH_SIZE", 2)
+    con = sqlite3.connect(":memory:")
+    try:
+        con.execute("CREATE TABLE ATHLETE (ATHLETEID, LASTNAME, NATION, HANDICAPS, CLUBID)")
+        con.executemany("INSERT INTO ATHLETE VALUES (?, ?, ?, ?, ?)", ROWS)
+        assert list(AthleteSnapshot.load(con, COLUMNS).rows()) == ROWS
+        snapshot = AthleteSnapshot.load(con, ("ATHLETEID",), "WHERE ATHLETEID > ?", (2,))
+        assert list(snapshot.rows()) == [(4,), (5,), (7,)]
+    finally:
+        con.close()
+
+
+def test_index_roster_drops_duplicate_ids():
+    roster = [{"SNC_ID": 100}, {"SNC_ID": "200"}, {"SNC_ID": 300, "Given": "First"}, {"SNC_ID": "300"}]
+    assert index_roster(roster) == {"100": roster[0], "200": roster[1]}
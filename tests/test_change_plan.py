@@ -0,0 +1,150 @@
+import json
+import sqlite3
+
+import pytest
+
+from change_plan import PLAN_VERSION, Change, ChangePlan, PlanError
+from write_scheduler import LockTimeout, WriteScheduler
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / "meet.db")
+    with sqlite3.connect(path) as con:
+        con.execute("CREATE TABLE ATHLETE (ATHLETEID INTEGER PRIMARY KEY, FIRSTNAME TEXT, LASTNAME TEXT)")
+        con.executemany("INSERT INTO ATHLETE VALUES (?, ?, ?)", [(i, "F", "L") for i in range(1, 4)])
+    con.close()
+    return path
+
+
+def stored(database):
+    con = sqlite3.connect(database)
+    try:
+        return con.execute("SELECT ATHLETEID, FIRSTNAME, LASTNAME FROM ATHLETE ORDER BY ATHLETEID").fetchall()
+    finally:
+        con.close()
+
+
+def plan_for(database):
+    plan = ChangePlan("Test Job", database)
+    # Added out of order - apply() groups them by table and column
+    for i in range(1, 4):
+        plan.add("ATHLETE", i, "LASTNAME", "L", "Last{}".format(i))
+    for i in range(1, 4):
+        plan.add("ATHLETE", i, "FIRSTNAME", "F", "First{}".format(i))
+    return plan
+
+
+def test_add_rejects_other_tables(database):
+    with pytest.raises(ValueError):
+        ChangePlan("Test Job", database).add("EVENT", 1, "NAME", None, "X")
+
+
+def test_save_and_load(database, tmp_path):
+    path = str(tmp_path / "plan.json")
+    plan = plan_for(database)
+    plan.save(path)
+    loaded = ChangePlan.load(path)
+    assert (loaded.job, loaded.database, loaded.created) == (plan.job, plan.database, plan.created)
+    assert loaded.fingerprint == plan.fingerprint
+    assert loaded.changes == plan.changes
+    loaded.verify(database)
+
+
+def test_load_errors(tmp_path):
+    path = tmp_path / "plan.json"
+    with pytest.raises(PlanError, match="Unable to read"):
+        ChangePlan.load(str(path))
+    path.write_text("{not json", encoding="utf-8")
+    with pytest.raises(PlanError, match="Unable to read"):
+        ChangePlan.load(str(path))
+    path.write_text(json.dumps({"version": PLAN_VERSION + 1}), encoding="utf-8")
+    with pytest.raises(PlanError, match="Unsupported change plan version"):
+        ChangePlan.load(str(path))
+
+
+def test_verify_rejects_other_or_changed_database(database, tmp_path):
+    path = str(tmp_path / "plan.json")
+    plan_for(database).save(path)
+    other = tmp_path / "other.db"
+    other.write_bytes(open(database, "rb").read())
+    with pytest.raises(PlanError, match="different database"):
+        ChangePlan.load(path).verify(str(other))
+    with sqlite3.connect(database) as con:
+        con.execute("UPDATE ATHLETE SET LASTNAME = 'Changed' WHERE ATHLETEID = 1")
+    con.close()
+    with pytest.raises(PlanError, match="has changed"):
+        ChangePlan.load(path).verify(database)
+
+
+def test_merge_keeps_first_old_value(database, tmp_path):
+    first, second = ChangePlan("A", database), ChangePlan("B", database)
+    first.add("ATHLETE", 1, "LASTNAME", "L", "X")
+    first.add("ATHLETE", 2, "LASTNAME", "L", "Y")
+    second.add("ATHLETE", 1, "LASTNAME", "X", "Z")
+    second.add("CLUB", 5, "NAME", "Old", "New")
+    merged = ChangePlan.merge("Merged", [first, second])
+    assert merged.changes == [
+        Change("ATHLETE", 1, "LASTNAME", "L", "Z"),
+        Change("ATHLETE", 2, "LASTNAME", "L", "Y"),
+        Change("CLUB", 5, "NAME", "Old", "New"),
+    ]
+    with pytest.raises(PlanError, match="different databases"):
+        ChangePlan.merge("Merged", [first, ChangePlan("C", str(tmp_path / "other.db"))])
+
+
+def test_apply_in_one_transaction(database):
+    con = sqlite3.connect(database)
+    try:
+        assert plan_for(database).apply(con) == 6
+    finally:
+        con.close()
+    assert stored(database) == [(i, "First{}".format(i), "Last{}".format(i)) for i in range(1, 4)]
+
+
+def test_apply_rolls_back_on_error(database):
+    plan = plan_for(database)
+    plan.add("ATHLETE", 1, "NOSUCH", None, "X")
+    con = sqlite3.connect(database)
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            plan.apply(con)
+    finally:
+        con.close()
+    assert stored(database) == [(i, "F", "L") for i in range(1, 4)]
+    assert len(plan) == 7
+
+
+def test_apply_scheduled_keeps_what_was_not_written(database):
+    con = sqlite3.connect(database, timeout=0)
+    splash = sqlite3.connect(database, timeout=0, isolation_level=None)
+    try:
+        # Splash takes its lock after the first batch and keeps it
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 1:
+                splash.execute("BEGIN IMMEDIATE")
+
+        scheduler = WriteScheduler(con, batch_size=2, retries=2, slice_seconds=0.0, pause=0.01, sleep=sleep)
+        plan = plan_for(database)
+        with pytest.raises(LockTimeout):
+            plan.apply(con, scheduler)
+        splash.execute("ROLLBACK")
+    finally:
+        splash.close()
+        con.close()
+    # FIRSTNAME sorts first, so its first two rows were written
+    assert stored(database) == [(1, "First1", "L"), (2, "First2", "L"), (3, "F", "L")]
+    assert plan.changes == [Change("ATHLETE", 3, "FIRSTNAME", "F", "First3")] + [
+        Change("ATHLETE", i, "LASTNAME", "L", "Last{}".format(i)) for i in range(1, 4)
+    ]
+
+    # What is left applies cleanly later
+    con = sqlite3.connect(database, timeout=0)
+    try:
+        assert plan.apply(con, WriteScheduler(con, in_use=False)) == 4
+    finally:
+        con.close()
+    assert stored(database) == [(i, "First{}".format(i), "Last{}".format(i)) for i in range(1, 4)]
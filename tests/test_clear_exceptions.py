@@ -0,0 +1,68 @@
+import csv
+import os
+import shutil
+
+import pytest
+
+from change_plan import Change, ChangePlan
+
+# pyodbc is installed but can fail to load its ODBC library
+pytest.importorskip("pyodbc", exc_type=ImportError)
+
+import splashutilities_core  # noqa: E402  pylint: disable=wrong-import-position
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "meet.mdb")
+
+# Everyone in the fixture but Zoë Lévesque (ATHLETEID 2, exceptions "4")
+ROSTER = [{"SNC_ID": license} for license in ("100001", "100004", "100005", "100006")]
+
+
+class Config:
+    def __init__(self, **options):
+        self._options = options
+
+    def get_str(self, name: str) -> str:
+        return self._options[name]
+
+    def get_bool(self, name: str) -> bool:
+        return self._options[name]
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    monkeypatch.setattr(splashutilities_core, "get_active_roster", lambda: ROSTER)
+    database = str(tmp_path / "meet.mdb")
+    shutil.copyfile(FIXTURE, database)
+    return Config(
+        splash_db=database,
+        update_database=False,
+        plan_file=str(tmp_path / "changeplan.json"),
+        exceptions_journal=str(tmp_path / "exceptions_journal.csv"),
+        file_reads=True,
+        set_based_updates=True,
+    )
+
+
+def test_set_based_dry_run_is_read_only(config):
+    with open(config.get_str("splash_db"), "rb") as file:
+        before = file.read()
+    splashutilities_core.Clear_Exceptions(config).run()
+
+    with open(config.get_str("splash_db"), "rb") as file:
+        assert file.read() == before
+    assert not os.path.exists(config.get_str("exceptions_journal"))
+    plan = ChangePlan.load(config.get_str("plan_file"))
+    assert plan.changes == [Change("ATHLETE", 2, "HANDICAPEX", "4", None)]
+
+
+def test_journal_is_appended_to(tmp_path):
+    path = str(tmp_path / "exceptions_journal.csv")
+    splashutilities_core.append_journal(path, "first.mdb", [(2, "Zoë", "Lévesque", "4")])
+    splashutilities_core.append_journal(path, "second.mdb", [(7, "Visiting", "Swimmer", "A,4")])
+    with open(path, newline="", encoding="utf-8") as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == splashutilities_core.JOURNAL_HEADER
+    assert [row[1:] for row in rows[1:]] == [
+        ["first.mdb", "2", "Zoë", "Lévesque", "4"],
+        ["second.mdb", "7", "Visiting", "Swimmer", "A,4"],
+    ]
@@ -0,0 +1,120 @@
+import pytest
+
+from club_dedup import (
+    DUPLICATE,
+    REPORT_HEADER,
+    UNMAPPED,
+    ClubRow,
+    NgramIndex,
+    dice,
+    find_club_duplicates,
+    normalize_club_name,
+    normalize_code,
+    report_rows,
+    trigrams,
+)
+from club_list import ClubInfo
+
+CLUBS = {
+    "ABC": ClubInfo("ON", "Toronto Swim Club", None),
+    "ELT": ClubInfo("QC", "Club de Natation Élite", None),
+    "OTT": ClubInfo("ON", "Ottawa Swim Club", "Ottawa Sharks"),
+    "DUP": None,  # Listed twice in the club list
+}
+
+ROWS = [
+    ClubRow(1, "ABC", "Toronto Swim Club", "CAN"),
+    ClubRow(2, "ABC-ON", "Toronto Swimming", "CAN"),  # Same name once the stop words are gone
+    ClubRow(3, "ZZZ", "Élite Natation", "CAN"),
+    ClubRow(4, "ELT", "Club de Natation Elite", "CAN"),  # In the club list, so kept over 3
+    ClubRow(5, "ABC", "Toronto Swim Club", "USA"),  # Another nation
+    ClubRow(6, "MSA", "Mississauga Aquatic Club", "CAN"),
+    ClubRow(7, "MSA2", "Missisauga Aquatics", "CAN"),  # Misspelt
+    ClubRow(8, "NEW", "Ottawa Sharks", "CAN"),
+    ClubRow(9, "DUP", "Nothing Like It", "CAN"),
+    ClubRow(10, None, None, "CAN"),
+]
+
+
+def test_normalize():
+    assert normalize_code(" abc-on ") == "ABCON"
+    assert normalize_club_name("Club de Natation Élite") == "elite"
+    assert normalize_club_name("The Swim Club") == "the swim club"
+    assert normalize_club_name(None) == ""
+    assert dice(trigrams("elite"), trigrams("elite")) == 1.0
+    assert dice(set(), trigrams("elite")) == 0.0
+
+
+def test_similar():
+    index = NgramIndex()
+    for key, name in enumerate(("toronto", "torontos", "ottawa", "mississauga")):
+        index.add(key, name)
+    assert len(index) == 4
+    found = index.similar("toronto", 0.5)
+    assert [key for _, key in found] == [0, 1]
+    assert found[0][0] == 1.0 and found[1][0] < 1.0
+    assert index.similar("ottawa", 1.0) == [(1.0, 2)]
+    assert index.similar("victoria", 0.5) == []
+
+
+def test_similar_skips_common_trigrams():
+    names = ("aaa x", "aaa y", "aaa z")
+    common = NgramIndex()
+    capped = NgramIndex(max_postings=2)
+    for key, name in enumerate(names):
+        common.add(key, name)
+        capped.add(key, name)
+    assert [key for _, key in common.similar("aaa q", 0.1)] == [0, 1, 2]
+    # Only "aaa" is shared and it is in every name - no candidates
+    assert capped.similar("aaa q", 0.1) == []
+    # A rarer trigram still finds its name
+    assert [key for _, key in capped.similar("aaa x", 0.1)] == [0]
+
+    # Only the best max_candidates by shared trigrams are scored
+    few = NgramIndex(max_candidates=2)
+    for key, name in enumerate(("toronto", "toronto a", "toronto b", "toronto c")):
+        few.add(key, name)
+    assert [key for _, key in few.similar("toronto", 0.1)] == [0, 1]
+
+
+def test_find_club_duplicates():
+    findings = find_club_duplicates(ROWS, CLUBS)
+    duplicates = [(f.group, f.club.club_id, f.suggestion) for f in findings if f.kind == DUPLICATE]
+    assert duplicates == [
+        (1, 1, "Keep"),
+        (1, 2, "Merge into CLUBID 1 (ABC)"),
+        # Kept for being in the club list, though 3 is older
+        (2, 4, "Keep"),
+        (2, 3, "Merge into CLUBID 4 (ELT)"),
+        # Neither in the club list - the oldest is kept
+        (3, 6, "Keep"),
+        (3, 7, "Merge into CLUBID 6 (MSA)"),
+    ]
+    unmapped = [(f.club.club_id, f.match_code, f.match_name, f.suggestion) for f in findings if f.kind == UNMAPPED]
+    assert unmapped == [
+        (2, "ABC", "Toronto Swim Club", "Change the code to ABC"),
+        (3, "ELT", "Club de Natation Élite", "Change the code to ELT"),
+        (6, None, None, "Add the club to the club list"),
+        (7, None, None, "Add the club to the club list"),
+        # Matched on the preferred name
+        (8, "OTT", "Ottawa Sharks", "Change the code to OTT"),
+        (9, None, None, "Add the club to the club list"),
+        (10, None, None, "Add the club to the club list"),
+    ]
+    assert all(0 < f.score <= 1 for f in findings if f.score is not None)
+
+
+def test_report_rows():
+    findings = find_club_duplicates(ROWS[:2], CLUBS)
+    lines = report_rows(findings)
+    assert all(len(line) == len(REPORT_HEADER) for line in lines)
+    assert lines[0] == [DUPLICATE, 1, 1, "ABC", "Toronto Swim Club", "CAN", "ABC", "Toronto Swim Club", None, "Keep"]
+    assert lines[-1][:2] == [UNMAPPED, ""]
+
+
+@pytest.mark.parametrize(
+    "club", [ClubRow(1, "ABC", "Toronto Swim Club", "CAN"), ClubRow(1, "ZZZ", "Elsewhere", "USA")]
+)
+def test_no_findings(club):
+    # Codes are only looked up for the nation asked for
+    assert find_club_duplicates([club], CLUBS) == []
@@ -0,0 +1,66 @@
+import codecs
+
+import pytest
+
+from club_list import ClubInfo, load_club_list
+
+CSV = (
+    "Club Code,Province,Club Name,Preferred Club Name,Contact\n"
+    'ABC,ON,"Aquatic, Club","Quoted\nname",someone\n'
+    "DUP,BC,First,,\n"
+    "DUP,BC,Second,,\n"
+    "ELT,QC,Élite\n"
+)
+
+EXPECTED = {
+    "ABC": ClubInfo("ON", "Aquatic, Club", "Quoted\nname"),
+    "DUP": None,
+    "ELT": ClubInfo("QC", "Élite", None),
+}
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        CSV.encode("utf-8"),
+        codecs.BOM_UTF8 + CSV.encode("utf-8"),
+        codecs.BOM_UTF16_LE + CSV.encode("utf-16-le"),
+        codecs.BOM_UTF16_BE + CSV.encode("utf-16-be"),
+        CSV.encode("cp1252"),
+    ],
+    ids=["utf-8", "utf-8 bom", "utf-16-le", "utf-16-be", "cp1252"],
+)
+def test_encodings(tmp_path, data):
+    path = tmp_path / "clubs.csv"
+    path.write_bytes(data)
+    assert load_club_list(str(path)) == EXPECTED
+
+
+def test_crlf_and_no_final_newline(tmp_path):
+    path = tmp_path / "clubs.csv"
+    path.write_bytes(CSV.replace("\n", "\r\n").rstrip().encode("utf-8"))
+    clubs = load_club_list(str(path))
+    assert clubs["ABC"] == ClubInfo("ON", "Aquatic, Club", "Quoted\r\nname")
+    assert clubs["ELT"] == EXPECTED["ELT"]
+
+
+def test_missing_column(tmp_path):
+    path = tmp_path / "clubs.csv"
+    path.write_text("Club Code,Club Name\nABC,Aquatic Club\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="Province"):
+        load_club_list(str(path))
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "clubs.csv"
+    path.write_bytes(b"")
+    assert load_club_list(str(path)) == {}
+
+
+def test_cached_until_changed(tmp_path):
+    path = tmp_path / "clubs.csv"
+    path.write_text(CSV, encoding="utf-8")
+    first = load_club_list(str(path))
+    assert load_club_list(str(path)) is first
+    path.write_text(CSV + "NEW,AB,New Club,,\n", encoding="utf-8")
+    assert "NEW" in load_club_list(str(path))
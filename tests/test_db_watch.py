@@ -0,0 +1,93 @@
+import sqlite3
+
+import db_watch
+from db_watch import DatabaseWatcher, file_signature, high_water_marks, lock_file
+
+KEYS = {"ATHLETE": "ATHLETEID", "CLUB": "CLUBID"}
+A, B, C, D = ((1, 100), None), ((2, 200), (2, 64)), ((3, 300), (3, 64)), ((4, 400), None)
+
+
+class FakeFiles:
+    """Stands in for file_signature: returns the given signatures in turn, then repeats the last"""
+
+    def __init__(self, *signatures):
+        self._signatures = list(signatures)
+        self.calls = 0
+
+    def __call__(self, database):
+        self.calls += 1
+        return self._signatures.pop(0) if len(self._signatures) > 1 else self._signatures[0]
+
+
+class FakeReader:
+    """Stands in for MdbReader over a database of {table: [rows]}"""
+
+    def __init__(self, tables):
+        self._tables = tables
+
+    def __call__(self, path):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def read_table(self, table, columns):
+        assert len(columns) == 1
+        return iter(self._tables[table])
+
+
+def watcher(monkeypatch, *signatures) -> DatabaseWatcher:
+    monkeypatch.setattr(db_watch, "file_signature", FakeFiles(*signatures))
+    return DatabaseWatcher("meet.mdb", interval=0, debounce=0)
+
+
+def test_file_signature(tmp_path):
+    database = tmp_path / "meet.mdb"
+    assert lock_file(str(database)) == str(tmp_path / "meet.ldb")
+    assert file_signature(str(database)) == (None, None)
+    database.write_bytes(b"x" * 10)
+    signature = file_signature(str(database))
+    assert signature[0][1] == 10 and signature[1] is None
+    (tmp_path / "meet.ldb").write_bytes(b"x" * 64)
+    assert file_signature(str(database))[1][1] == 64
+
+
+def test_waits_for_writes_to_settle(monkeypatch):
+    # Quiet, then a burst of writes (B, C) that settles at C
+    watch = watcher(monkeypatch, A, A, B, C, C, D)
+    assert watch.wait() == C
+    # The next change is measured from where the last one settled
+    assert watch.wait() == D
+
+
+def test_rebase_ignores_our_own_lock_file(monkeypatch):
+    # B is our connection opening the lock file, D a later write by Splash
+    watch = watcher(monkeypatch, A, B, B, B, D)
+    watch.rebase()
+    assert watch.wait() == D
+
+
+def test_stop(monkeypatch):
+    watch = watcher(monkeypatch, A, B)
+    watch.stop()
+    assert watch.stopped
+    assert watch.wait() is None
+
+
+def test_high_water_marks_from_file(monkeypatch):
+    monkeypatch.setattr(db_watch, "MdbReader", FakeReader({"ATHLETE": [(3,), (None,), (8,), (5,)], "CLUB": []}))
+    assert high_water_marks("meet.mdb", KEYS) == {"ATHLETE": 8, "CLUB": 0}
+
+
+def test_high_water_marks_from_connection():
+    con = sqlite3.connect(":memory:")
+    try:
+        con.execute("CREATE TABLE ATHLETE (ATHLETEID INTEGER)")
+        con.execute("CREATE TABLE CLUB (CLUBID INTEGER)")
+        con.executemany("INSERT INTO ATHLETE VALUES (?)", [(4,), (9,), (2,)])
+        assert high_water_marks(con, KEYS) == {"ATHLETE": 9, "CLUB": 0}
+    finally:
+        con.close()
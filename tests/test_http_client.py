@@ -0,0 +1,54 @@
+import time
+
+import pytest
+import requests
+
+from conftest import StubResponse
+
+
+def test_retries_server_errors(stub_server, http_session):
+    stub_server.reply(StubResponse(500), StubResponse(503), StubResponse(200, b"[]"))
+    response = http_session.get(stub_server.url)
+    assert response.status_code == 200
+    assert len(stub_server.requests) == 3
+
+
+def test_retries_too_many_requests(stub_server, http_session):
+    stub_server.reply(StubResponse(429), StubResponse(200, b"[]"))
+    assert http_session.get(stub_server.url).status_code == 200
+    assert len(stub_server.requests) == 2
+
+
+def test_gives_up_after_max_retries(stub_server, http_session):
+    stub_server.reply(StubResponse(502))
+    response = http_session.get(stub_server.url)
+    # The last answer is returned rather than raised, so callers see the status
+    assert response.status_code == 502
+    assert len(stub_server.requests) == http_session.MAX_RETRIES + 1
+
+
+def test_client_errors_are_not_retried(stub_server, http_session):
+    stub_server.reply(StubResponse(404))
+    assert http_session.get(stub_server.url).status_code == 404
+    assert len(stub_server.requests) == 1
+
+
+def test_waits_for_retry_after(stub_server, http_session):
+    stub_server.reply(StubResponse(429, headers={"Retry-After": "1"}), StubResponse(200, b"[]"))
+    start = time.perf_counter()
+    assert http_session.get(stub_server.url).status_code == 200
+    assert time.perf_counter() - start >= 1.0
+
+
+def test_read_timeout(stub_server, http_session):
+    stub_server.reply(StubResponse(200, b"[]", delay=1.0))
+    start = time.perf_counter()
+    with pytest.raises(requests.exceptions.RequestException):
+        http_session.get(stub_server.url, timeout=(1.0, 0.1))
+    # Every attempt is cut off by the read timeout rather than waiting for the answer
+    assert len(stub_server.requests) == http_session.MAX_RETRIES + 1
+    assert time.perf_counter() - start < 1.0
+
+
+def test_session_is_shared(http_session):
+    assert http_session.get_session() is http_session.get_session()
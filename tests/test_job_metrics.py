@@ -0,0 +1,91 @@
+import sqlite3
+import threading
+
+import pytest
+
+import job_metrics
+from job_metrics import CountingConnection, JobMetrics, tracked
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    fresh = JobMetrics()
+    monkeypatch.setattr(job_metrics, "metrics", fresh)
+    return fresh
+
+
+def test_nothing_run_yet():
+    snapshot = JobMetrics().snapshot()
+    assert (snapshot.job, snapshot.running, snapshot.rows, snapshot.elapsed) == (None, False, 0, 0.0)
+
+
+def test_stages(metrics):
+    metrics.start("Test Job")
+    metrics.begin_stage("Reading", 100)
+    metrics.advance(25)
+    snapshot = metrics.snapshot()
+    assert (snapshot.job, snapshot.running, snapshot.stage, snapshot.rows, snapshot.total) == (
+        "Test Job",
+        True,
+        "Reading",
+        25,
+        100,
+    )
+    assert snapshot.rate > 0
+    assert snapshot.eta == pytest.approx(75 / snapshot.rate)
+
+    metrics.begin_stage("Writing")
+    snapshot = metrics.snapshot()
+    assert (snapshot.rows, snapshot.total, snapshot.eta) == (0, None, None)
+
+    metrics.finish()
+    snapshot = metrics.snapshot()
+    assert (snapshot.running, snapshot.stage, snapshot.rate) == (False, "Finished", 0.0)
+    # Elapsed stops with the job
+    assert metrics.snapshot().elapsed == snapshot.elapsed
+
+
+def test_concurrent_updates_are_not_lost(metrics):
+    metrics.start("Test Job")
+    start = threading.Barrier(8)
+
+    def work():
+        start.wait()
+        for _ in range(10000):
+            metrics.advance()
+            metrics.count_sql(2)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    snapshot = metrics.snapshot()
+    assert (snapshot.rows, snapshot.sql) == (80000, 160000)
+
+
+def test_tracked_finishes_on_error(metrics):
+    @tracked("Failing Job")
+    def run():
+        assert metrics.snapshot().running
+        raise RuntimeError("failed")
+
+    with pytest.raises(RuntimeError):
+        run()
+    snapshot = metrics.snapshot()
+    assert (snapshot.job, snapshot.running) == ("Failing Job", False)
+
+
+def test_counting_connection(metrics):
+    con = CountingConnection(sqlite3.connect(":memory:"))
+    try:
+        cursor = con.cursor()
+        cursor.execute("CREATE TABLE T (X)")
+        cursor.executemany("INSERT INTO T VALUES (?)", ((i,) for i in range(5)))
+        cursor.execute("SELECT X FROM T ORDER BY X")
+        assert [row[0] for row in cursor] == [0, 1, 2, 3, 4]
+        con.commit()
+    finally:
+        con.close()
+    # One per executemany row
+    assert metrics.snapshot().sql == 7
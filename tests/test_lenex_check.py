@@ -0,0 +1,127 @@
+import logging
+import zipfile
+from xml.etree import ElementTree
+from xml.sax import SAXParseException
+
+import pytest
+
+from athlete_snapshot import index_roster
+from club_list import ClubInfo
+from lenex_check import EntryCheck, check_entry_file, corrected_file_name
+from para_diff import eligible_levels
+
+LEVELS = eligible_levels("2")
+CLUBS = {"ABC": ClubInfo("ON", "Aquatic Club", "Aquatic Swim Club"), "DUP": None}
+
+
+def roster_athlete(snc_id, level="2", s="9", sb="8", sm="9", exceptions=None, sdms=None):
+    return {"SNC_ID": snc_id, "Level": level, "S": s, "SB": sb, "SM": sm, "Exceptions": exceptions, "SDMS_ID": sdms}
+
+
+ROSTER = index_roster(
+    [
+        roster_athlete("100"),
+        roster_athlete("200", exceptions="A,4"),
+        roster_athlete("300", s="7", sb="7", sm="7"),
+        roster_athlete("400"),
+        roster_athlete("500", "Int", sdms=12345),
+        roster_athlete("600", "1"),
+    ]
+)
+
+ENTRIES = """<?xml version="1.0" encoding="UTF-8"?>
+<LENEX version="3.0"><MEETS><MEET name="Test"><CLUBS>
+<CLUB code="ABC" nation="CAN" region="QC" name="Aquatic Club"><ATHLETES>
+<ATHLETE athleteid="1" firstname="No" lastname="Exceptions" license="100"><HANDICAP free="9" breast="8" medley="9"/></ATHLETE>
+<ATHLETE athleteid="2" firstname="Zoë" lastname="Lévesque" license="200"><HANDICAP exception="4,A" free="10" breast="8" medley="9"/></ATHLETE>
+<ATHLETE athleteid="3" firstname="No" lastname="Handicap" license="300"></ATHLETE>
+<ATHLETE athleteid="4" firstname="Extra" lastname="Exception" license="400"><HANDICAP exception="4" free="9" breast="8" medley="9"/></ATHLETE>
+<ATHLETE athleteid="5" firstname="Int" lastname="Sdms" license="500" license_ipc="99"><HANDICAP free="9" breast="8" medley="9"/></ATHLETE>
+<ATHLETE athleteid="6" firstname="Low" lastname="Level" license="600"><HANDICAP free="9" breast="8" medley="9"/></ATHLETE>
+<ATHLETE athleteid="7" firstname="Not" lastname="Listed" license="999"/>
+</ATHLETES></CLUB>
+<CLUB code="DUP" nation="CAN" region="BC" name="Listed Twice"/>
+<CLUB code="USA1" nation="USA" name="American Swim Team"><ATHLETES>
+<ATHLETE athleteid="8" firstname="Visiting" lastname="Swimmer" license="100"/>
+</ATHLETES></CLUB>
+</CLUBS></MEET></MEETS></LENEX>
+"""
+
+# Athletes 2 (S), 3 (S, SB, SM), 4 (exception) and 5 (SDMSID); ABC region and name
+EXPECTED = EntryCheck(
+    athletes=7, matched=6, athlete_changes=6, level_warnings=1, clubs=2, club_changes=2, unknown_clubs=1
+)
+CLEAN = EXPECTED._replace(athlete_changes=0, club_changes=0)
+
+
+@pytest.fixture
+def lef(tmp_path):
+    path = tmp_path / "entries.lef"
+    path.write_text(ENTRIES, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def lxf(tmp_path):
+    path = str(tmp_path / "entries.lxf")
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("entries.lef", ENTRIES)
+    return path
+
+
+def athletes(root) -> dict:
+    return {athlete.get("athleteid"): athlete for athlete in root.iter("ATHLETE")}
+
+
+def handicap(athlete) -> dict:
+    element = athlete.find("HANDICAP")
+    return None if element is None else dict(element.attrib)
+
+
+def test_check_without_output(lef, caplog):
+    caplog.set_level(logging.INFO)
+    assert check_entry_file(lef, ROSTER, CLUBS, LEVELS) == EXPECTED
+    # A roster athlete with no exceptions matches an entry without any
+    assert "No Exceptions" not in caplog.text
+    assert "Extra Exception exceptions mismatch. Entry file: 4 Roster: \n" in caplog.text
+    assert "Roster: None" not in caplog.text
+
+
+def test_corrected_file_round_trip(lef):
+    output = corrected_file_name(lef)
+    assert output.endswith("entries_corrected.lef")
+    assert check_entry_file(lef, ROSTER, CLUBS, LEVELS, output, fix_sdms=True) == EXPECTED
+
+    root = ElementTree.parse(output).getroot()
+    club = root.find(".//CLUB[@code='ABC']")
+    assert (club.get("region"), club.get("name")) == ("ON", "Aquatic Swim Club")
+    corrected = athletes(root)
+    assert handicap(corrected["1"]) == {"free": "9", "breast": "8", "medley": "9"}
+    assert handicap(corrected["2"]) == {"exception": "4,A", "free": "9", "breast": "8", "medley": "9"}
+    # Added where the entry had none
+    assert handicap(corrected["3"]) == {"free": "7", "breast": "7", "medley": "7"}
+    # Removed, not written as "None"
+    assert handicap(corrected["4"]) == {"free": "9", "breast": "8", "medley": "9"}
+    assert corrected["5"].get("license_ipc") == "12345"
+    assert corrected["2"].get("firstname") == "Zoë"
+
+    # The corrected file checks clean
+    assert check_entry_file(output, ROSTER, CLUBS, LEVELS, fix_sdms=True) == CLEAN
+
+
+def test_zipped_round_trip(lxf, tmp_path):
+    output = corrected_file_name(lxf)
+    assert check_entry_file(lxf, ROSTER, CLUBS, LEVELS, output) == EXPECTED
+    with zipfile.ZipFile(output) as archive:
+        assert archive.namelist() == ["entries.lef"]
+    # SDMS IDs were left alone this time
+    assert check_entry_file(output, ROSTER, CLUBS, LEVELS) == CLEAN._replace(athlete_changes=1)
+
+
+def test_unreadable_file_leaves_no_output(tmp_path):
+    path = tmp_path / "entries.lef"
+    path.write_text(ENTRIES[:400], encoding="utf-8")
+    output = tmp_path / "entries_corrected.lef"
+    with pytest.raises(SAXParseException):
+        check_entry_file(str(path), ROSTER, CLUBS, LEVELS, str(output))
+    assert not output.exists()
@@ -0,0 +1,179 @@
+"""
+MdbReader against databases written by tests/fixtures/make_fixtures.py.
+
+The fixtures are hand-built from the Jet 4 format description, not written by
+Access or Splash, so these tests only show the reader agrees with that
+generator. Compatibility with real Splash meet files is unverified here: set
+SPLASH_TEST_MDB to the path of one to have test_real_database read all of it.
+"""
+
+import datetime
+import os
+import random
+import shutil
+import struct
+from decimal import Decimal
+
+import pytest
+
+from mdb_reader import PAGE_SIZE, MdbError, MdbReader
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "meet.mdb")
+REAL_DATABASE = os.environ.get("SPLASH_TEST_MDB")
+
+ATHLETES = [
+    (1, "Jane", "Doe", datetime.datetime(2005, 3, 14), 2, "100001", "CAN", 1, None, "9", "8", "9", 12345),
+    (2, "Zoë", "Lévesque", datetime.datetime(2006, 7, 1), 2, "100002", "CAN", 2, "4", "5", "5", "4", None),
+    (4, "中文", "Name", datetime.datetime(2007, 12, 31), 1, "100004", "CAN", 1, None, None, None, None, None),
+    (5, "Moved", "Row", datetime.datetime(2004, 5, 5), 1, "100005", "CAN", 2, None, "14", "14", "14", 54321),
+    # Written before SDMSID was added to the table
+    (6, "Old", "Format", datetime.datetime(1999, 9, 9), 1, "100006", "CAN", 2, None, None, None, None, None),
+    (7, "Visiting", "Swimmer", datetime.datetime(2003, 2, 2), 2, None, "USA", 3, None, "7", "7", "7", None),
+    (8, "Jane", "Doe", datetime.datetime(2005, 3, 14), 2, None, "CAN", 1, None, None, None, None, None),
+]
+
+
+def damaged_copy(tmp_path, patch) -> str:
+    """A copy of the fixture with patch(data) applied to its bytes"""
+    path = str(tmp_path / "damaged.mdb")
+    shutil.copyfile(FIXTURE, path)
+    with open(path, "rb") as file:
+        data = bytearray(file.read())
+    patch(data)
+    with open(path, "wb") as file:
+        file.write(data)
+    return path
+
+
+def read_everything(path: str) -> None:
+    with MdbReader(path) as mdb:
+        for name in mdb.tables():
+            for _ in mdb.read_table(name):
+                pass
+
+
+@pytest.mark.skipif(not REAL_DATABASE, reason="SPLASH_TEST_MDB is not set - no Access-written database to read")
+def test_real_database():
+    with MdbReader(REAL_DATABASE) as mdb:
+        assert {"ATHLETE", "CLUB"} <= set(mdb.tables())
+    read_everything(REAL_DATABASE)
+
+
+def test_user_tables_only():
+    with MdbReader(FIXTURE) as mdb:
+        assert sorted(mdb.tables()) == ["ATHLETE", "CLUB", "SU_TYPES"]
+
+
+def test_read_table():
+    with MdbReader(FIXTURE) as mdb:
+        assert list(mdb.read_table("ATHLETE")) == ATHLETES
+        assert list(mdb.read_table("CLUB")) == [
+            (1, "ABC", "Aquatic Club", "CAN", "ON"),
+            (2, "QCN", "Club de Natation Élite", "CAN", None),
+            (3, "USA1", "American Swim Team", "USA", None),
+        ]
+
+
+def test_requested_columns_in_order():
+    with MdbReader(FIXTURE) as mdb:
+        rows = list(mdb.read_table("athlete", ("license", "ATHLETEID", "SDMSID")))
+    assert rows == [(a[5], a[0], a[12]) for a in ATHLETES]
+
+
+def test_column_types():
+    with MdbReader(FIXTURE) as mdb:
+        rows = list(mdb.read_table("SU_TYPES"))
+    assert rows[0] == (
+        1,
+        True,
+        255,
+        Decimal("12.3400"),
+        0.5,
+        "{6F1C1D3E-2B7A-4C1E-9D2F-0A1B2C3D4E5F}",
+        Decimal("-1234.56"),
+        "Short note",
+    )
+    assert rows[1] == (2, False, 0, Decimal("-0.0100"), -2.25, None, Decimal("0.00"), "Long note " * 30)
+    # A memo chained across long value pages
+    assert rows[2] == (3, False, None, None, None, None, None, "Chained note " * 40)
+    assert rows[3] == (4, False, None, None, None, None, None, None)
+
+
+def test_missing_table_and_column():
+    with MdbReader(FIXTURE) as mdb:
+        with pytest.raises(MdbError, match="No table"):
+            mdb.read_table("EVENT")
+        with pytest.raises(MdbError, match="NOSUCH"):
+            mdb.read_table("ATHLETE", ("ATHLETEID", "NOSUCH"))
+
+
+@pytest.mark.parametrize(
+    "data",
+    [b"", b"not a database" * 1000, b"\x00\x01\x00\x00" + bytes(PAGE_SIZE * 3)],
+    ids=["empty", "text", "jet 3"],
+)
+def test_not_a_database(tmp_path, data):
+    path = tmp_path / "bad.mdb"
+    path.write_bytes(data)
+    with pytest.raises(MdbError):
+        MdbReader(str(path))
+
+
+def test_truncated_file(tmp_path):
+    path = damaged_copy(tmp_path, lambda data: data.__delitem__(slice(PAGE_SIZE * 7 + 100, None)))
+    with pytest.raises(MdbError, match="Truncated"):
+        MdbReader(path)
+
+
+def test_column_count_past_the_page(tmp_path):
+    path = damaged_copy(tmp_path, lambda data: struct.pack_into("<H", data, 3 * PAGE_SIZE + 45, 0xFFFF))
+    with MdbReader(path) as mdb:
+        with pytest.raises(MdbError, match="Damaged"):
+            mdb.read_table("ATHLETE")
+
+
+def test_row_offsets_past_the_page(tmp_path):
+    with MdbReader(FIXTURE) as mdb:
+        page = mdb._owned_pages(mdb.tables()["ATHLETE"])[0]
+
+    def patch(data):
+        # A row count far beyond the offsets the page holds
+        struct.pack_into("<H", data, page * PAGE_SIZE + 0x0C, 0x7FFF)
+
+    path = damaged_copy(tmp_path, patch)
+    with MdbReader(path) as mdb:
+        rows = mdb.read_table("ATHLETE", ("ATHLETEID",))
+        with pytest.raises(MdbError, match="Damaged"):
+            list(rows)
+
+
+def test_table_definition_loop(tmp_path):
+    path = damaged_copy(tmp_path, lambda data: struct.pack_into("<I", data, 3 * PAGE_SIZE + 4, 3))
+    with MdbReader(path) as mdb:
+        with pytest.raises(MdbError, match="loops"):
+            mdb.read_table("ATHLETE")
+
+
+def test_fuzzed_pages_raise_mdb_error(tmp_path):
+    """Whatever the damage, the reader either reads the file or raises MdbError"""
+    with open(FIXTURE, "rb") as file:
+        original = file.read()
+    rng = random.Random(32)
+    path = tmp_path / "fuzzed.mdb"
+    for _ in range(300):
+        data = bytearray(original)
+        for _ in range(rng.randint(1, 8)):
+            position = rng.randrange(2 * PAGE_SIZE, len(data))
+            data[position] = rng.randrange(256)
+        path.write_bytes(bytes(data))
+        try:
+            read_everything(str(path))
+        except MdbError:
+            pass
+
+
+def test_athlete_snapshot_from_file():
+    from athlete_snapshot import AthleteSnapshot  # pylint: disable=import-outside-toplevel
+
+    snapshot = AthleteSnapshot.load_mdb(FIXTURE, ("ATHLETEID", "LICENSE", "HANDICAPS"), after_id=4)
+    assert list(snapshot.rows()) == [(a[0], a[5], a[9]) for a in ATHLETES if a[0] > 4]
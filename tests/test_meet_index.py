@@ -0,0 +1,46 @@
+import os
+import shutil
+
+import pytest
+
+import meet_index
+from meet_index import build_index, find_inconsistencies, scan_meets
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "meet.mdb")
+
+
+@pytest.fixture
+def meets(tmp_path):
+    """Two copies of the fixture meet and a file that isn't a database"""
+    paths = [str(tmp_path / name) for name in ("1-fall.mdb", "2-damaged.mdb", "3-winter.mdb")]
+    shutil.copyfile(FIXTURE, paths[0])
+    with open(paths[1], "wb") as file:
+        file.write(b"not a database" * 1000)
+    shutil.copyfile(FIXTURE, paths[2])
+    return paths
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_unreadable_meet_is_skipped(meets, workers):
+    scans = scan_meets(meets, workers)
+    assert [scan.meet for scan in scans] == ["1-fall.mdb", "2-damaged.mdb", "3-winter.mdb"]
+    assert [scan.error is None for scan in scans] == [True, False, True]
+    assert "Not an Access database" in scans[1].error
+    assert scans[0].athletes["100001"] == ("Jane", "Doe", ("", "9", "8", "9", "12345"))
+    index = build_index(scans)
+    assert [meet for meet, _ in index["100001"]] == ["1-fall.mdb", "3-winter.mdb"]
+    assert find_inconsistencies(index) == []
+
+
+def test_unexpected_error_is_kept_to_its_meet(meets, monkeypatch):
+    scan_meet = meet_index.scan_meet
+
+    def failing(path):
+        if path.endswith("3-winter.mdb"):
+            raise RuntimeError("reader bug")
+        return scan_meet(path)
+
+    monkeypatch.setattr(meet_index, "scan_meet", failing)
+    scans = scan_meets(meets, 1)
+    assert scans[0].error is None
+    assert scans[2].error == "RuntimeError: reader bug"
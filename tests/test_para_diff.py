@@ -0,0 +1,113 @@
+import random
+
+import pytest
+
+import para_diff
+from athlete_snapshot import AthleteSnapshot, index_roster
+from para_diff import (
+    DIFF_COLUMNS,
+    LevelWarning,
+    ParaChange,
+    diff_bulk,
+    diff_rows,
+    diff_sharded,
+    eligible_levels,
+    shard_of,
+)
+
+LEVELS = eligible_levels("2")
+
+
+def roster_athlete(snc_id, level="Int", s="9", sb="8", sm="9", exceptions="4", sdms=None):
+    return {"SNC_ID": snc_id, "Level": level, "S": s, "SB": sb, "SM": sm, "Exceptions": exceptions, "SDMS_ID": sdms}
+
+
+def snapshot(rows) -> AthleteSnapshot:
+    athletes = AthleteSnapshot(DIFF_COLUMNS)
+    athletes.extend(rows)
+    return athletes
+
+
+# ATHLETEID, FIRSTNAME, LASTNAME, LICENSE, HANDICAPEX, HANDICAPS, HANDICAPSB, HANDICAPSM, SDMSID, NATION
+ROWS = [
+    (1, "Jane", "Doe", "100", "4", "9", "8", "9", 0, "CAN"),  # Matches
+    (2, "Zoë", "Lévesque", "200", None, None, None, None, None, "CAN"),  # All None in Splash
+    (3, "Not", "Listed", "999", "4", "9", "9", "9", 0, "CAN"),  # Not on the roster
+    (4, "Visiting", "Swimmer", "100", "4", "5", "5", "5", 0, "USA"),  # Not Canadian
+    (5, "Twice", "Entered", "100", "4", "10", "8", "9", 0, "CAN"),  # Second row with license 100
+    (6, "Dup", "Roster", "300", "4", "9", "8", "9", 0, "CAN"),  # ID listed twice on the roster
+    (7, "Low", "Level", "400", None, None, None, None, None, "CAN"),
+    (8, "No", "License", None, None, None, None, None, None, "CAN"),
+    (9, "Int", "Sdms", "500", "4", "9", "8", "9", 0, "CAN"),
+]
+
+ROSTER = [
+    roster_athlete("100"),
+    roster_athlete("200", "3", "NE", None, "PI", "A,4,J", None),
+    roster_athlete("300"),
+    roster_athlete("300", "2"),
+    roster_athlete("400", "1", None, None, None, None, None),
+    roster_athlete("500", "Int", sdms=12345),
+]
+
+
+def test_row_diff():
+    diff = diff_rows(snapshot(ROWS), index_roster(ROSTER), LEVELS)
+    assert diff.changes == [
+        ParaChange(2, "Zoë", "Lévesque", "exceptions", "HANDICAPEX", None, "A,4"),
+        ParaChange(2, "Zoë", "Lévesque", "S sport class", "HANDICAPS", None, "0"),
+        ParaChange(2, "Zoë", "Lévesque", "SB sport class", "HANDICAPSB", None, "0"),
+        ParaChange(2, "Zoë", "Lévesque", "SM sport class", "HANDICAPSM", None, "0"),
+        ParaChange(5, "Twice", "Entered", "S sport class", "HANDICAPS", "10", "9"),
+        ParaChange(7, "Low", "Level", "S sport class", "HANDICAPS", None, "0"),
+        ParaChange(7, "Low", "Level", "SB sport class", "HANDICAPSB", None, "0"),
+        ParaChange(7, "Low", "Level", "SM sport class", "HANDICAPSM", None, "0"),
+        ParaChange(9, "Int", "Sdms", "SDMSID", "SDMSID", 0, "12345"),
+    ]
+    assert diff.level_warnings == [LevelWarning(7, "Low", "Level", "1")]
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3])
+@pytest.mark.parametrize("bulk", [True, False])
+def test_implementations_agree(workers, bulk):
+    athletes, roster_index = snapshot(ROWS), index_roster(ROSTER)
+    expected = diff_rows(athletes, roster_index, LEVELS)
+    assert diff_bulk(athletes, roster_index, LEVELS) == expected
+    assert diff_sharded(athletes, roster_index, LEVELS, workers, bulk) == expected
+
+
+def test_empty_inputs():
+    empty = para_diff.ParaDiff([], [])
+    for athletes, roster_index in ((snapshot([]), index_roster(ROSTER)), (snapshot(ROWS), {})):
+        assert diff_rows(athletes, roster_index, LEVELS) == empty
+        assert diff_bulk(athletes, roster_index, LEVELS) == empty
+        assert diff_sharded(athletes, roster_index, LEVELS, 2) == empty
+
+
+def test_sharded_merge_keeps_table_order():
+    """Shards finish in any order, the merged changes are still in table order"""
+    rng = random.Random(29)
+    classes = ["1", "5", "9", "14", "NE", None]
+    rows, roster = [], []
+    for i in range(1, 301):
+        license = str(1000 + i)
+        rows.append((i, "F", "L", license, None, rng.choice(classes), "8", "9", 0, "CAN"))
+        roster.append(roster_athlete(license, rng.choice(["1", "2", "Int"]), rng.choice(classes)))
+    rng.shuffle(rows)
+    athletes, roster_index = snapshot(rows), index_roster(roster)
+    # Every shard has some of the rows
+    assert {shard_of(row[3], 4) for row in rows} == {0, 1, 2, 3}
+
+    expected = diff_rows(athletes, roster_index, LEVELS)
+    result = diff_sharded(athletes, roster_index, LEVELS, 4)
+    assert result == expected
+    order = [row[0] for row in rows]
+    positions = [order.index(change.athlete_id) for change in result.changes]
+    assert positions == sorted(positions)
+
+
+def test_bulk_without_numpy(monkeypatch):
+    athletes, roster_index = snapshot(ROWS), index_roster(ROSTER)
+    expected = diff_rows(athletes, roster_index, LEVELS)
+    monkeypatch.setattr(para_diff, "np", None)
+    assert diff_bulk(athletes, roster_index, LEVELS) == expected
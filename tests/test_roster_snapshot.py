@@ -0,0 +1,69 @@
+import struct
+
+import pytest
+
+from athlete_snapshot import index_roster
+from roster_snapshot import MAGIC, VERSION, RosterSnapshot, SnapshotError, write_snapshot
+
+ROSTER = [
+    {"SNC_ID": "300", "Given_Name": "Jane", "Family_Name": "Doe", "S": "9", "Level": "Int", "SDMS_ID": 12345},
+    {"SNC_ID": "100", "Given_Name": "Zoë", "Family_Name": "Lévesque", "S": "5", "Level": "Nat"},
+    {"SNC_ID": "200", "Given_Name": "First", "Family_Name": "Copy", "Level": None},
+    {"SNC_ID": "200", "Given_Name": "Second", "Family_Name": "Copy", "Level": "Prov"},
+]
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = str(tmp_path / "roster.bin")
+    write_snapshot(ROSTER, path)
+    with RosterSnapshot(path) as snapshot:
+        yield snapshot
+
+
+def test_roster_as_published(snapshot):
+    assert len(snapshot) == 4
+    assert snapshot.to_list() == ROSTER
+
+
+def test_lookup_matches_index_roster(snapshot):
+    index = index_roster(ROSTER)
+    for snc_id in ("100", "200", "300", "400", "0300", 300, "", None, "abc"):
+        assert snapshot.get(snc_id) == index.get(snc_id if isinstance(snc_id, str) else str(snc_id))
+        assert (snc_id in snapshot) == (snapshot.get(snc_id) is not None)
+
+
+def test_duplicates_are_kept(snapshot):
+    assert snapshot.get("200") is None
+    assert [a["Given_Name"] for a in snapshot.matches("200")] == ["First", "Second"]
+
+
+def test_little_endian_on_disk(tmp_path):
+    path = tmp_path / "roster.bin"
+    write_snapshot(ROSTER[:2], str(path))
+    data = path.read_bytes()
+    assert data[:4] == MAGIC
+    assert struct.unpack_from("<HHI", data, 4) == (VERSION, 5, 2)
+    fields_end = 20 + sum(2 + len(name) for name in ("Given_Name", "Family_Name", "S", "Level", "SDMS_ID"))
+    # SNC_IDs in roster order, then the index sorted by SNC_ID
+    assert data[fields_end : fields_end + 16] == bytes.fromhex("2c010000 64000000 01000000 00000000")
+
+
+@pytest.mark.parametrize(
+    "data",
+    [b"", b"SURS", b"XXXX" + bytes(16), struct.pack("<4sHHIII", MAGIC, 1, 0, 0, 20, 0)],
+    ids=["empty", "short", "magic", "version 1"],
+)
+def test_not_a_snapshot(tmp_path, data):
+    path = tmp_path / "roster.bin"
+    path.write_bytes(data)
+    with pytest.raises(SnapshotError):
+        RosterSnapshot(str(path))
+
+
+def test_truncated(tmp_path):
+    path = tmp_path / "roster.bin"
+    write_snapshot(ROSTER, str(path))
+    path.write_bytes(path.read_bytes()[:-10])
+    with pytest.raises(SnapshotError):
+        RosterSnapshot(str(path))
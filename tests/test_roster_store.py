@@ -0,0 +1,115 @@
+import datetime
+import sqlite3
+
+import pytest
+
+from roster_store import ON_ROSTER, SCHEMA_VERSION, RosterChange, RosterStore
+
+
+def athlete(snc_id, level="Int", s="9", exceptions=None, **extra):
+    entry = {
+        "SNC_ID": snc_id,
+        "Given_Name": "Given" + str(snc_id),
+        "Family_Name": "Family",
+        "Level": level,
+        "S": s,
+        "SB": s,
+        "SM": s,
+        "Exceptions": exceptions,
+        "SDMS_ID": None,
+    }
+    entry.update(extra)
+    return entry
+
+
+ROSTER = [athlete(100), athlete(200, "2", "PI", "4,7"), athlete(300, "Int", "5", "4")]
+
+
+@pytest.fixture
+def store(tmp_path):
+    with RosterStore(str(tmp_path / "roster.sqlite")) as store:
+        store.refresh(ROSTER, datetime.datetime(2026, 10, 1, 12))
+        yield store
+
+
+def test_find(store):
+    assert len(store) == 3
+    assert [a["SNC_ID"] for a in store.find(level="Int")] == [100, 300]
+    # Stored the way Splash holds it - no sport class is "0"
+    assert [a["SNC_ID"] for a in store.find(s="0")] == [200]
+    assert [a["SNC_ID"] for a in store.find(exception="4")] == [200, 300]
+    assert [a["SNC_ID"] for a in store.find(exception="4", level="Int")] == [300]
+    assert store.get(200) == ROSTER[1]
+    assert store.get(999) is None
+    with pytest.raises(ValueError):
+        store.find(club="ABC")
+
+
+def test_count_by(store):
+    assert store.count_by("level") == {"Int": 2, "2": 1}
+    with pytest.raises(ValueError):
+        store.count_by("data")
+
+
+def test_changes_between(store):
+    roster = [athlete(100, "1"), ROSTER[1], athlete(400)]
+    store.refresh(roster, datetime.datetime(2026, 10, 5, 12))
+    assert store.history_dates() == ["2026-10-01", "2026-10-05"]
+    assert store.changes_between("2026-10-01", "2026-10-05") == [
+        RosterChange("100", "Given100", "Family", "Level", "Int", "1"),
+        RosterChange("300", "Given300", "Family", ON_ROSTER, "Yes", None),
+        RosterChange("400", "Given400", "Family", ON_ROSTER, None, "Yes"),
+    ]
+    assert store.changes_between("2026-10-02", "2026-10-04") == []
+
+
+def test_old_schema_is_rebuilt(tmp_path):
+    path = str(tmp_path / "roster.sqlite")
+    with RosterStore(path) as store:
+        store.refresh(ROSTER, datetime.datetime(2026, 10, 1, 12))
+    with sqlite3.connect(path) as con:
+        con.execute("PRAGMA user_version = {}".format(SCHEMA_VERSION - 1))
+    con.close()
+    with RosterStore(path) as store:
+        # Emptied so the next sync refreshes it, with the history kept
+        assert store.refreshed is None
+        assert len(store) == 0
+        assert store.history_dates() == ["2026-10-01"]
+
+
+def test_no_exceptions_stored_as_null(store):
+    assert store.find(exception="None") == []
+    assert store._con.execute("SELECT exceptions FROM athletes WHERE snc_id = '100'").fetchone() == (None,)
+    # An athlete whose exceptions are cleared shows as a change to None
+    store.refresh([ROSTER[0], athlete(200, "2", "PI"), ROSTER[2]], datetime.datetime(2026, 10, 5, 12))
+    assert store.changes_between("2026-10-01", "2026-10-05") == [
+        RosterChange("200", "Given200", "Family", "Exceptions", "4,7", None)
+    ]
+
+
+def test_old_none_exceptions_cleaned_from_history(tmp_path):
+    path = str(tmp_path / "roster.sqlite")
+    with RosterStore(path) as store:
+        store.refresh(ROSTER, datetime.datetime(2026, 10, 1, 12))
+    with sqlite3.connect(path) as con:
+        con.execute("UPDATE athlete_versions SET exceptions = 'None' WHERE exceptions IS NULL")
+        con.execute("PRAGMA user_version = 2")
+    con.close()
+    with RosterStore(path) as store:
+        store.refresh([athlete(100, "1"), ROSTER[1], ROSTER[2]], datetime.datetime(2026, 10, 5, 12))
+        assert store.changes_between("2026-10-01", "2026-10-05") == [
+            RosterChange("100", "Given100", "Family", "Level", "Int", "1")
+        ]
+
+
+def test_duplicate_ids_match_nobody(tmp_path):
+    roster = ROSTER + [athlete(300, "2", "6")]
+    with RosterStore(str(tmp_path / "roster.sqlite")) as store:
+        assert store.refresh(roster, datetime.datetime(2026, 10, 1, 12)) == 2
+        assert store.get(300) is None
+        assert store.find(exception="4") == [ROSTER[1]]
+        store.refresh(roster, datetime.datetime(2026, 10, 2, 12))
+        store.refresh(roster, datetime.datetime(2026, 10, 3, 12))
+        # Refreshing the same roster adds no history
+        assert store.history_dates() == ["2026-10-01"]
+        assert store._con.execute("SELECT COUNT(*) FROM roster_changes").fetchone() == (2,)
@@ -0,0 +1,119 @@
+import json
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+import requests
+
+import roster_sync
+from conftest import StubResponse
+from roster_snapshot import RosterSnapshot
+
+ROSTER = [
+    {"SNC_ID": 300, "Given_Name": "Jane", "Family_Name": "Doe", "Level": "Int"},
+    {"SNC_ID": 100, "Given_Name": "Zoë", "Family_Name": "Lévesque", "Level": "Nat"},
+    {"SNC_ID": 200, "Given_Name": "First", "Family_Name": "Copy", "Level": None},
+    {"SNC_ID": 200, "Given_Name": "Second", "Family_Name": "Copy", "Level": "Prov"},
+]
+
+
+def published(roster):
+    """The roster as sync() returns it"""
+    return [dict(athlete, SNC_ID=str(athlete["SNC_ID"])) for athlete in roster]
+
+
+def full(roster, etag='"v1"'):
+    return StubResponse(200, json.dumps(roster).encode("utf-8"), {"ETag": etag})
+
+
+def since(request):
+    return parse_qs(urlsplit(request.path).query).get("since")
+
+
+@pytest.fixture
+def snapshot_file(tmp_path):
+    return str(tmp_path / "roster.bin")
+
+
+@pytest.fixture
+def synced(stub_server, http_session, snapshot_file):
+    """A first full sync done, with the stub's request log cleared"""
+    stub_server.reply(full(ROSTER))
+    roster_sync.sync(stub_server.url, {}, snapshot_file)
+    stub_server.requests.clear()
+    return stub_server
+
+
+def test_first_sync_downloads_everything(stub_server, http_session, snapshot_file):
+    stub_server.reply(full(ROSTER))
+    result = roster_sync.sync(stub_server.url, {}, snapshot_file)
+    assert result.roster == published(ROSTER)
+    assert (result.added, result.changed, result.removed) == (3, 0, 0)
+    assert "If-None-Match" not in stub_server.requests[0].headers
+    assert since(stub_server.requests[0]) is None
+    with RosterSnapshot(snapshot_file) as snapshot:
+        assert snapshot.to_list() == published(ROSTER)
+
+
+def test_not_modified_returns_roster_as_published(synced, snapshot_file):
+    synced.reply(StubResponse(304))
+    result = roster_sync.sync(synced.url, {}, snapshot_file)
+    assert synced.requests[0].headers["If-None-Match"] == '"v1"'
+    # Duplicate SNC_IDs and the published order survive
+    assert result.roster == published(ROSTER)
+    assert (result.added, result.changed, result.removed) == (0, 0, 0)
+
+
+def test_full_roster_diffed_locally(synced, snapshot_file):
+    roster = [dict(ROSTER[1], Level="Int"), ROSTER[2], {"SNC_ID": 400, "Given_Name": "New", "Family_Name": "One"}]
+    # The endpoint ignores the since query and answers with the whole roster
+    synced.reply(full(roster, '"v2"'))
+    result = roster_sync.sync(synced.url, {}, snapshot_file)
+    assert since(synced.requests[0]) is not None
+    assert result.roster == published(roster)
+    # 400 added; 100 and 200 (now listed once) changed; 300 removed
+    assert (result.added, result.changed, result.removed) == (1, 2, 1)
+    with RosterSnapshot(snapshot_file) as snapshot:
+        assert snapshot.to_list() == published(roster)
+
+
+def test_delta_applied_to_snapshot(synced, snapshot_file):
+    delta = {"Changed": [dict(ROSTER[1], Level="Int"), {"SNC_ID": 400, "Given_Name": "New"}], "Removed": [300]}
+    synced.reply(StubResponse(200, json.dumps(delta).encode("utf-8")))
+    result = roster_sync.sync(synced.url, {}, snapshot_file)
+    expected = published([dict(ROSTER[1], Level="Int"), ROSTER[2], ROSTER[3], {"SNC_ID": 400, "Given_Name": "New"}])
+    assert result.roster == expected
+    assert (result.added, result.changed, result.removed) == (1, 1, 1)
+    with RosterSnapshot(snapshot_file) as snapshot:
+        assert snapshot.to_list() == expected
+
+
+def test_rejected_since_is_retried_later(synced, snapshot_file, monkeypatch):
+    synced.reply(StubResponse(400), full(ROSTER))
+    result = roster_sync.sync(synced.url, {}, snapshot_file)
+    assert [since(r) is not None for r in synced.requests] == [True, False]
+    assert result.roster == published(ROSTER)
+
+    # Not sent again straight away...
+    synced.requests.clear()
+    synced.reply(StubResponse(304))
+    roster_sync.sync(synced.url, {}, snapshot_file)
+    assert since(synced.requests[0]) is None
+
+    # ...but once SINCE_RETRY has passed
+    synced.requests.clear()
+    monkeypatch.setattr(roster_sync, "SINCE_RETRY", 0.0)
+    roster_sync.sync(synced.url, {}, snapshot_file)
+    assert since(synced.requests[0]) is not None
+
+
+def test_not_found_is_an_error(synced, snapshot_file):
+    synced.reply(StubResponse(404))
+    with pytest.raises(requests.exceptions.HTTPError):
+        roster_sync.sync(synced.url, {}, snapshot_file)
+    assert len(synced.requests) == 1
+
+
+def test_apply_delta_replaces_every_entry_for_an_id():
+    roster = published(ROSTER)
+    changed = [{"SNC_ID": "200", "Given_Name": "Only"}]
+    assert roster_sync.apply_delta(roster, changed, {"100"}) == [roster[0], changed[0]]
@@ -0,0 +1,139 @@
+import sqlite3
+
+import pytest
+
+from write_scheduler import UNCONTENDED_BATCH, LockTimeout, WriteScheduler, database_in_use
+
+INSERT = "INSERT INTO ATHLETE (ATHLETEID, LASTNAME) VALUES (?, ?)"
+ROWS = [(i, "Name{}".format(i)) for i in range(1, 6)]
+
+
+class Sleeps:
+    """Stands in for time.sleep: records the waits and runs an action on chosen calls"""
+
+    def __init__(self, actions=None):
+        self.waits = []
+        self._actions = actions or {}
+
+    def __call__(self, seconds: float) -> None:
+        self.waits.append(seconds)
+        action = self._actions.get(len(self.waits))
+        if action is not None:
+            action()
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / "meet.db")
+    with sqlite3.connect(path) as con:
+        con.execute("CREATE TABLE ATHLETE (ATHLETEID INTEGER PRIMARY KEY, LASTNAME TEXT)")
+    con.close()
+    return path
+
+
+@pytest.fixture
+def writer(database):
+    # No busy timeout - a locked database fails at once, as Access does
+    con = sqlite3.connect(database, timeout=0)
+    yield con
+    con.close()
+
+
+@pytest.fixture
+def splash(database):
+    """Another program with the database open, which can hold a write lock"""
+    con = sqlite3.connect(database, timeout=0, isolation_level=None)
+    yield con
+    if con.in_transaction:
+        con.execute("ROLLBACK")
+    con.close()
+
+
+def stored(database):
+    con = sqlite3.connect(database)
+    try:
+        return con.execute("SELECT ATHLETEID, LASTNAME FROM ATHLETE ORDER BY ATHLETEID").fetchall()
+    finally:
+        con.close()
+
+
+def test_uncontended_writes_one_batch(database, writer):
+    sleeps = Sleeps()
+    scheduler = WriteScheduler(writer, in_use=False, batch_size=2, sleep=sleeps)
+    assert scheduler.batch_size == UNCONTENDED_BATCH
+    assert scheduler.executemany(INSERT, ROWS) == 5
+    stats = scheduler.stats()
+    assert (stats.rows, stats.batches, stats.retries) == (5, 1, 0)
+    assert sleeps.waits == []
+    assert stored(database) == ROWS
+
+
+def test_yields_between_time_slices(database, writer):
+    sleeps = Sleeps()
+    scheduler = WriteScheduler(writer, batch_size=2, slice_seconds=0.0, pause=0.05, sleep=sleeps)
+    scheduler.executemany(INSERT, ROWS)
+    # A pause after each of the three batches
+    assert sleeps.waits == [0.05] * 3
+    assert scheduler.stats().batches == 3
+
+
+def test_waits_out_a_lock(database, writer, splash):
+    splash.execute("BEGIN IMMEDIATE")
+    sleeps = Sleeps({2: lambda: splash.execute("ROLLBACK")})
+    scheduler = WriteScheduler(writer, batch_size=2, backoff=0.1, max_backoff=0.15, slice_seconds=None, sleep=sleeps)
+    assert scheduler.executemany(INSERT, ROWS) == 5
+    stats = scheduler.stats()
+    assert stats.retries == 2
+    # Jittered exponential backoff, capped
+    assert 0.05 <= sleeps.waits[0] <= 0.1
+    assert 0.075 <= sleeps.waits[1] <= 0.15
+    assert stats.lock_wait == pytest.approx(sum(sleeps.waits))
+    assert stored(database) == ROWS
+
+
+def test_lock_timeout_reports_rows_written(database, writer, splash):
+    # Splash takes its lock in the pause after the first batch and keeps it
+    sleeps = Sleeps({1: lambda: splash.execute("BEGIN IMMEDIATE")})
+    scheduler = WriteScheduler(writer, batch_size=2, retries=3, slice_seconds=0.0, pause=0.01, sleep=sleeps)
+    with pytest.raises(LockTimeout, match="after 3 retries") as info:
+        scheduler.executemany(INSERT, ROWS)
+    assert info.value.written == 2
+    assert scheduler.stats().retries == 3
+    splash.execute("ROLLBACK")
+    # The first batch was committed, the locked one rolled back
+    assert stored(database) == ROWS[:2]
+
+
+def test_other_errors_are_not_retried(writer):
+    sleeps = Sleeps()
+    scheduler = WriteScheduler(writer, slice_seconds=None, sleep=sleeps)
+    with pytest.raises(sqlite3.OperationalError, match="no such table"):
+        scheduler.execute("UPDATE NOSUCH SET X = 1")
+    assert sleeps.waits == []
+    assert scheduler.stats().retries == 0
+
+
+def test_execute_returns_row_count(database, writer):
+    scheduler = WriteScheduler(writer, in_use=False)
+    scheduler.executemany(INSERT, ROWS)
+    # Parameters as one sequence - sqlite3 doesn't take them spread out as pyodbc does
+    assert scheduler.execute("UPDATE ATHLETE SET LASTNAME = ? WHERE ATHLETEID > ?", ("X", 3)) == 2
+
+
+def test_for_connection(writer):
+    class Connection:
+        def __init__(self, in_use):
+            self.in_use = in_use
+
+    assert WriteScheduler.for_connection(Connection(False)).batch_size == UNCONTENDED_BATCH
+    assert WriteScheduler.for_connection(Connection(True), batch_size=20).batch_size == 20
+    # Not known - assume Splash has it open
+    assert WriteScheduler.for_connection(writer).batch_size == 50
+
+
+def test_database_in_use(tmp_path):
+    database = tmp_path / "meet.mdb"
+    database.write_bytes(b"")
+    assert not database_in_use(str(database))
+    (tmp_path / "meet.ldb").write_bytes(b"")
+    assert database_in_use(str(database))
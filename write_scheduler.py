@@ -0,0 +1,168 @@
+"""
+Database writes that share the file with Splash Meet Manager.
+
+While Splash has a meet open it holds the .ldb lock file and takes record
+locks of its own, so an UPDATE from here can fail with "currently locked".
+The scheduler writes in small committed batches, retries a locked batch with
+a bounded exponential backoff, and pauses between time slices so Splash isn't
+kept waiting behind a long run of our writes. When there is no lock file
+nobody else has the database open and everything goes in large batches.
+"""
+
+import logging
+import os
+import random
+import time
+from typing import Callable, NamedTuple, Sequence
+
+from db_watch import lock_file
+from job_metrics import metrics
+
+# Error text (lower case) that means another user holds a lock - Access/Jet and SQLite
+LOCK_MESSAGES = (
+    "currently locked",
+    "could not lock",
+    "already in use",
+    "opened exclusively",
+    "same data at the same time",
+    "database is locked",
+)
+
+# Batch size when nobody else has the database open
+UNCONTENDED_BATCH = 1000
+
+
+class LockTimeout(Exception):
+    """A batch stayed locked through every retry"""
+
+
+class WriteStats(NamedTuple):
+    rows: int
+    batches: int
+    retries: int
+    lock_wait: float  # Seconds spent backing off from locks
+    elapsed: float
+
+
+def is_lock_error(ex: Exception) -> bool:
+    """True if the database error is lock contention (worth retrying)"""
+    text = str(ex).lower()
+    return any(message in text for message in LOCK_MESSAGES)
+
+
+def database_in_use(database: str) -> bool:
+    """
+    True if Access's lock file is present, i.e. someone (usually Splash) has
+    the database open. Check before connecting - our own connection creates
+    the lock file too.
+    """
+    return os.path.exists(lock_file(database))
+
+
+class WriteScheduler:
+    """Writes rows to an open connection in committed, lock-tolerant batches"""
+
+    def __init__(
+        self,
+        con,
+        in_use: bool = True,
+        batch_size: int = 50,
+        retries: int = 8,
+        backoff: float = 0.1,
+        max_backoff: float = 2.0,
+        slice_seconds: float = 0.25,
+        pause: float = 0.05,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self._con = con
+        self.batch_size = batch_size if in_use else UNCONTENDED_BATCH
+        self.slice_seconds = slice_seconds if in_use else None
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.pause = pause
+        self._sleep = sleep
+
+        self._rows = 0
+        self._batches = 0
+        self._retries = 0
+        self._lock_wait = 0.0
+        self._start = time.perf_counter()
+        self._slice_start = self._start
+
+    @classmethod
+    def for_connection(cls, con, batch_size: int = 50, retries: int = 8) -> "WriteScheduler":
+        """
+        A scheduler sized by con.in_use - whether the database was already open
+        elsewhere when con connected (see open_database). A connection without
+        it is taken to be shared.
+        """
+        in_use = getattr(con, "in_use", True)
+        if in_use:
+            logging.info("The database is open in another program - writing in batches of %s", batch_size)
+        return cls(con, in_use, batch_size, retries)
+
+    def stats(self) -> WriteStats:
+        return WriteStats(self._rows, self._batches, self._retries, self._lock_wait, time.perf_counter() - self._start)
+
+    def executemany(self, sql: str, rows: Sequence[Sequence]) -> int:
+        """
+        Write rows in batches, committing each one. Returns the number of rows written.
+
+        If a batch fails (after retries, for a lock) it is rolled back and the
+        exception raised with the rows written so far in its `written` attribute.
+        """
+        written = 0
+        cursor = self._con.cursor()
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start : start + self.batch_size]
+            try:
+                self._with_retries(lambda: cursor.executemany(sql, batch))
+            except Exception as ex:
+                ex.written = written  # type: ignore[attr-defined]
+                raise
+            written += len(batch)
+            self._rows += len(batch)
+            metrics.advance(len(batch))
+        return written
+
+    def execute(self, sql: str, *params) -> int:
+        """Run and commit one statement, retrying locks. Returns the row count"""
+        cursor = self._con.cursor()
+        self._with_retries(lambda: cursor.execute(sql, *params))
+        return cursor.rowcount
+
+    def _with_retries(self, write: Callable[[], object]) -> None:
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                write()
+                self._con.commit()
+                self._batches += 1
+                break
+            except Exception as ex:  # pylint: disable=broad-except
+                self._con.rollback()
+                if not is_lock_error(ex):
+                    raise
+                if attempt == self.retries:
+                    raise LockTimeout(
+                        "Database still locked after {} retries ({:.1f} s waiting): {}".format(
+                            self.retries, self._lock_wait, ex
+                        )
+                    ) from ex
+                self._retries += 1
+                # Jittered, so retries don't fall into step with the other program's writes
+                wait = random.uniform(delay / 2, delay)
+                self._sleep(wait)
+                self._lock_wait += wait
+                delay = min(delay * 2, self.max_backoff)
+        self._yield()
+
+    def _yield(self) -> None:
+        """At the end of each time slice, give the other program a moment to get its writes in"""
+        if self.slice_seconds is None:
+            return
+        now = time.perf_counter()
+        if now - self._slice_start >= self.slice_seconds:
+            self._sleep(self.pause)
+            self._slice_start = time.perf_counter()